@@ -0,0 +1,145 @@
+# api/article_store.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from .responses import decode_json, encode_json
+
+logger = logging.getLogger(__name__)
+
+class ArticleStore:
+    """
+    SQLite (WAL mode) store for pre-generated league news, shared by every
+    worker on the host. Also remembers which managers have asked for news
+    (with the team/manager names they used) so the precompute worker knows
+    whose articles to build, and keeps the worker's progress markers.
+    The database is opened on first use, not when the store is created.
+    """
+
+    # Seconds before an unchanged manager's last_seen is written again, and
+    # how many managers this process remembers having written
+    LAST_SEEN_REFRESH = 3600
+    REMEMBERED_MANAGERS = 10000
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._remembered = OrderedDict()
+
+    def _create_schema(self, conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS managers ("
+            "player_id TEXT PRIMARY KEY, "
+            "team_name TEXT NOT NULL, "
+            "manager_name TEXT NOT NULL, "
+            "last_seen REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "player_id TEXT NOT NULL, "
+            "gameweek INTEGER NOT NULL, "
+            "team_name TEXT NOT NULL, "
+            "manager_name TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "etag TEXT, "
+            "generated_at REAL NOT NULL, "
+            "PRIMARY KEY (player_id, gameweek))"
+        )
+        # Stores created before ETags were recorded lack the column
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+        if 'etag' not in columns:
+            conn.execute("ALTER TABLE articles ADD COLUMN etag TEXT")
+        conn.execute("CREATE TABLE IF NOT EXISTS worker_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.commit()
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads, keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def is_remembered(self, player_id, team_name: str, manager_name: str) -> bool:
+        """Whether this process recently stored the manager with these names, so remember_manager can be skipped"""
+        with self._lock:
+            known = self._remembered.get(str(player_id))
+        return known is not None and known[:2] == (team_name, manager_name) and time.time() - known[2] < self.LAST_SEEN_REFRESH
+
+    def remember_manager(self, player_id, team_name: str, manager_name: str):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT INTO managers (player_id, team_name, manager_name, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(player_id) DO UPDATE SET team_name = excluded.team_name, "
+                "manager_name = excluded.manager_name, last_seen = excluded.last_seen",
+                (str(player_id), team_name, manager_name, now)
+            )
+        with self._lock:
+            self._remembered[str(player_id)] = (team_name, manager_name, now)
+            self._remembered.move_to_end(str(player_id))
+            while len(self._remembered) > self.REMEMBERED_MANAGERS:
+                self._remembered.popitem(last=False)
+
+    def managers(self, seen_since: float = 0) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT player_id, team_name, manager_name FROM managers WHERE last_seen >= ? ORDER BY last_seen DESC",
+            (seen_since,)
+        ).fetchall()
+        return [{'player_id': row[0], 'team_name': row[1], 'manager_name': row[2]} for row in rows]
+
+    def get_articles(self, player_id, gameweek: int, team_name: str, manager_name: str) -> Optional[Tuple[Dict, Optional[str]]]:
+        """Stored (news, etag) for this manager and gameweek, if rendered with the same names"""
+        row = self._connect().execute(
+            "SELECT payload, etag FROM articles WHERE player_id = ? AND gameweek = ? AND team_name = ? AND manager_name = ?",
+            (str(player_id), gameweek, team_name, manager_name)
+        ).fetchone()
+        return (decode_json(row[0]), row[1]) if row else None
+
+    def put_articles(self, player_id, gameweek: int, team_name: str, manager_name: str, payload: Dict, etag: Optional[str] = None):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO articles (player_id, gameweek, team_name, manager_name, payload, etag, generated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(player_id), gameweek, team_name, manager_name, encode_json(payload).decode(), etag, time.time())
+            )
+
+    def article_count(self, gameweek: int) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM articles WHERE gameweek = ?", (gameweek,)).fetchone()[0]
+
+    def prune(self, keep_from_gameweek: int):
+        """Drop articles for gameweeks before keep_from_gameweek"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM articles WHERE gameweek < ?", (keep_from_gameweek,))
+
+    def get_state(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM worker_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO worker_state (key, value) VALUES (?, ?)", (key, value))
+
+def create_article_store() -> ArticleStore:
+    config = getattr(settings, 'FPL_NEWS_PRECOMPUTE', {})
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return ArticleStore(config.get('STORE_PATH') or os.path.join(current_dir, 'league_news.sqlite3'))
+
+# Global instance
+article_store = create_article_store()
@@ -0,0 +1,204 @@
+# api/autocomplete.py
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# (manager_name, squad_name) as returned by the search cluster
+Record = Tuple[str, str]
+
+def normalise_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+def build_suggestions(records: List[Record], query: str, field: str = 'both', limit: int = 10) -> List[Dict]:
+    """Autocomplete suggestions for the records whose name/team contains the query"""
+    query = query.lower()
+    suggestions = []
+    for manager_name, squad_name in records:
+        if field == 'team':
+            # For team field, only show if squad_name contains the query
+            if query in squad_name.lower():
+                suggestions.append({
+                    'type': 'team',
+                    'team_name': squad_name,
+                    'full_name': manager_name,
+                    'display': f"{squad_name} - {manager_name}"
+                })
+        elif field == 'name':
+            # For name field, only show if manager_name contains the query
+            if query in manager_name.lower():
+                suggestions.append({
+                    'type': 'name',
+                    'team_name': squad_name,
+                    'full_name': manager_name,
+                    'display': f"{manager_name} - {squad_name}"
+                })
+        else:
+            # For 'both', show if either field contains the query
+            if query in manager_name.lower() or query in squad_name.lower():
+                suggestions.append({
+                    'type': 'both',
+                    'team_name': squad_name,
+                    'full_name': manager_name,
+                    'display': f"{manager_name} ({squad_name})"
+                })
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+class AutocompleteIndex:
+    """
+    In-process layer in front of the search cluster for autocomplete.
+    Answers a keystroke, cheapest first, from:
+      1. an LRU/TTL cache of the records the cluster returned per query
+      2. a cached shorter prefix whose result set was complete (fewer hits
+         than a page), narrowed locally since longer queries only match
+         a subset of it
+      3. a sorted-array prefix index over the most frequently returned
+         manager and squad names, when it alone fills a page of suggestions
+    Anything else is a miss and goes to the cluster.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'FPL_AUTOCOMPLETE', {})
+        self.ttl = config.get('CACHE_TTL', 300)
+        self.max_entries = config.get('CACHE_SIZE', 5000)
+        self.index_size = config.get('INDEX_SIZE', 20000)
+        self.rebuild_interval = config.get('INDEX_REBUILD_INTERVAL', 60)
+        self.use_prefix_index = config.get('PREFIX_INDEX', True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # How often each record came back from the cluster
+        self._popularity: Dict[Record, int] = {}
+        # (sorted name keys, record rank per key, records by popularity), swapped in whole
+        self._index: Tuple[List[str], List[int], List[Record]] = ([], [], [])
+        self._index_built_at = 0.0
+        self._index_dirty = False
+        self._index_generation = 0
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self.stats = {'hits': 0, 'narrowed': 0, 'index_hits': 0, 'misses': 0}
+
+    def lookup(self, query: str, field: str = 'both', limit: int = 10) -> Optional[List[Dict]]:
+        """Suggestions answered locally, or None if the cluster has to be asked"""
+        key = normalise_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return build_suggestions(entry[1], query, field, limit)
+
+            # Longest complete shorter prefix still in the cache
+            for end in range(len(key) - 1, 1, -1):
+                prefix_entry = self._entries.get(key[:end])
+                if prefix_entry is not None and prefix_entry[2] and prefix_entry[0] > now:
+                    records = [
+                        record for record in prefix_entry[1] if key in normalise_query(record[0]) or key in normalise_query(record[1])
+                    ]
+                    self._store(key, records, True, prefix_entry[0])
+                    self.stats['narrowed'] += 1
+                    return build_suggestions(records, query, field, limit)
+
+        if self.use_prefix_index:
+            suggestions = self._index_lookup(key, query, field, limit)
+            if suggestions is not None:
+                with self._lock:
+                    self.stats['index_hits'] += 1
+                return suggestions
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def store(self, query: str, records: List[Record], complete: bool):
+        """
+        Remember the cluster's records for a query; complete means the cluster
+        returned every match (less than a page), so longer queries can be narrowed.
+        """
+        key = normalise_query(query)
+        with self._lock:
+            self._store(key, records, complete, time.monotonic() + self.ttl)
+            for record in records:
+                self._popularity[record] = self._popularity.get(record, 0) + 1
+            self._index_dirty = True
+
+    def _store(self, key, records, complete, expires_at):
+        self._entries[key] = (expires_at, records, complete)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _index_lookup(self, key, query, field, limit):
+        self._start_rebuild_if_due()
+        keys, key_records, records = self._index
+        if not keys:
+            return None
+
+        ranks = set()
+        position = bisect_left(keys, key)
+        while position < len(keys) and keys[position].startswith(key):
+            ranks.add(key_records[position])
+            position += 1
+        if len(ranks) < limit:
+            return None
+        # Most popular first, as the cluster would put the closest matches first
+        suggestions = build_suggestions([records[rank] for rank in sorted(ranks)], query, field, limit)
+        return suggestions if len(suggestions) >= limit else None
+
+    def _start_rebuild_if_due(self):
+        # Sorting up to INDEX_SIZE records takes tens of ms, so it runs on a
+        # worker thread while lookups keep using the current index
+        with self._lock:
+            if not self._index_dirty or time.monotonic() - self._index_built_at < self.rebuild_interval:
+                return
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self.rebuild_index, name='autocomplete-index', daemon=True)
+            self._rebuild_thread.start()
+
+    def rebuild_index(self):
+        """Re-index the most popular records' names by every word start"""
+        with self._lock:
+            popular = sorted(self._popularity.items(), key=lambda item: -item[1])[:self.index_size]
+            # Forget the long tail so popularity doesn't grow without bound
+            self._popularity = dict(popular)
+            self._index_dirty = False
+            self._index_built_at = time.monotonic()
+            generation = self._index_generation
+
+        records = [record for record, _ in popular]
+        pairs = []
+        for rank, (manager_name, squad_name) in enumerate(records):
+            for name in {manager_name.lower(), squad_name.lower()}:
+                words = name.split()
+                # "de bruyne fc" is reachable from "de", "bruyne" and "fc"
+                for i in range(len(words)):
+                    pairs.append((' '.join(words[i:]), rank))
+        pairs.sort()
+        with self._lock:
+            # Don't bring back records a clear() dropped while this was building
+            if generation != self._index_generation:
+                return
+            self._index = ([key for key, _ in pairs], [rank for _, rank in pairs], records)
+        logger.info(f"Rebuilt autocomplete prefix index: {len(records)} records, {len(pairs)} keys")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._popularity.clear()
+            self._index_dirty = False
+            self._index_generation += 1
+            self._index = ([], [], [])
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'cached_queries': len(self._entries), 'indexed_records': len(self._index[2])}
+
+# Global instance
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,359 @@
+# api/bet_history.py
+import json
+import os
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_BETS_PER_USER = 50
+
+def _encode(bet: Dict) -> str:
+    return json.dumps(bet, separators=(',', ':'))
+
+class BetHistoryStore(ABC):
+    """
+    Interface for bet history backends.
+    Every backend keeps only the last MAX_BETS_PER_USER bets per user.
+    """
+
+    # Whether every worker process sees the same data without reloading
+    shared = False
+
+    @abstractmethod
+    def append(self, player_id, bet: Dict):
+        """Record one bet, trimming the player's history to MAX_BETS_PER_USER"""
+
+    @abstractmethod
+    def get(self, player_id) -> List[Dict]:
+        """The player's bets, oldest first"""
+
+    @abstractmethod
+    def user_count(self) -> int:
+        """Number of players with any bets"""
+
+    def is_empty(self) -> bool:
+        return self.user_count() == 0
+
+    def load(self):
+        """Refresh any in-process state from storage (no-op for shared backends)"""
+
+    def import_history(self, data: Dict[str, List[Dict]]):
+        """Bulk load a {player_id: [bets]} mapping, e.g. the legacy JSON file"""
+        for player_id, bets in data.items():
+            for bet in bets[-MAX_BETS_PER_USER:]:
+                self.append(player_id, bet)
+
+class JsonlBetHistoryStore(BetHistoryStore):
+    """
+    Append-only bet history log for single-process deployments.
+    Each bet is one JSON line ({"player_id": ..., "bet": {...}}), so recording a
+    bet is a single O(1) append. The log is replayed on startup and compacted
+    (rewritten atomically with only the last MAX_BETS_PER_USER bets per user)
+    once it grows past twice the number of live records.
+    """
+
+    def __init__(self, log_file: str, compact_min_lines: int = 1000):
+        self.log_file = log_file
+        self.compact_min_lines = compact_min_lines
+        self._lock = threading.Lock()
+        self.history: Dict[str, List[Dict]] = {}
+        self._log_lines = 0
+        self._live_records = 0
+        self.load()
+
+    def load(self):
+        """Replay the log into memory"""
+        with self._lock:
+            self.history = {}
+            self._log_lines = 0
+            self._live_records = 0
+
+            if not os.path.exists(self.log_file):
+                logger.info(f"No existing bet history log found at {self.log_file}")
+                return
+
+            skipped = 0
+            with open(self.log_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        self._apply(entry['player_id'], entry['bet'])
+                        self._log_lines += 1
+                    except (ValueError, KeyError):
+                        # A torn final line from a crash mid-append is skipped
+                        skipped += 1
+
+            if skipped:
+                # Rewrite the log so the next append doesn't land on a torn line
+                logger.warning(f"Skipped {skipped} unreadable lines in {self.log_file}")
+                self._compact_locked()
+            logger.info(f"Replayed bet history log {self.log_file}: {len(self.history)} users, {self._log_lines} entries")
+
+    def _apply(self, player_id, bet: Dict):
+        bets = self.history.setdefault(str(player_id), [])
+        bets.append(bet)
+        self._live_records += 1
+        if len(bets) > MAX_BETS_PER_USER:
+            self._live_records -= len(bets) - MAX_BETS_PER_USER
+            del bets[:-MAX_BETS_PER_USER]
+
+    def append(self, player_id, bet: Dict):
+        """Record one bet: a single appended, fsynced line"""
+        player_id = str(player_id)
+        line = json.dumps({'player_id': player_id, 'bet': bet}, separators=(',', ':')) + "\n"
+        with self._lock:
+            with open(self.log_file, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._log_lines += 1
+            self._apply(player_id, bet)
+
+            if self._log_lines > max(self.compact_min_lines, 2 * self._live_records):
+                self._compact_locked()
+
+    def import_history(self, data: Dict[str, List[Dict]]):
+        with self._lock:
+            for player_id, bets in data.items():
+                for bet in bets:
+                    self._apply(player_id, bet)
+            self._compact_locked()
+
+    def get(self, player_id) -> List[Dict]:
+        return self.history.get(str(player_id), [])
+
+    def user_count(self) -> int:
+        return len(self.history)
+
+    def compact(self):
+        """Rewrite the log with only the live records"""
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        tmp_file = f"{self.log_file}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                for player_id, bets in self.history.items():
+                    for bet in bets:
+                        f.write(json.dumps({'player_id': player_id, 'bet': bet}, separators=(',', ':')) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            # Atomic swap so a crash leaves either the old or the new log
+            os.replace(tmp_file, self.log_file)
+            self._log_lines = self._live_records
+            logger.info(f"Compacted bet history log {self.log_file} to {self._log_lines} entries")
+        except Exception as e:
+            logger.error(f"Error compacting bet history log: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+class SqliteBetHistoryStore(BetHistoryStore):
+    """
+    SQLite (WAL mode) bet history shared by every worker on the host.
+    Reads are indexed by player, so no worker holds a full copy in memory.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bets ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "player_id TEXT NOT NULL, "
+            "bet TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS bets_player_idx ON bets (player_id, id)")
+        conn.commit()
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads, keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, player_id, bet: Dict):
+        player_id = str(player_id)
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT INTO bets (player_id, bet) VALUES (?, ?)", (player_id, _encode(bet)))
+            conn.execute(
+                "DELETE FROM bets WHERE player_id = ? AND id NOT IN "
+                "(SELECT id FROM bets WHERE player_id = ? ORDER BY id DESC LIMIT ?)",
+                (player_id, player_id, MAX_BETS_PER_USER)
+            )
+
+    def import_history(self, data: Dict[str, List[Dict]]):
+        # Checked inside a write transaction so only one worker imports
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM bets LIMIT 1").fetchone() is None:
+                conn.executemany(
+                    "INSERT INTO bets (player_id, bet) VALUES (?, ?)",
+                    [(str(player_id), _encode(bet)) for player_id, bets in data.items() for bet in bets[-MAX_BETS_PER_USER:]]
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def get(self, player_id) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT bet FROM bets WHERE player_id = ? ORDER BY id", (str(player_id),)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def user_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(DISTINCT player_id) FROM bets").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM bets LIMIT 1").fetchone() is None
+
+class RedisBetHistoryStore(BetHistoryStore):
+    """
+    Bet history in Redis, one capped list per player plus a set of player ids.
+    Works with any client exposing pipeline/lrange/scard (redis-py, or
+    InMemoryRedis for local runs).
+    """
+
+    shared = True
+
+    def __init__(self, client, key_prefix: str = 'fpl:bets'):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str, key_prefix: str = 'fpl:bets'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis bet history backend requires the 'redis' package (pip install redis)")
+        return cls(redis.Redis.from_url(url), key_prefix)
+
+    def _key(self, player_id) -> str:
+        return f"{self.key_prefix}:{player_id}"
+
+    def append(self, player_id, bet: Dict):
+        player_id = str(player_id)
+        key = self._key(player_id)
+        # MULTI/EXEC, so the push, trim and user index land together or not at all
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(key, _encode(bet))
+        pipe.ltrim(key, -MAX_BETS_PER_USER, -1)
+        pipe.sadd(f"{self.key_prefix}:users", player_id)
+        pipe.execute()
+
+    def get(self, player_id) -> List[Dict]:
+        return [json.loads(item) for item in self.client.lrange(self._key(player_id), 0, -1)]
+
+    def user_count(self) -> int:
+        return self.client.scard(f"{self.key_prefix}:users")
+
+class InMemoryRedis:
+    """Minimal stand-in for the Redis commands RedisBetHistoryStore uses"""
+
+    def __init__(self):
+        self._data = {}
+        # Re-entrant so a pipeline can run its commands while holding it
+        self._lock = threading.RLock()
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+    @staticmethod
+    def _slice(items, start, end):
+        end = len(items) + end if end < 0 else end
+        start = max(0, len(items) + start if start < 0 else start)
+        return items[start:end + 1]
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._data.setdefault(key, [])
+            items.extend(v.encode() if isinstance(v, str) else v for v in values)
+            return len(items)
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            self._data[key] = self._slice(self._data.get(key, []), start, end)
+            return True
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            return list(self._slice(self._data.get(key, []), start, end))
+
+    def sadd(self, key, *members):
+        with self._lock:
+            existing = self._data.setdefault(key, set())
+            before = len(existing)
+            existing.update(members)
+            return len(existing) - before
+
+    def scard(self, key):
+        with self._lock:
+            return len(self._data.get(key, set()))
+
+class InMemoryPipeline:
+    """Queues InMemoryRedis commands and runs them under one lock hold, like MULTI/EXEC"""
+
+    def __init__(self, client: InMemoryRedis):
+        self.client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def queue(*args):
+            self._commands.append((command, args))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        with self.client._lock:
+            return [command(*args) for command, args in commands]
+
+def create_bet_history_store(legacy_file: str = None) -> BetHistoryStore:
+    """
+    Build the backend configured in settings.BET_HISTORY_STORE
+    ('sqlite' by default, 'redis', 'memory-redis' or 'jsonl'), importing the
+    legacy JSON history file into it the first time it is empty
+    """
+    config = getattr(settings, 'BET_HISTORY_STORE', {})
+    backend = config.get('BACKEND', 'sqlite')
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+
+    if backend == 'redis':
+        store = RedisBetHistoryStore.from_url(config.get('REDIS_URL', 'redis://localhost:6379/0'))
+    elif backend == 'memory-redis':
+        store = RedisBetHistoryStore(InMemoryRedis())
+    elif backend == 'jsonl':
+        store = JsonlBetHistoryStore(config.get('PATH') or os.path.join(current_dir, 'user_betting_history.jsonl'))
+    else:
+        store = SqliteBetHistoryStore(config.get('PATH') or os.path.join(current_dir, 'user_betting_history.sqlite3'))
+
+    if legacy_file and os.path.exists(legacy_file) and store.is_empty():
+        try:
+            with open(legacy_file, 'r') as f:
+                store.import_history(json.load(f))
+            logger.info(f"Imported legacy bet history from {legacy_file}: {store.user_count()} users")
+        except Exception as e:
+            logger.error(f"Error importing legacy bet history {legacy_file}: {e}")
+
+    logger.info(f"Using {type(store).__name__} for bet history")
+    return store
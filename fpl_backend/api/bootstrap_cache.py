@@ -0,0 +1,127 @@
+# api/bootstrap_cache.py
+import asyncio
+import logging
+import threading
+import time
+from django.conf import settings
+from .http_client import fpl_api_url, fpl_http_client
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_STATIC_PATH = 'bootstrap-static/'
+
+class BootstrapSnapshot:
+    """Parsed bootstrap-static payload with id -> player / id -> team indexes"""
+
+    def __init__(self, data, etag=None):
+        self.data = data
+        self.etag = etag
+        self.fetched_at = time.monotonic()
+        self.players = {p['id']: p for p in data.get('elements', [])}
+        self.teams = {t['id']: t for t in data.get('teams', [])}
+        self.events = data.get('events', [])
+        self.current_event = next((event for event in self.events if event.get('is_current')), None)
+
+    def age(self):
+        return time.monotonic() - self.fetched_at
+
+class BootstrapCache:
+    """
+    In-process TTL cache for bootstrap-static.
+    Expired entries are revalidated with If-None-Match, and concurrent callers
+    after expiry share a single upstream fetch. A failed fetch is remembered
+    for retry_interval seconds, during which callers get the stale snapshot
+    (or None) straight away instead of each retrying upstream.
+    """
+
+    def __init__(self):
+        self.ttl = getattr(settings, 'FPL_BOOTSTRAP_CACHE_TTL', 300)
+        self.retry_interval = getattr(settings, 'FPL_BOOTSTRAP_RETRY_INTERVAL', 10)
+        self._snapshot = None
+        self._failed_at = None
+        # loop -> asyncio.Lock; WSGI/runserver threads each run their own loop
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'fetches': 0, 'errors': 0, 'backoff': 0}
+
+    def _get_lock(self):
+        # asyncio.Lock is bound to a loop, so keep one per loop rather than replacing another thread's
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            with self._locks_guard:
+                self._locks = {other: lock for other, lock in self._locks.items() if not other.is_closed()}
+                lock = self._locks.setdefault(loop, asyncio.Lock())
+        return lock
+
+    def _is_fresh(self):
+        return self._snapshot is not None and self._snapshot.age() < self.ttl
+
+    def _in_backoff(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval
+
+    async def get_snapshot(self):
+        """Return a fresh snapshot, refreshing it at most once per expiry"""
+        if self._is_fresh():
+            self.stats['hits'] += 1
+            return self._snapshot
+        if self._in_backoff():
+            self.stats['backoff'] += 1
+            return self._snapshot
+
+        async with self._get_lock():
+            # Another caller may have refreshed (or just failed to) while we waited on the lock
+            if self._is_fresh():
+                self.stats['hits'] += 1
+                return self._snapshot
+            if self._in_backoff():
+                self.stats['backoff'] += 1
+                return self._snapshot
+            self.stats['misses'] += 1
+            return await self._refresh()
+
+    async def _refresh(self):
+        stale = self._snapshot
+        headers = {'If-None-Match': stale.etag} if stale and stale.etag else {}
+        try:
+            session = await fpl_http_client.get_session()
+            self.stats['fetches'] += 1
+            async with session.get(fpl_api_url(BOOTSTRAP_STATIC_PATH), headers=headers) as response:
+                if response.status == 304 and stale:
+                    stale.fetched_at = time.monotonic()
+                    self._failed_at = None
+                    self.stats['revalidated'] += 1
+                    logger.info("bootstrap-static not modified, cache revalidated")
+                    return stale
+
+                if not response.ok:
+                    logger.error(f"Failed to fetch bootstrap-static data. Status: {response.status}")
+                    self.stats['errors'] += 1
+                    self._failed_at = time.monotonic()
+                    return stale
+
+                data = await response.json()
+                self._snapshot = BootstrapSnapshot(data, response.headers.get('ETag'))
+                self._failed_at = None
+                logger.info(f"Refreshed bootstrap-static cache: {len(self._snapshot.players)} players, {len(self._snapshot.teams)} teams")
+                return self._snapshot
+        except Exception as e:
+            # Serve stale data rather than failing every request while upstream is down
+            logger.error(f"Error refreshing bootstrap-static cache: {e}")
+            self.stats['errors'] += 1
+            self._failed_at = time.monotonic()
+            return stale
+
+    def expire(self):
+        """Mark the snapshot stale but keep it, so the next call revalidates with its ETag"""
+        if self._snapshot is not None:
+            self._snapshot.fetched_at = time.monotonic() - self.ttl
+        self._failed_at = None
+
+    def invalidate(self):
+        """Drop the cached snapshot so the next call refetches"""
+        self._snapshot = None
+        self._failed_at = None
+
+# Global instance
+bootstrap_cache = BootstrapCache()
@@ -0,0 +1,309 @@
+# api/fpl_simulator.py
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import socket
+import threading
+from typing import Dict, List, Optional
+from aiohttp import web
+from .http_client import DEFAULT_FPL_API_BASE_URL, fpl_http_client
+from .responses import decode_json, encode_json
+
+logger = logging.getLogger(__name__)
+
+STANDINGS_PAGE_SIZE = 50
+
+# Leagues every real entry belongs to; the backend filters these out of the league list
+SYSTEM_LEAGUES = [(314, 'Overall'), (276, 'Gameweek 1'), (249, 'Second Chance'), (1, 'Arsenal')]
+
+def fixture_path(directory, path, page=1):
+    """File a recorded payload for an FPL API path is kept in, e.g. entry/1/event/5/picks.json"""
+    name = path.strip('/') + (f".page{page}" if page > 1 else '') + '.json'
+    return os.path.join(directory, *name.split('/'))
+
+class FPLFixtures:
+    """
+    Payloads the simulator serves: recorded responses from a fixture
+    directory (see fixture_path and record_fixtures) where present, else a
+    seeded synthetic game of `managers` entries spread over `leagues`
+    classic leagues of `league_size` members.
+    """
+
+    def __init__(self, directory=None, managers=2000, leagues=200, league_size=120, gameweek=10, seed=0):
+        self.directory = directory
+        self.gameweek = gameweek
+        self.seed = seed
+        rng = random.Random(seed)
+        self.elements = self._elements(rng)
+        self.entry_ids = list(range(1, managers + 1))
+        self.entries = {
+            entry_id: {'first': rng.choice(FIRST_NAMES), 'last': f"{rng.choice(LAST_NAMES)}{entry_id}", 'squad': f"{rng.choice(SQUAD_WORDS)} {rng.choice(SQUAD_SUFFIXES)} {entry_id}"}
+            for entry_id in self.entry_ids
+        }
+        self.league_members = {}
+        self.entry_leagues = {entry_id: [] for entry_id in self.entry_ids}
+        for league_id in range(1000, 1000 + leagues):
+            members = rng.sample(self.entry_ids, min(league_size, managers))
+            self.league_members[league_id] = members
+            for entry_id in members:
+                self.entry_leagues[entry_id].append(league_id)
+        if directory:
+            recorded = os.path.join(directory, 'entry')
+            ids = [int(name[:-5]) for name in os.listdir(recorded) if name.endswith('.json') and name[:-5].isdigit()] if os.path.isdir(recorded) else []
+            if ids:
+                self.entry_ids = sorted(ids)
+
+    def payload(self, path, page=1):
+        """Decoded payload for an API path, or None when there is nothing to serve"""
+        if self.directory:
+            recorded = fixture_path(self.directory, path, page)
+            if os.path.exists(recorded):
+                with open(recorded, 'rb') as handle:
+                    return decode_json(handle.read())
+        parts = path.strip('/').split('/')
+        try:
+            if parts == ['bootstrap-static']:
+                return self.bootstrap_static()
+            if parts[0] == 'entry' and len(parts) == 2:
+                return self.entry(int(parts[1]))
+            if parts[0] == 'entry' and parts[2:3] == ['transfers']:
+                return self.transfers(int(parts[1]))
+            if parts[0] == 'entry' and parts[2:3] == ['event'] and parts[4:] == ['picks']:
+                return self.picks(int(parts[1]), int(parts[3]))
+            if parts[0] == 'leagues-classic' and parts[2:] == ['standings']:
+                return self.standings(int(parts[1]), page)
+        except (IndexError, ValueError):
+            return None
+        return None
+
+    def manager(self, entry_id) -> Optional[Dict]:
+        """Manager and squad name of an entry, for search indexing and request parameters"""
+        entry = self.payload(f"entry/{entry_id}/")
+        if entry is None:
+            return None
+        return {
+            'id': entry_id,
+            'manager_name': f"{entry.get('player_first_name', '')} {entry.get('player_last_name', '')}".strip(),
+            'squad_name': entry.get('name', '')
+        }
+
+    @staticmethod
+    def _elements(rng):
+        elements = []
+        for element_id in range(1, 601):
+            elements.append({
+                'id': element_id,
+                'web_name': f"Player{element_id}",
+                'element_type': 1 + element_id % 4,
+                'team': 1 + element_id % 20,
+                'event_points': rng.randint(0, 15),
+                'selected_by_percent': f"{rng.uniform(0, 60):.1f}",
+                'form': f"{rng.uniform(0, 10):.1f}",
+                'ict_index': f"{rng.uniform(0, 150):.1f}",
+                'now_cost': rng.randint(40, 140)
+            })
+        return elements
+
+    def bootstrap_static(self):
+        return {
+            'events': [
+                {'id': event, 'name': f"Gameweek {event}", 'is_current': event == self.gameweek,
+                 'is_previous': event == self.gameweek - 1, 'is_next': event == self.gameweek + 1,
+                 'finished': event < self.gameweek, 'data_checked': event < self.gameweek}
+                for event in range(1, 39)
+            ],
+            'teams': [{'id': team, 'name': f"Team {team}", 'short_name': f"T{team:02d}"} for team in range(1, 21)],
+            'elements': self.elements
+        }
+
+    def entry(self, entry_id):
+        manager = self.entries.get(entry_id)
+        if manager is None:
+            return None
+        leagues = [{'id': league_id, 'name': name, 'entry_rank': 1} for league_id, name in SYSTEM_LEAGUES]
+        leagues += [{'id': league_id, 'name': f"Mini League {league_id}", 'entry_rank': 1} for league_id in self.entry_leagues[entry_id]]
+        return {
+            'id': entry_id,
+            'name': manager['squad'],
+            'player_first_name': manager['first'],
+            'player_last_name': manager['last'],
+            'current_event': self.gameweek,
+            'leagues': {'classic': leagues, 'h2h': []}
+        }
+
+    def picks(self, entry_id, gameweek):
+        if entry_id not in self.entries:
+            return None
+        rng = random.Random(f"{self.seed}:picks:{entry_id}:{gameweek}")
+        elements = rng.sample(range(1, len(self.elements) + 1), 15)
+        captain, vice_captain = rng.sample(range(11), 2)
+        return {
+            'active_chip': rng.choice([None] * 12 + ['bboost', 'triplecaptain', 'freehit', 'wildcard']),
+            'automatic_subs': [],
+            'entry_history': {'event': gameweek, 'points': rng.randint(20, 110)},
+            'picks': [
+                {'element': element, 'position': position + 1, 'multiplier': (2 if position == captain else 1) if position < 11 else 0,
+                 'is_captain': position == captain, 'is_vice_captain': position == vice_captain}
+                for position, element in enumerate(elements)
+            ]
+        }
+
+    def transfers(self, entry_id):
+        if entry_id not in self.entries:
+            return None
+        rng = random.Random(f"{self.seed}:transfers:{entry_id}")
+        return [
+            {'entry': entry_id, 'event': rng.randint(2, self.gameweek), 'element_in': rng.randint(1, len(self.elements)),
+             'element_in_cost': rng.randint(40, 140), 'element_out': rng.randint(1, len(self.elements)), 'element_out_cost': rng.randint(40, 140)}
+            for _ in range(rng.randint(0, 2 * self.gameweek))
+        ]
+
+    def standings(self, league_id, page=1):
+        members = self.league_members.get(league_id)
+        if members is None:
+            return None
+        rng = random.Random(f"{self.seed}:standings:{league_id}")
+        totals = [(rng.randint(200, 900), rng.randint(10, 110), entry_id) for entry_id in members]
+        totals.sort(key=lambda row: -row[0])
+        start = (page - 1) * STANDINGS_PAGE_SIZE
+        results = [
+            {'id': index, 'entry': entry_id, 'entry_name': self.entries[entry_id]['squad'],
+             'player_name': f"{self.entries[entry_id]['first']} {self.entries[entry_id]['last']}",
+             'rank': index + 1, 'last_rank': max(1, index + 1 + rng.randint(-3, 3)), 'rank_sort': index + 1,
+             'total': total, 'event_total': event_total}
+            for index, (total, event_total, entry_id) in enumerate(totals[start:start + STANDINGS_PAGE_SIZE], start)
+        ]
+        return {
+            'league': {'id': league_id, 'name': f"Mini League {league_id}"},
+            'last_updated_data': f"gw{self.gameweek}",
+            'standings': {'has_next': start + STANDINGS_PAGE_SIZE < len(totals), 'page': page, 'results': results}
+        }
+
+class FPLSimulator:
+    """
+    aiohttp stand-in for the FPL API routes the backend calls (bootstrap-static,
+    entry, picks, transfers, classic league standings) with injected latency,
+    jitter and error rate. Counts requests per route so a benchmark can
+    attribute upstream calls to the endpoint that made them.
+    """
+
+    def __init__(self, fixtures: FPLFixtures, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=0):
+        self.fixtures = fixtures
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.url = None
+        self.stats: Dict[str, Dict[str, int]] = {}
+        # Encoded payloads and ETags, so the simulator isn't what's being measured
+        self._encoded = {}
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/bootstrap-static/', self._handle('bootstrap-static'))
+        app.router.add_get('/entry/{entry_id}/', self._handle('entry'))
+        app.router.add_get('/entry/{entry_id}/transfers/', self._handle('transfers'))
+        app.router.add_get('/entry/{entry_id}/event/{event}/picks/', self._handle('picks'))
+        app.router.add_get('/leagues-classic/{league_id}/standings/', self._handle('standings'))
+        return app
+
+    def _handle(self, route):
+        async def handler(request):
+            stats = self.stats.setdefault(route, {'requests': 0, 'errors': 0, 'not_modified': 0})
+            stats['requests'] += 1
+            await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+            if self.error_rate and self.rng.random() < self.error_rate:
+                stats['errors'] += 1
+                return web.Response(status=503, text="The game is being updated.")
+
+            page = int(request.query.get('page_standings', 1))
+            key = (request.path, page)
+            encoded = self._encoded.get(key)
+            if encoded is None:
+                payload = self.fixtures.payload(request.path, page)
+                if payload is None:
+                    return web.json_response({'detail': 'Not found.'}, status=404)
+                body = encode_json(payload)
+                encoded = self._encoded[key] = (body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+            body, etag = encoded
+            if request.headers.get('If-None-Match') == etag:
+                stats['not_modified'] += 1
+                return web.Response(status=304, headers={'ETag': etag})
+            return web.Response(body=body, content_type='application/json', headers={'ETag': etag})
+        return handler
+
+    def request_counts(self) -> Dict[str, int]:
+        return {route: stats['requests'] for route, stats in self.stats.items()}
+
+    def start_in_thread(self, host='127.0.0.1', port=0) -> str:
+        """Serve from a daemon thread with its own event loop; returns the base URL"""
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        ready = threading.Event()
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            runner = web.AppRunner(self.app(), access_log=None)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.SockSite(runner, sock).start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        self.url = f"http://{host}:{sock.getsockname()[1]}"
+        return self.url
+
+async def record_fixtures(directory, entry_ids: List[int], max_pages=5, base_url=DEFAULT_FPL_API_BASE_URL) -> int:
+    """
+    Save the live FPL API responses the backend needs for these entries
+    (bootstrap-static, entry, current picks, transfers and their classic
+    league standings) under directory, for FPLFixtures to replay.
+    Returns the number of payloads written.
+    """
+    session = await fpl_http_client.get_session()
+    written = 0
+
+    async def save(path, page=1):
+        nonlocal written
+        url = f"{base_url.rstrip('/')}/{path}" + (f"?page_standings={page}" if page > 1 else '')
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.warning(f"Not recording {url}: status {response.status}")
+                return None
+            payload = await response.json()
+        target = fixture_path(directory, path, page)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as handle:
+            handle.write(encode_json(payload))
+        written += 1
+        return payload
+
+    bootstrap = await save('bootstrap-static/')
+    gameweek = next((event['id'] for event in (bootstrap or {}).get('events', []) if event.get('is_current')), None)
+    leagues = set()
+    for entry_id in entry_ids:
+        entry = await save(f"entry/{entry_id}/")
+        if entry is None:
+            continue
+        await save(f"entry/{entry_id}/transfers/")
+        if gameweek:
+            await save(f"entry/{entry_id}/event/{gameweek}/picks/")
+        leagues.update(league['id'] for league in entry.get('leagues', {}).get('classic', []) if league.get('league_type') != 's')
+    for league_id in sorted(leagues):
+        for page in range(1, max_pages + 1):
+            standings = await save(f"leagues-classic/{league_id}/standings/", page)
+            if not standings or not standings.get('standings', {}).get('has_next'):
+                break
+            # Stay well under the FPL API's rate limits
+            await asyncio.sleep(0.2)
+    logger.info(f"Recorded {written} FPL API payloads for {len(entry_ids)} entries into {directory}")
+    return written
+
+FIRST_NAMES = ['John', 'James', 'Mohamed', 'Maria', 'Mark', 'Sam', 'Sarah', 'Alex', 'Kevin', 'Luke', 'Paul', 'Tom']
+LAST_NAMES = ['Smith', 'Jones', 'Brown', 'Taylor', 'Wilson', 'Khan', 'Lewis', 'Walker', 'Green', 'King']
+SQUAD_WORDS = ['Haaland', 'Salah', 'Saka', 'Palmer', 'Dynamo', 'Real', 'Inter', 'Sporting', 'Athletic', 'Lokomotiv']
+SQUAD_SUFFIXES = ['FC', 'United', 'Rovers', 'Wanderers', 'XI', 'Athletic']
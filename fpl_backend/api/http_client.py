@@ -0,0 +1,182 @@
+# api/http_client.py
+import asyncio
+import logging
+import threading
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FPL_API_BASE_URL = 'https://fantasy.premierleague.com/api'
+
+def fpl_api_url(path):
+    """Absolute URL of an FPL API path such as 'entry/1/', under FPL_API_BASE_URL"""
+    return f"{getattr(settings, 'FPL_API_BASE_URL', DEFAULT_FPL_API_BASE_URL).rstrip('/')}/{path}"
+
+DEFAULT_HTTP_CLIENT_CONFIG = {
+    'limit': 100,                # Total connections in the pool
+    'limit_per_host': 30,        # Connections per upstream host
+    'ttl_dns_cache': 300,        # Seconds to cache DNS lookups
+    'keepalive_timeout': 30,     # Seconds an idle connection is kept open
+    'total_timeout': 15,         # Seconds for a whole request
+    'connect_timeout': 5,        # Seconds to establish a connection
+}
+
+class FPLHttpClient:
+    """
+    Pooled aiohttp sessions shared by every call to one upstream: one per
+    event loop, since a session can only be used on the loop it was created
+    on. Under ASGI that is a single process-wide session; under
+    WSGI/runserver each thread's async_to_sync loop gets its own.
+    Each upstream (FPL API, Typesense) has its own instance, so their
+    pools and metrics stay separate.
+    """
+
+    def __init__(self, settings_name='FPL_HTTP_CLIENT', metrics_prefix='fpl_http', name='FPL'):
+        self.config = {**DEFAULT_HTTP_CLIENT_CONFIG, **getattr(settings, settings_name, {})}
+        self.metrics_prefix = metrics_prefix
+        self.name = name
+        # loop -> (session, task closing it when the loop shuts down)
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self.stats = {
+            'sessions_created': 0,
+            'requests_total': 0,
+            'requests_failed': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+        }
+
+    def _build_trace_config(self):
+        """Count requests and connection reuse for the metrics endpoint"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.stats['requests_total'] += 1
+
+        async def on_request_exception(session, ctx, params):
+            self.stats['requests_failed'] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats['connections_created'] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats['connections_reused'] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.config['limit'],
+            limit_per_host=self.config['limit_per_host'],
+            ttl_dns_cache=self.config['ttl_dns_cache'],
+            use_dns_cache=True,
+            keepalive_timeout=self.config['keepalive_timeout'],
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=self.config['total_timeout'],
+            connect=self.config['connect_timeout'],
+        )
+        self.stats['sessions_created'] += 1
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[self._build_trace_config()],
+        )
+
+    async def startup(self):
+        """Create the shared session (called on ASGI lifespan startup)"""
+        await self.get_session()
+        logger.info(f"{self.name} HTTP client started (pool limit {self.config['limit']}, per host {self.config['limit_per_host']})")
+
+    async def get_session(self):
+        """
+        Return the running loop's session, creating it lazily. Sessions are
+        never shared between loops, so concurrent requests on per-thread
+        loops (WSGI/runserver) don't close or reuse each other's session.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._sessions.get(loop)
+        if entry is not None and not entry[0].closed:
+            return entry[0]
+
+        # Nothing is awaited between the check and the insert, so one loop never builds two sessions
+        session = self._create_session()
+        closer = loop.create_task(self._close_with_loop(loop, session))
+        with self._sessions_lock:
+            self._sessions[loop] = (session, closer)
+            self._prune_closed_loops()
+        return session
+
+    def _prune_closed_loops(self):
+        """Drop sessions of loops that were closed without cancelling their tasks (caller holds the lock)"""
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            session, _ = self._sessions.pop(loop)
+            if not session.closed:
+                logger.warning(f"Event loop ended without closing its {self.name} HTTP session, dropping it")
+                session.detach()
+
+    async def _close_with_loop(self, loop, session):
+        """
+        Close the session when its loop shuts down. asyncio.run() (and so
+        asgiref's per-request loops under WSGI/runserver) cancels leftover
+        tasks before closing the loop, which lets this close it there.
+        """
+        try:
+            await asyncio.Future()
+        except asyncio.CancelledError:
+            await session.close()
+            raise
+        finally:
+            with self._sessions_lock:
+                if self._sessions.get(loop, (None,))[0] is session:
+                    del self._sessions[loop]
+
+    async def close(self):
+        """Close the running loop's session (called on ASGI lifespan shutdown)"""
+        loop = asyncio.get_running_loop()
+        with self._sessions_lock:
+            session, closer = self._sessions.pop(loop, (None, None))
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info(f"{self.name} HTTP client closed")
+        if closer is not None:
+            closer.cancel()
+
+    def get_metrics(self):
+        """Snapshot of pool occupancy and request counters"""
+        metrics = {
+            **self.stats,
+            'pool_limit': self.config['limit'],
+            'pool_limit_per_host': self.config['limit_per_host'],
+            'pool_in_use': 0,
+            'pool_idle': 0,
+        }
+        with self._sessions_lock:
+            sessions = [session for session, _ in self._sessions.values() if not session.closed]
+        metrics['sessions_open'] = len(sessions)
+        for session in sessions:
+            connector = session.connector
+            metrics['pool_in_use'] += len(getattr(connector, '_acquired', ()))
+            metrics['pool_idle'] += sum(len(conns) for conns in getattr(connector, '_conns', {}).values())
+        return metrics
+
+    def render_prometheus_metrics(self):
+        """Render get_metrics() in the Prometheus text exposition format"""
+        metrics = self.get_metrics()
+        lines = []
+        for name in ('sessions_created', 'requests_total', 'requests_failed', 'connections_created', 'connections_reused'):
+            lines.append(f"# TYPE {self.metrics_prefix}_{name} counter")
+            lines.append(f"{self.metrics_prefix}_{name} {metrics[name]}")
+        for name in ('sessions_open', 'pool_limit', 'pool_limit_per_host', 'pool_in_use', 'pool_idle'):
+            lines.append(f"# TYPE {self.metrics_prefix}_{name} gauge")
+            lines.append(f"{self.metrics_prefix}_{name} {metrics[name]}")
+        return "\n".join(lines) + "\n"
+
+# Global instances
+fpl_http_client = FPLHttpClient()
+typesense_http_client = FPLHttpClient('TYPESENSE_HTTP_CLIENT', 'typesense_http', 'Typesense')
@@ -0,0 +1,188 @@
+# api/league_news.py
+import asyncio
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .news_generator import NewsGenerator
+from .news_templates import TEMPLATES_DIGEST
+from .services import get_current_event, get_team_data, get_player_leagues, create_league_standings_tasks, get_player_transfers, get_player_captain_chips
+from .squad import build_squad
+
+logger = logging.getLogger(__name__)
+
+def deterministic_news() -> bool:
+    return getattr(settings, 'FPL_NEWS_DETERMINISTIC', True)
+
+def article_seed(league_id, player_id, gameweek):
+    """Template seed for one article, or None for random variants"""
+    if not deterministic_news():
+        return None
+    return f"{league_id}:{player_id}:{gameweek}"
+
+def news_etag(context, standings_results):
+    """
+    Strong ETag for a manager's league news, computed from its inputs:
+    the manager's id, picks, transfers, chips and display names, each league's
+    standings digest (or fetch error) and the template set. Only meaningful
+    in deterministic mode, where the same inputs render the same articles.
+    """
+    player_context = context['player_context']
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([
+        TEMPLATES_DIGEST,
+        context['player_id'],
+        context['gameweek'],
+        player_context['team_name'],
+        player_context['manager_name'],
+        player_context['active_chip'],
+        player_context['team_data'],
+        context['transfers_data'],
+        context['chips_data'],
+        list(context['leagues'].values())
+    ], sort_keys=True, cls=DjangoJSONEncoder).encode())
+    for league_id, league_snapshot, error in standings_results:
+        h.update(f"|{league_id}:{error or league_snapshot.digest}".encode())
+    return f'"{h.hexdigest()}"'
+
+# 'window' = leaders plus the rows around the manager, 'full' = every row, 'none' = no table
+STANDINGS_MODES = ('window', 'full', 'none')
+
+def standings_payload(league_snapshot, player_id, standings_mode='window'):
+    """The standings embedded in an article for the requested mode"""
+    standings = league_snapshot.standings
+    if standings_mode == 'full':
+        return standings.to_payload()
+    if standings_mode == 'none':
+        return {'standings': {'results': [], 'total_entries': len(standings), 'window': True}}
+    config = getattr(settings, 'FPL_NEWS_STANDINGS_WINDOW', {})
+    return standings.to_window_payload(int(player_id), config.get('TOP', 10), config.get('RADIUS', 5))
+
+def project_article(article, fields=None):
+    """Keep only the requested article fields"""
+    if not fields:
+        return article
+    return {field: article[field] for field in fields if field in article}
+
+def build_league_article(news_generator, league, player_context, gameweek, league_snapshot, player_id, transfers_data, chips_data, standings_mode='window', fields=None):
+    """Render one league's article from its shared LeagueSnapshot"""
+    article = news_generator.generate_article(
+        league,
+        player_context,
+        {'gameweek': gameweek},
+        standings_payload(league_snapshot, player_id, standings_mode),
+        int(player_id),
+        transfers_data,
+        chips_data,
+        rankings=league_snapshot.rankings,
+        league_insights=league_snapshot.league_insights,
+        seed=article_seed(league.get('id'), player_id, gameweek)
+    )
+    if standings_mode == 'none':
+        article.pop('league_standings', None)
+        article.pop('all_position_changes', None)
+    return project_article(article, fields)
+
+async def prepare_league_news(player_id, team_name, manager_name):
+    """
+    Shared setup for the league news views and the precompute worker.
+    Returns (error, context) where error is (status, message) or None;
+    standings tasks in the context are already running so callers can
+    consume them in order or as they complete.
+    """
+    # Leagues and the current gameweek are independent, fetch them together
+    leagues, current_event = await asyncio.gather(
+        get_player_leagues(player_id),
+        get_current_event()
+    )
+    if not leagues:
+        return (404, 'No leagues found.'), None
+
+    if not current_event:
+        return (500, 'Could not fetch current event.'), None
+
+    gameweek = current_event['id']
+
+    # Fan out standings for every league alongside the player's own data,
+    # which is the same for every league and so is fetched exactly once
+    standings_tasks = create_league_standings_tasks([league['id'] for league in leagues], gameweek)
+    try:
+        team_response, transfers_data = await asyncio.gather(
+            get_team_data(player_id, gameweek),
+            get_player_transfers(player_id, gameweek)
+        )
+    except BaseException:
+        cancel_tasks(standings_tasks)
+        raise
+
+    if not team_response:
+        cancel_tasks(standings_tasks)
+        return (404, 'Team data not found.'), None
+
+    # Captain and chips come from the same picks payload as the squad
+    squad = build_squad(team_response['team_data'], team_response.get('active_chip'))
+    return None, {
+        'player_id': str(player_id),
+        'leagues': {league['id']: league for league in leagues},
+        'gameweek': gameweek,
+        'standings_tasks': standings_tasks,
+        'transfers_data': transfers_data,
+        'chips_data': get_player_captain_chips(squad),
+        'player_context': {
+            'team_name': team_name,
+            'manager_name': manager_name,
+            'team_data': team_response['team_data'],
+            'active_chip': team_response.get('active_chip'),
+            'squad': squad
+        }
+    }
+
+async def collect_league_news(player_id, team_name, manager_name, skip_render=None, standings_mode='window', fields=None):
+    """
+    Generate every league article for a manager, with standings embedded
+    per standings_mode and articles projected to `fields` if given.
+    Returns (error, result) with result = {'gameweek', 'etag', 'articles',
+    'league_errors'}; etag is None outside deterministic mode. If
+    skip_render(etag) is true (the client already has this version) the
+    articles aren't rendered and result['articles'] is None.
+    """
+    error, context = await prepare_league_news(player_id, team_name, manager_name)
+    if error:
+        return error, None
+
+    standings_results = await asyncio.gather(*context['standings_tasks'])
+
+    etag = news_etag(context, standings_results) if deterministic_news() else None
+    if etag and skip_render and skip_render(etag):
+        return None, {'gameweek': context['gameweek'], 'etag': etag, 'articles': None, 'league_errors': None}
+
+    # Generate articles for each league, marking leagues that failed
+    news_generator = NewsGenerator()
+    articles = []
+    league_errors = []
+
+    for league_id, league_snapshot, league_error_code in standings_results:
+        league = context['leagues'][league_id]
+        if league_error_code:
+            league_errors.append(league_error(league, league_id, league_error_code))
+            continue
+        articles.append(build_league_article(
+            news_generator, league, context['player_context'], context['gameweek'],
+            league_snapshot, player_id, context['transfers_data'], context['chips_data'],
+            standings_mode, fields
+        ))
+
+    return None, {'gameweek': context['gameweek'], 'etag': etag, 'articles': articles, 'league_errors': league_errors}
+
+def cancel_tasks(tasks):
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+
+def league_error(league, league_id, error):
+    return {
+        'league_id': league_id,
+        'league_name': league.get('name', 'Unknown League'),
+        'error': error
+    }
@@ -0,0 +1,78 @@
+# api/league_ranking.py
+import numpy as np
+from typing import Dict, List, Optional
+
+class LeagueRankings:
+    """
+    Current rank, pre-gameweek rank and movement for every entry in a
+    league, computed in one vectorised pass over the standings.
+    Current rank is the entry's place in the standings list; previous rank
+    is where it would sit on (total - event_total), ties keeping list order.
+    """
+
+    def __init__(self, results: List[Dict]):
+        self._rank(
+            np.array([entry['entry'] for entry in results], dtype=np.int64),
+            np.array([entry.get('total', 0) or 0 for entry in results], dtype=np.int64),
+            np.array([entry.get('event_total', 0) or 0 for entry in results], dtype=np.int64)
+        )
+
+    @classmethod
+    def from_arrays(cls, entries, totals, event_totals) -> 'LeagueRankings':
+        """Build rankings straight from standings columns, skipping the row dicts"""
+        rankings = cls.__new__(cls)
+        rankings._rank(
+            np.asarray(entries, dtype=np.int64),
+            np.asarray(totals, dtype=np.int64),
+            np.asarray(event_totals, dtype=np.int64)
+        )
+        return rankings
+
+    def _rank(self, entries, totals, event_totals):
+        self.entries = entries
+        self.totals = totals
+        self.event_totals = event_totals
+        self.current_rank = np.arange(1, len(entries) + 1, dtype=np.int64)
+
+        previous_totals = self.totals - self.event_totals
+        # Stable sort on the negated totals = descending order with ties in list order
+        order = np.argsort(-previous_totals, kind='stable')
+        self.previous_rank = np.empty(len(entries), dtype=np.int64)
+        self.previous_rank[order] = self.current_rank
+
+        # Positive = moved up, negative = moved down
+        self.movement = self.previous_rank - self.current_rank
+
+        # First occurrence wins, matching a linear scan of the standings
+        self._index = {}
+        for i, entry_id in enumerate(self.entries.tolist()):
+            self._index.setdefault(entry_id, i)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def nbytes(self) -> int:
+        """Approximate memory held, counting ~100 bytes per index entry"""
+        arrays = (self.entries, self.totals, self.event_totals, self.current_rank, self.previous_rank, self.movement)
+        return sum(a.nbytes for a in arrays) + 100 * len(self._index)
+
+    def position(self, entry_id) -> Optional[int]:
+        i = self._index.get(entry_id)
+        return None if i is None else int(self.current_rank[i])
+
+    def movement_for(self, entry_id) -> int:
+        i = self._index.get(entry_id)
+        return 0 if i is None else int(self.movement[i])
+
+    def total_for(self, entry_id) -> int:
+        i = self._index.get(entry_id)
+        return 0 if i is None else int(self.totals[i])
+
+    def all_movements(self) -> Dict[int, int]:
+        return dict(zip(self.entries.tolist(), self.movement.tolist()))
+
+def compute_league_rankings(league_standings) -> Optional[LeagueRankings]:
+    """Build rankings from a leagues-classic standings payload"""
+    if not league_standings or not league_standings.get('standings'):
+        return None
+    return LeagueRankings(league_standings['standings']['results'])
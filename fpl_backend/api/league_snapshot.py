@@ -0,0 +1,121 @@
+# api/league_snapshot.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from django.conf import settings
+from .news_generator import describe_top_performers
+from .standings import CompactStandings
+
+logger = logging.getLogger(__name__)
+
+TOP_PERFORMERS = 5
+
+class LeagueSnapshot:
+    """
+    Everything about a league's gameweek that doesn't depend on the reader:
+    the full standings, rank movements and top-performer insights.
+    Built once and shared by every member's article.
+    """
+
+    def __init__(self, league_id, gameweek, standings: CompactStandings):
+        self.league_id = league_id
+        self.gameweek = gameweek
+        self.last_updated = standings.last_updated_data
+        self.standings = standings
+        self.rankings = standings.rankings()
+        self.league_insights = describe_top_performers(standings.top_by_event_total(TOP_PERFORMERS))
+        self.nbytes = standings.nbytes() + self.rankings.nbytes()
+        # Identifies the exact standings the league's articles are rendered from
+        self.digest = standings.digest()
+
+    @property
+    def key(self):
+        return (self.league_id, self.gameweek, self.last_updated)
+
+class LeagueSnapshotCache:
+    """
+    LRU cache of league snapshots keyed by (league_id, gameweek, last_updated).
+    A snapshot is served without any upstream call for TTL seconds; after
+    that the caller rechecks page 1 and, if the standings' last-updated stamp
+    hasn't moved, keeps the snapshot via touch(). Least recently used
+    snapshots are evicted once their total size passes the memory budget.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'FPL_LEAGUE_SNAPSHOT_CACHE', {})
+        self.ttl = config.get('TTL', 120)
+        self.memory_budget = config.get('MEMORY_BUDGET_MB', 64) * 1024 * 1024
+        self._entries = OrderedDict()
+        # (league_id, gameweek) -> (key of the newest snapshot, checked_at)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0}
+
+    def get_fresh(self, league_id, gameweek) -> Optional[LeagueSnapshot]:
+        """The newest snapshot if it was checked against upstream within the TTL"""
+        with self._lock:
+            latest = self._latest.get((league_id, gameweek))
+            if latest is None or latest[1] + self.ttl < time.monotonic():
+                self.stats['misses'] += 1
+                return None
+            snapshot = self._entries.get(latest[0])
+            if snapshot is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(latest[0])
+            self.stats['hits'] += 1
+            return snapshot
+
+    def touch(self, league_id, gameweek, last_updated) -> Optional[LeagueSnapshot]:
+        """Reuse the snapshot for an unchanged last-updated stamp and restart its TTL"""
+        key = (league_id, gameweek, last_updated)
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is None:
+                return None
+            self._entries.move_to_end(key)
+            self._latest[(league_id, gameweek)] = (key, time.monotonic())
+            self.stats['revalidated'] += 1
+            return snapshot
+
+    def put(self, snapshot: LeagueSnapshot):
+        with self._lock:
+            # A newer stamp for the same league/gameweek supersedes the old snapshot
+            previous = self._latest.get((snapshot.league_id, snapshot.gameweek))
+            if previous is not None:
+                self._drop(previous[0])
+            self._drop(snapshot.key)
+            self._entries[snapshot.key] = snapshot
+            self.nbytes += snapshot.nbytes
+            self._latest[(snapshot.league_id, snapshot.gameweek)] = (snapshot.key, time.monotonic())
+
+            # Always keep the snapshot just added, even if it alone exceeds the budget
+            while self.nbytes > self.memory_budget and len(self._entries) > 1:
+                key, _ = next(iter(self._entries.items()))
+                self._drop(key)
+                self.stats['evictions'] += 1
+
+    def _drop(self, key):
+        snapshot = self._entries.pop(key, None)
+        if snapshot is None:
+            return
+        self.nbytes -= snapshot.nbytes
+        latest = self._latest.get(key[:2])
+        if latest is not None and latest[0] == key:
+            del self._latest[key[:2]]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self.nbytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'snapshots': len(self._entries), 'bytes': self.nbytes, 'budget_bytes': self.memory_budget}
+
+# Global instance
+league_snapshot_cache = LeagueSnapshotCache()
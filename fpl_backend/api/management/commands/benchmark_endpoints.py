@@ -0,0 +1,227 @@
+# api/management/commands/benchmark_endpoints.py
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from api import urls, views
+from api.article_store import ArticleStore
+from api.autocomplete import autocomplete_index
+from api.bet_history import InMemoryRedis, RedisBetHistoryStore
+from api.bootstrap_cache import bootstrap_cache
+from api.fpl_simulator import FPLFixtures, FPLSimulator, record_fixtures
+from api.http_client import fpl_http_client
+from api.league_snapshot import league_snapshot_cache
+from api.ml_models import bet_generator
+from api.squad import squad_cache
+from api.typesense_local import LocalCollection, LocalTypesenseClient
+from api.typesense_service import player_id_cache, typesense_service
+
+class Command(BaseCommand):
+    help = (
+        "Drive every api/urls.py route concurrently against a local FPL API simulator "
+        "(recorded or synthetic payloads, injected latency/jitter/errors) and report "
+        "p50/p95/p99 latency and upstream calls per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--latency-ms', type=float, default=40, help="Simulated FPL API latency")
+        parser.add_argument('--jitter-ms', type=float, default=20, help="Extra uniform random latency, 0 to this")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of FPL API calls answered 503")
+        parser.add_argument('--search-latency-ms', type=float, default=5, help="Simulated Typesense latency")
+        parser.add_argument('--fixtures', help="Directory of recorded FPL API payloads (synthetic data where missing)")
+        parser.add_argument('--managers', type=int, default=2000)
+        parser.add_argument('--leagues', type=int, default=200)
+        parser.add_argument('--league-size', type=int, default=120)
+        parser.add_argument('--endpoints', help="Comma separated route names to run (default: all)")
+        parser.add_argument('--cold', action='store_true', help="Clear in-process caches before each endpoint")
+        parser.add_argument('--serve', type=int, metavar='PORT', help="Only run the simulator on PORT (set FPL_API_BASE_URL to it)")
+        parser.add_argument('--record', type=int, nargs='+', metavar='ENTRY_ID', help="Record live FPL API payloads for these entries into --fixtures and exit")
+
+    def handle(self, *args, **options):
+        if options['record']:
+            if not options['fixtures']:
+                raise CommandError("--record needs --fixtures DIR to write to")
+            written = asyncio.run(self._record(options['fixtures'], options['record']))
+            self.stdout.write(f"Recorded {written} payloads into {options['fixtures']}")
+            return
+
+        fixtures = FPLFixtures(options['fixtures'], options['managers'], options['leagues'], options['league_size'])
+        simulator = FPLSimulator(fixtures, options['latency_ms'], options['jitter_ms'], options['error_rate'])
+        if options['serve']:
+            url = simulator.start_in_thread(port=options['serve'])
+            self.stdout.write(f"FPL API simulator on {url} ({len(fixtures.entry_ids)} entries), Ctrl-C to stop")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return
+
+        if options['verbosity'] < 2:
+            # Per-request view logging would dominate both the output and the timings
+            logging.disable(logging.CRITICAL)
+        settings.FPL_API_BASE_URL = simulator.start_in_thread()
+        setup_test_environment()
+        search_client = self._use_local_backends(fixtures, options['search_latency_ms'])
+
+        scenarios = self._scenarios(fixtures)
+        selected = set(options['endpoints'].split(',')) if options['endpoints'] else None
+        unknown = (selected or set()) - {pattern.name for pattern in urls.urlpatterns}
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        patterns = [pattern for pattern in urls.urlpatterns if selected is None or pattern.name in selected]
+        self.stdout.write(
+            f"{options['requests']} requests per endpoint, concurrency {options['concurrency']}, FPL API "
+            f"{options['latency_ms']:.0f}ms +0-{options['jitter_ms']:.0f}ms, {options['error_rate']:.0%} errors, "
+            f"{len(fixtures.entry_ids)} entries{', cold caches' if options['cold'] else ''}"
+        )
+        self.stdout.write(f"{'endpoint':<32}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'fpl/req':>9}{'search/req':>11}  fpl calls")
+        asyncio.run(self._run(patterns, scenarios, simulator, search_client, options))
+
+    async def _record(self, directory, entry_ids):
+        try:
+            return await record_fixtures(directory, entry_ids)
+        finally:
+            await fpl_http_client.close()
+
+    @staticmethod
+    def _use_local_backends(fixtures, search_latency_ms):
+        """In-process search, bet history and article store, so only the FPL API is simulated over HTTP"""
+        search_client = LocalTypesenseClient(latency_ms=search_latency_ms)
+        collection = LocalCollection(typesense_service.collection_schema())
+        for entry_id in fixtures.entry_ids:
+            manager = fixtures.manager(entry_id)
+            if manager is not None:
+                collection.upsert({**manager, 'id': str(entry_id)})
+        search_client.collections[collection.schema['name']] = collection
+        typesense_service.async_client = search_client
+        bet_generator.history_store = RedisBetHistoryStore(InMemoryRedis())
+        views.article_store = ArticleStore(os.path.join(tempfile.mkdtemp(), 'league_news.sqlite3'))
+        return search_client
+
+    @staticmethod
+    def _scenarios(fixtures):
+        """Route name -> function building (method, params or JSON body) for the nth request"""
+        managers = [fixtures.manager(entry_id) for entry_id in fixtures.entry_ids]
+        managers = [manager for manager in managers if manager]
+        rng = random.Random(0)
+
+        def manager():
+            return rng.choice(managers)
+
+        def player(extra=None):
+            return lambda: ('GET', {'playerId': manager()['id'], **(extra or {})})
+
+        def luck():
+            return 'GET', {'playerId': manager()['id'], 'luckLevel': rng.randint(-2, 2)}
+
+        def search():
+            chosen = manager()
+            return 'GET', {'playerName': chosen['manager_name'], 'teamName': chosen['squad_name']}
+
+        def named_player():
+            chosen = manager()
+            return 'GET', {'playerId': chosen['id'], 'teamName': chosen['squad_name'], 'managerName': chosen['manager_name']}
+
+        def bet():
+            luck_level = rng.randint(-2, 2)
+            return 'POST', {
+                'playerId': manager()['id'], 'legs': [{'type': 'goal_scorer', 'odds': 2.0}],
+                'totalOdds': 2.0, 'total_odds': 2.0, 'totalStake': 5, 'total_stake': 5, 'luckLevel': luck_level, 'luck_level': luck_level
+            }
+
+        return {
+            'get_player_id': search,
+            'async_get_team_data': player(),
+            'generate_bet_suggestions': luck,
+            'adjust_odds': luck,
+            'generate_bet_suggestions_batch': lambda: ('POST', {'requests': [{'playerId': manager()['id'], 'luckLevel': rng.randint(-2, 2)} for _ in range(20)]}),
+            'place_bet': bet,
+            'debug_user_history': player(),
+            'user_history': player(),
+            'debug_ml_calculations': player({'luckLevel': 1}),
+            'get_autocomplete_suggestions': lambda: ('GET', {'q': manager()['manager_name'][:rng.randint(2, 6)]}),
+            'get_player_leagues': player(),
+            'generate_league_news': named_player,
+            'generate_league_news_stream': named_player,
+            'http_pool_metrics': lambda: ('GET', {}),
+            'typesense_health': lambda: ('GET', {}),
+        }
+
+    @staticmethod
+    def _clear_caches():
+        bootstrap_cache.invalidate()
+        squad_cache.clear()
+        league_snapshot_cache.clear()
+        autocomplete_index.clear()
+        player_id_cache.clear()
+
+    async def _run(self, patterns, scenarios, simulator, search_client, options):
+        client = AsyncClient()
+        try:
+            for pattern in patterns:
+                scenario = scenarios.get(pattern.name)
+                if scenario is None:
+                    self.stdout.write(f"{pattern.name:<32}  no scenario, skipped")
+                    continue
+                if options['cold']:
+                    self._clear_caches()
+                await self._run_endpoint(client, pattern.name, scenario, simulator, search_client, options)
+        finally:
+            await fpl_http_client.close()
+
+    async def _run_endpoint(self, client, name, scenario, simulator, search_client, options):
+        path = reverse(name)
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            method, params = scenario()
+            async with semaphore:
+                started = time.perf_counter()
+                if method == 'POST':
+                    response = await client.post(path, json.dumps(params), content_type='application/json')
+                else:
+                    response = await client.get(path, params)
+                # Streaming endpoints are timed until the last frame
+                if response.streaming:
+                    async for _ in response.streaming_content:
+                        pass
+                latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+        fpl_before = simulator.request_counts()
+        search_before = search_client.stats['requests']
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        fpl_calls = {
+            route: count - fpl_before.get(route, 0)
+            for route, count in simulator.request_counts().items() if count > fpl_before.get(route, 0)
+        }
+        requests = options['requests']
+        latencies.sort()
+        self.stdout.write(
+            f"{name:<32}{requests / elapsed:8.1f}"
+            f"{_percentile(latencies, 0.5) * 1000:9.1f}{_percentile(latencies, 0.95) * 1000:9.1f}{_percentile(latencies, 0.99) * 1000:9.1f}"
+            f"{errors:8d}{sum(fpl_calls.values()) / requests:9.2f}{(search_client.stats['requests'] - search_before) / requests:11.2f}"
+            f"  {', '.join(f'{route} {count}' for route, count in sorted(fpl_calls.items())) or '-'}"
+        )
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
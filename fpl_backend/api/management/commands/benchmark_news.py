@@ -0,0 +1,90 @@
+# api/management/commands/benchmark_news.py
+import logging
+import random
+import time
+from django.core.management.base import BaseCommand
+from api.league_ranking import compute_league_rankings
+from api.news_generator import NewsGenerator, describe_top_performers
+from api.news_templates import ALL_TEMPLATES, TemplateEngine
+from api.squad import build_squad
+from ._baseline_news_generator import NewsGenerator as BaselineNewsGenerator
+
+class Command(BaseCommand):
+    help = "Measure NewsGenerator articles/sec on synthetic leagues against the pre-template-engine generator"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--managers', type=int, default=300)
+        parser.add_argument('--leagues', type=int, default=8, help="Leagues per manager")
+        parser.add_argument('--league-size', type=int, default=30)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['verbosity'] < 2:
+            # Both generators log every article's rank movement, which would dominate the timings
+            logging.disable(logging.CRITICAL)
+        rng = random.Random(0)
+        workload = [
+            self._manager(rng, options['leagues'], options['league_size'])
+            for _ in range(options['managers'])
+        ]
+
+        def current(engine, seed=None):
+            def create():
+                news_generator = NewsGenerator()
+                news_generator.engine = engine
+                return news_generator
+            return create, {'seed': seed}
+
+        generators = [
+            ('baseline', (BaselineNewsGenerator, {})),
+            # The template engine without compilation, to separate it from the other changes
+            ('engine, str.format', current(TemplateEngine(ALL_TEMPLATES, compile_templates=False))),
+            ('compiled', current(TemplateEngine(ALL_TEMPLATES))),
+            ('compiled, seeded', current(TemplateEngine(ALL_TEMPLATES), 'benchmark')),
+        ]
+        for label, (create, kwargs) in generators:
+            best = 0
+            for _ in range(options['repeat']):
+                best = max(best, self._run(workload, create, kwargs))
+            self.stdout.write(f"{label:>18}: {best:,.0f} articles/sec")
+
+    def _run(self, workload, create, kwargs):
+        count = 0
+        started = time.perf_counter()
+        for player_data, leagues in workload:
+            # One generator per manager, as the news views use it
+            news_generator = create()
+            for league, standings, player_id, rankings, league_insights in leagues:
+                news_generator.generate_article(league, player_data, {'gameweek': 1}, standings, player_id, rankings=rankings, league_insights=league_insights, **kwargs)
+                count += 1
+        return count / (time.perf_counter() - started)
+
+    def _manager(self, rng, league_count, league_size):
+        team_data = [
+            {'name': f"Player {i}", 'position': i + 1, 'points': rng.randint(0, 15), 'multiplier': 1, 'is_captain': False, 'is_vice_captain': False}
+            for i in range(15)
+        ]
+        captain = rng.randrange(11)
+        team_data[captain].update(is_captain=True, multiplier=2)
+        player_data = {
+            'team_name': 'Benchmark FC',
+            'manager_name': 'Bench Manager',
+            'team_data': team_data,
+            'squad': build_squad(team_data)
+        }
+
+        leagues = []
+        for league_id in range(league_count):
+            results = [
+                {'entry': entry, 'entry_name': f"Team {entry}", 'player_name': f"Manager {entry}", 'total': rng.randint(200, 900), 'event_total': rng.randint(10, 110)}
+                for entry in range(league_size)
+            ]
+            results.sort(key=lambda row: -row['total'])
+            standings = {'standings': {'results': results}}
+            # Rankings and top-performer insights come precomputed from the league snapshot, as in the views
+            league_insights = describe_top_performers(sorted(results, key=lambda row: -row['event_total'])[:5])
+            leagues.append((
+                {'id': league_id, 'name': f"League {league_id}"}, standings, rng.randrange(league_size),
+                compute_league_rankings(standings), league_insights
+            ))
+        return player_data, leagues
@@ -0,0 +1,103 @@
+# api/management/commands/benchmark_responses.py
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse as DjangoJsonResponse
+from api import responses
+from api.league_news import build_league_article
+from api.league_snapshot import LeagueSnapshot
+from api.ml_models import bet_generator
+from api.news_generator import NewsGenerator
+from api.responses import JsonResponse, compress_body
+from api.squad import build_squad
+from api.standings import CompactStandings
+
+class Command(BaseCommand):
+    help = "Measure response encoding and compression for realistic payloads from each api endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=20, help="Leagues per manager in the news payloads")
+        parser.add_argument('--league-size', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        fixtures = self._fixtures(rng, options['leagues'], options['league_size'])
+        encodings = ['gzip'] + (['br'] if responses.brotli is not None else [])
+        if responses.orjson is None:
+            self.stdout.write("orjson not installed, the fast path falls back to the stdlib encoder")
+
+        header = f"{'payload':>20} {'bytes':>10} {'stdlib ms':>10} {'fast ms':>9} {'speedup':>8}"
+        for encoding in encodings:
+            header += f" {encoding + ' bytes':>11} {encoding + ' ms':>8}"
+        self.stdout.write(header)
+        for name, payload in fixtures:
+            stdlib = self._time(lambda: DjangoJsonResponse(payload, safe=False), options['repeat'])
+            fast = self._time(lambda: JsonResponse(payload, safe=False), options['repeat'])
+            body = JsonResponse(payload, safe=False).content
+            line = f"{name:>20} {len(body):>10,} {stdlib * 1000:>10.3f} {fast * 1000:>9.3f} {stdlib / fast:>7.1f}x"
+            for encoding in encodings:
+                seconds = self._time(lambda: compress_body(body, encoding), options['repeat'])
+                line += f" {len(compress_body(body, encoding)):>11,} {seconds * 1000:>8.2f}"
+            self.stdout.write(line)
+
+    @staticmethod
+    def _time(fn, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def _fixtures(self, rng, league_count, league_size):
+        team_data = [
+            {
+                'id': 100 + i, 'name': f"Player {i}", 'position': i + 1, 'element_type': 1 if i in (0, 11) else rng.randint(2, 4),
+                'points': rng.randint(0, 15), 'is_captain': i == 3, 'is_vice_captain': i == 4,
+                'multiplier': 2 if i == 3 else 1, 'team_name': rng.choice(['ARS', 'LIV', 'MCI', 'CHE', 'TOT'])
+            }
+            for i in range(15)
+        ]
+        squad = build_squad(team_data)
+        bets = bet_generator.generate_bet_suggestions(squad.players, 'benchmark', 2)
+        history = [
+            {
+                'timestamp': f"2025-07-{day % 28 + 1:02d}T18:05:58.610719", 'total_odds': round(rng.uniform(1, 40), 2),
+                'luck_level': rng.randint(-2, 2), 'stake': rng.randint(0, 50), 'potential_win': rng.randint(0, 500),
+                'legs_count': rng.randint(1, 8), 'bet_id': str(uuid.UUID(int=rng.getrandbits(128)))
+            }
+            for day in range(50)
+        ]
+        leagues = [{'id': league_id, 'name': f"League {league_id}", 'entry_rank': rng.randint(1, league_size)} for league_id in range(league_count)]
+
+        player_id = league_size // 2
+        player_context = {'team_name': 'Benchmark FC', 'manager_name': 'Bench Manager', 'team_data': team_data, 'active_chip': None, 'squad': squad}
+        news_generator = NewsGenerator()
+        news = {}
+        for standings_mode in ('window', 'full'):
+            articles = []
+            for league in leagues:
+                results = [
+                    {'entry': entry, 'entry_name': f"Team {entry}", 'player_name': f"Manager {entry}", 'rank': 0, 'last_rank': rng.randint(1, league_size),
+                     'total': rng.randint(200, 900), 'event_total': rng.randint(10, 110)}
+                    for entry in range(league_size)
+                ]
+                results.sort(key=lambda row: -row['total'])
+                for rank, row in enumerate(results, 1):
+                    row['rank'] = rank
+                standings = CompactStandings({'league': league, 'standings': {'results': results}}).finalise()
+                snapshot = LeagueSnapshot(league['id'], 1, standings)
+                articles.append(build_league_article(news_generator, league, player_context, 1, snapshot, player_id, [], [], standings_mode))
+            news[standings_mode] = {'articles': articles, 'league_errors': []}
+
+        return [
+            ('team_data', {'team_data': [{**player, 'event': 1} for player in squad.players], 'total_points': squad.total_points,
+                           'active_chip': None, 'bench_boost_active': False, 'gameweek': 1}),
+            ('bet_suggestions', {'bet_legs': bets['bet_legs'], 'total_odds': bets['total_odds'], 'team_data': squad.players, 'luck_level': 2}),
+            ('user_history', {'player_id': 'benchmark', 'bet_count': len(history), 'history': history, 'total_users': 4}),
+            ('leagues', {'leagues': leagues}),
+            ('league_news (window)', news['window']),
+            ('league_news (full)', news['full'])
+        ]
@@ -0,0 +1,118 @@
+# api/management/commands/benchmark_squad.py
+import copy
+import random
+import timeit
+from django.core.management.base import BaseCommand
+from api.news_generator import NewsGenerator
+from api.squad import SquadCache, build_squad
+
+class Command(BaseCommand):
+    help = "Per-request CPU of squad scoring: build_squad() once vs the old per-view loops and per-league deep copies"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--squads', type=int, default=200)
+        parser.add_argument('--leagues', type=int, default=20, help="Leagues per manager in the news scenario")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        squads = [(self._team_data(rng), rng.choice([None, None, None, 'bboost'])) for _ in range(options['squads'])]
+        news_generator = NewsGenerator()
+        leagues = options['leagues']
+
+        def team_view_before():
+            for team_data, active_chip in squads:
+                # The view mutated the freshly fetched picks in place, then totalled them
+                players = _legacy_captaincy([dict(pick) for pick in team_data])
+                sum(player.get('points', 0) for player in players if player['position'] <= 11 or active_chip == 'bboost')
+
+        def team_view_after():
+            for team_data, active_chip in squads:
+                build_squad(team_data, active_chip).total_points
+
+        cache = SquadCache()
+        for i, (team_data, active_chip) in enumerate(squads):
+            cache.put(i, 1, build_squad(team_data, active_chip), 3600)
+
+        def team_view_cached():
+            # A repeat request in the same gameweek is served the squad cached on the first one
+            for i in range(len(squads)):
+                cache.get(i, 1).total_points
+
+        def league_news_before():
+            for team_data, active_chip in squads:
+                for _ in range(leagues):
+                    _legacy_analyze_team_performance(team_data, active_chip)
+
+        def league_news_after():
+            for team_data, active_chip in squads:
+                squad = build_squad(team_data, active_chip)
+                for _ in range(leagues):
+                    news_generator._analyze_team_performance(team_data, active_chip, squad)
+
+        scenarios = [
+            ('team/bet view', team_view_before, team_view_after),
+            ('team/bet view, cached', team_view_before, team_view_cached),
+            (f"league news, {leagues} leagues", league_news_before, league_news_after),
+        ]
+        for label, before, after in scenarios:
+            before_us = self._per_request_us(before, options)
+            after_us = self._per_request_us(after, options)
+            self.stdout.write(f"{label:>24}: before {before_us:8.1f}us, after {after_us:8.1f}us per request ({before_us / after_us:.1f}x)")
+
+    @staticmethod
+    def _per_request_us(function, options):
+        best = min(timeit.repeat(function, number=1, repeat=options['repeat']))
+        return best / options['squads'] * 1e6
+
+    @staticmethod
+    def _team_data(rng):
+        team_data = [
+            {'id': i, 'name': f"Player {i}", 'position': i + 1, 'element_type': 1 + i % 4, 'points': rng.choice([0, 1, 2, 2, 3, 6, 9]),
+             'is_captain': False, 'is_vice_captain': False, 'multiplier': 1 if i < 11 else 0, 'team_name': 'ARS'}
+            for i in range(15)
+        ]
+        captain, vice_captain = rng.sample(range(11), 2)
+        team_data[captain].update(is_captain=True, multiplier=2)
+        team_data[vice_captain]['is_vice_captain'] = True
+        return team_data
+
+def _legacy_captaincy(team_data):
+    """The two-pass captain/vice-captain loop each view used to carry"""
+    captain_playing = False
+    vice_captain_playing = False
+    for player in team_data:
+        if player.get('is_captain') and player.get('points', 0) > 0:
+            captain_playing = True
+        if player.get('is_vice_captain') and player.get('points', 0) > 0:
+            vice_captain_playing = True
+    for player in team_data:
+        if not captain_playing and vice_captain_playing and player.get('is_vice_captain'):
+            player['is_captain'] = True
+            player['is_vice_captain'] = False
+            player['multiplier'] = 2
+            player['points'] = player.get('points', 0) * 2
+        elif player.get('multiplier') == 2:
+            player['points'] = player.get('points', 0) * 2
+            if not player.get('is_captain'):
+                player['is_captain'] = True
+                player['is_vice_captain'] = False
+    return team_data
+
+def _legacy_analyze_team_performance(team_data, active_chip=None):
+    """NewsGenerator._analyze_team_performance before api/squad.py: a deep copy and rescoring per league"""
+    team_data_copy = _legacy_captaincy(copy.deepcopy(team_data))
+    bench_boost_active = active_chip == 'bboost'
+    total_points = sum(player.get('points', 0) for player in team_data_copy if player['position'] <= 11 or bench_boost_active)
+    top_player = max(team_data_copy, key=lambda x: x.get('points', 0))
+    captain = next((p for p in team_data_copy if p.get('is_captain')), None)
+    vice_captain = next((p for p in team_data_copy if p.get('is_vice_captain')), None)
+    return {
+        'total_points': total_points,
+        'top_scorer': top_player['name'],
+        'top_scorer_points': top_player['points'],
+        'captain_points': captain['points'] if captain else 0,
+        'vice_captain_points': vice_captain['points'] if vice_captain else 0,
+        'bench_points': sum(player.get('points', 0) for player in team_data_copy if player.get('points', 0) == 0),
+        'chips_used': []
+    }
@@ -0,0 +1,33 @@
+# api/management/commands/ensure_typesense_collection.py
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from api.http_client import typesense_http_client
+from api.typesense_service import typesense_service
+
+class Command(BaseCommand):
+    help = "Create the Typesense managers collection if needed and check its schema (safe to run on every deploy)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-create', action='store_true', help="Only check, fail if the collection doesn't exist")
+        parser.add_argument('--strict', action='store_true', help="Fail on any schema drift, not just missing queried fields")
+
+    def handle(self, *args, **options):
+        if options['no_create']:
+            typesense_service.auto_create = False
+        state = asyncio.run(self._ensure())
+
+        if state.get('created'):
+            self.stdout.write(self.style.SUCCESS(f"Created collection {state['collection']}"))
+        for key in ('missing_fields', 'unexpected_fields', 'type_mismatches'):
+            if state.get(key):
+                self.stdout.write(self.style.WARNING(f"{key.replace('_', ' ')}: {state[key]}"))
+
+        if not state['verified'] or (options['strict'] and state['status'] != 'ok'):
+            raise CommandError(f"Collection {state['collection']} is {state['status']}: {state.get('error') or state.get('missing_query_fields')}")
+        self.stdout.write(self.style.SUCCESS(f"Collection {state['collection']} {state['status']} ({state.get('num_documents')} documents)"))
+
+    async def _ensure(self):
+        try:
+            return await typesense_service.ensure_collection(force=True)
+        finally:
+            await typesense_http_client.close()
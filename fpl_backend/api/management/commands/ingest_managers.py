@@ -0,0 +1,45 @@
+# api/management/commands/ingest_managers.py
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from typesense import exceptions
+from api.http_client import typesense_http_client
+from api.manager_ingest import ManagerIngestPipeline
+
+class Command(BaseCommand):
+    help = "Bulk import FPL managers from a JSONL/CSV dump (optionally .gz) into the Typesense managers collection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Dump of entry payloads or standings rows, one per line (.jsonl) or row (.csv)")
+        parser.add_argument('--batch-size', type=int, help="Documents per import request (default TYPESENSE_INGEST['BATCH_SIZE'])")
+        parser.add_argument('--workers', type=int, help="Concurrent import requests (default TYPESENSE_INGEST['WORKERS'])")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default <source>.checkpoint.json)")
+        parser.add_argument('--restart', action='store_true', help="Ignore any checkpoint and import from the start")
+        parser.add_argument('--action', default='upsert', choices=['create', 'upsert', 'update', 'emplace'])
+        parser.add_argument('--dry-run', action='store_true', help="Read and batch the dump without uploading")
+
+    def handle(self, *args, **options):
+        pipeline = ManagerIngestPipeline(
+            options['source'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            checkpoint_path=options['checkpoint'],
+            action=options['action'],
+            dry_run=options['dry_run'],
+            report=self.stdout.write
+        )
+        try:
+            stats = asyncio.run(self._run(pipeline, resume=not options['restart']))
+        except exceptions.TypesenseClientError as e:
+            raise CommandError(f"{e} (rerun to resume from {pipeline.checkpoint_path})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['imported']:,} managers ({stats['failed']:,} rejected, {stats['skipped']:,} unusable records) "
+            f"in {stats['seconds']}s: {stats['docs_per_sec']:,} docs/sec over {stats['batches']} batches, {stats['retries']} retries"
+        ))
+        if stats['failed']:
+            self.stdout.write(self.style.WARNING(f"Rejected documents written to {pipeline.rejected_path}"))
+
+    async def _run(self, pipeline, resume):
+        try:
+            return await pipeline.run(resume=resume)
+        finally:
+            await typesense_http_client.close()
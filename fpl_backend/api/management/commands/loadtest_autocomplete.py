@@ -0,0 +1,132 @@
+# api/management/commands/loadtest_autocomplete.py
+import asyncio
+import random
+import socket
+import threading
+import time
+import typesense
+from aiohttp import web
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+from api import views
+from api.autocomplete import autocomplete_index
+from api.http_client import typesense_http_client
+from api.typesense_client import AsyncTypesenseClient
+from api.typesense_local import LocalCollection, LocalTypesenseClient
+from api.typesense_service import typesense_service
+
+class Command(BaseCommand):
+    help = "Concurrent autocomplete throughput for one worker against a Typesense stand-in (HTTP or in-process) with fixed latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--latency-ms', type=float, default=20, help="Stand-in search latency")
+        parser.add_argument('--documents', type=int, default=20000)
+        parser.add_argument('--backend', choices=['http', 'local'], default='http',
+                            help="Stand-in served over HTTP from a thread, or the in-process local search backend")
+
+    def handle(self, *args, **options):
+        collection = self._collection(options['documents'])
+        rng = random.Random(0)
+        queries = [rng.choice(FIRST_NAMES)[:rng.randint(2, 5)] for _ in range(options['requests'])]
+        # Every request goes to the stand-in, the in-process autocomplete layer is measured elsewhere
+        autocomplete_index.lookup = lambda query, field='both', limit=10: None
+        self.stdout.write(f"{options['requests']} requests, concurrency {options['concurrency']}, stand-in latency {options['latency_ms']}ms")
+
+        if options['backend'] == 'local':
+            client = LocalTypesenseClient(latency_ms=options['latency_ms'])
+            client.collections[collection.schema['name']] = collection
+            typesense_service.async_client = client
+            asyncio.run(self._run('local backend', queries, options['concurrency']))
+            return
+
+        port = self._start_stand_in(collection, options['latency_ms'] / 1000)
+        config = {
+            'nodes': [{'host': '127.0.0.1', 'port': port, 'protocol': 'http'}],
+            'api_key': 'loadtest',
+            'connection_timeout_seconds': 10
+        }
+        typesense_service.async_client = AsyncTypesenseClient(config)
+        sync_client = typesense.Client(config)
+        asyncio.run(self._run('asyncio client', queries, options['concurrency']))
+
+        async def blocking_search(collection, search_parameters):
+            # What the views did before: the sync client called straight from the event loop
+            return sync_client.collections[collection].documents.search(search_parameters)
+        typesense_service.async_client.search = blocking_search
+        asyncio.run(self._run('blocking sync client', queries, options['concurrency']))
+
+    async def _run(self, label, queries, concurrency):
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one(query):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await views.get_autocomplete_suggestions(factory.get('/api/autocomplete/', {'q': query}))
+                latencies.append(time.perf_counter() - started)
+                return response.status_code
+
+        try:
+            await typesense_service.ensure_collection(force=True)
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(one(query) for query in queries))
+            elapsed = time.perf_counter() - started
+        finally:
+            await typesense_http_client.close()
+
+        latencies.sort()
+        p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+        failed = sum(1 for status in statuses if status != 200)
+        self.stdout.write(
+            f"{label:>22}: {len(queries) / elapsed:8.1f} req/s, p50 {p50 * 1000:7.1f}ms, p95 {p95 * 1000:7.1f}ms, {failed} failed"
+        )
+
+    @staticmethod
+    def _collection(document_count):
+        rng = random.Random(1)
+        collection = LocalCollection(typesense_service.collection_schema())
+        for i in range(document_count):
+            collection.upsert({
+                'id': str(i),
+                'manager_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                'squad_name': f"{rng.choice(LAST_NAMES)} {rng.choice(SQUAD_SUFFIXES)}"
+            })
+        return collection
+
+    def _start_stand_in(self, collection, latency):
+        """Serve search and collection endpoints from a thread with its own event loop"""
+
+        async def search(request):
+            await asyncio.sleep(latency)
+            return web.json_response(collection.search(dict(request.query)))
+
+        async def retrieve(request):
+            return web.json_response(collection.info())
+
+        app = web.Application()
+        app.router.add_get('/collections/{name}/documents/search', search)
+        app.router.add_get('/collections/{name}', retrieve)
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        ready = threading.Event()
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            runner = web.AppRunner(app, access_log=None)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.SockSite(runner, sock).start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return port
+
+FIRST_NAMES = ['John', 'James', 'Mohamed', 'Maria', 'Mark', 'Sam', 'Sarah', 'Alex', 'Kevin', 'Luke', 'Paul', 'Tom']
+LAST_NAMES = ['Smith', 'Jones', 'Brown', 'Taylor', 'Wilson', 'Khan', 'Lewis', 'Walker', 'Green', 'King']
+SQUAD_SUFFIXES = ['FC', 'United', 'City', 'Rovers', 'Wanderers', 'XI']
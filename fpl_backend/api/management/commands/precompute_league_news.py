@@ -0,0 +1,33 @@
+# api/management/commands/precompute_league_news.py
+import asyncio
+from django.core.management.base import BaseCommand
+from api.http_client import fpl_http_client
+from api.news_scheduler import NewsPrecomputeScheduler
+
+class Command(BaseCommand):
+    help = "Pre-generate league news into the article store when the current gameweek finishes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single check instead of polling forever")
+        parser.add_argument('--force', action='store_true', help="Precompute even if the event flags haven't changed")
+        parser.add_argument('--interval', type=int, help="Seconds between checks (default FPL_NEWS_PRECOMPUTE['POLL_INTERVAL'])")
+
+    def handle(self, *args, **options):
+        scheduler = NewsPrecomputeScheduler()
+        if options['interval']:
+            scheduler.poll_interval = options['interval']
+        asyncio.run(self._run(scheduler, options))
+
+    async def _run(self, scheduler, options):
+        try:
+            if options['once'] or options['force']:
+                stats = await scheduler.check_once(force=options['force'])
+                if stats:
+                    self.stdout.write(self.style.SUCCESS(f"Precomputed league news: {stats}"))
+                else:
+                    self.stdout.write("Nothing to precompute: gameweek not finished or already done")
+            else:
+                self.stdout.write(f"Watching for finished gameweeks every {scheduler.poll_interval}s")
+                await scheduler.run_forever()
+        finally:
+            await fpl_http_client.close()
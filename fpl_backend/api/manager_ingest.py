@@ -0,0 +1,262 @@
+# api/manager_ingest.py
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterator, Optional
+from django.conf import settings
+from typesense import exceptions
+from .responses import decode_json, encode_json
+from .typesense_service import typesense_service
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying with back-off: the cluster is busy, lagging or briefly unreachable
+RETRYABLE_ERRORS = (exceptions.ServiceUnavailable, exceptions.ServerError, exceptions.Timeout, asyncio.TimeoutError)
+
+def manager_document(record: Dict) -> Optional[Dict]:
+    """
+    Search document for one FPL entry. Accepts entry API payloads
+    (id/name/player_first_name/player_last_name), league standings rows
+    (entry/entry_name/player_name) or already mapped documents.
+    """
+    entry_id = record.get('entry') or record.get('id')
+    manager_name = record.get('manager_name') or record.get('player_name') or ' '.join(
+        part for part in (record.get('player_first_name'), record.get('player_last_name')) if part
+    )
+    squad_name = record.get('squad_name') or record.get('entry_name') or record.get('name')
+    if not entry_id or not manager_name or not squad_name:
+        return None
+    return {'id': str(entry_id), 'manager_name': str(manager_name).strip(), 'squad_name': str(squad_name).strip()}
+
+def read_records(path: str, skip: int = 0) -> Iterator[Dict]:
+    """Stream records from a JSONL or CSV dump (optionally .gz), skipping the first `skip`"""
+    name = path[:-3] if path.endswith('.gz') else path
+    raw = gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+    with raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as handle:
+        if name.endswith('.csv'):
+            records = csv.DictReader(handle)
+        else:
+            records = (decode_json(line) for line in handle if line.strip())
+        for index, record in enumerate(records):
+            if index >= skip:
+                yield record
+
+class ManagerIngestPipeline:
+    """
+    Streams an FPL entry dump into the managers collection with batched
+    JSONL imports. A bounded queue between the reader and the upload
+    workers provides back-pressure, so memory stays at a few batches
+    however large the dump is; a busy cluster (503/429/5xx) pauses every
+    worker with exponential back-off. Progress is checkpointed as the
+    number of records fully imported in order, so an interrupted run
+    resumes where it stopped; the checkpoint is tied to the dump's size
+    and mtime and removed once a run completes. Documents Typesense
+    rejects are written to a side file for replay, and a batch with too
+    many rejections stops the run before the checkpoint moves past it.
+    """
+
+    def __init__(self, source, batch_size=None, workers=None, checkpoint_path=None, action='upsert', dry_run=False, report=None, rejected_path=None):
+        config = getattr(settings, 'TYPESENSE_INGEST', {})
+        self.source = os.path.abspath(source)
+        self.batch_size = batch_size or config.get('BATCH_SIZE', 5000)
+        self.workers = workers or config.get('WORKERS', 4)
+        self.max_retries = config.get('MAX_RETRIES', 6)
+        self.timeout = config.get('TIMEOUT', 300)
+        self.report_interval = config.get('REPORT_INTERVAL', 5)
+        self.max_rejected_ratio = config.get('MAX_REJECTED_RATIO', 0.05)
+        self.checkpoint_path = checkpoint_path or f"{self.source}.checkpoint.json"
+        self.rejected_path = rejected_path or f"{self.source}.rejected.jsonl"
+        self.action = action
+        self.dry_run = dry_run
+        self.report = report or (lambda message: logger.info(message))
+        self.stats = {'read': 0, 'skipped': 0, 'imported': 0, 'failed': 0, 'batches': 0, 'retries': 0}
+        self._pause_until = 0.0
+
+    def load_checkpoint(self) -> int:
+        """Records already imported by a previous run of this source"""
+        try:
+            with open(self.checkpoint_path) as handle:
+                checkpoint = json.load(handle)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get('source') != self.source:
+            logger.warning(f"Ignoring checkpoint {self.checkpoint_path}, it is for {checkpoint.get('source')}")
+            return 0
+        if checkpoint.get('signature') != self._source_signature():
+            logger.warning(f"Ignoring checkpoint {self.checkpoint_path}, {self.source} has changed since it was written")
+            return 0
+        return checkpoint.get('position', 0)
+
+    def save_checkpoint(self, position: int):
+        checkpoint = {'source': self.source, 'signature': self._source_signature(), 'position': position, 'updated_at': time.time(), **self.stats}
+        # Write-then-rename so a crash mid-write never leaves a truncated checkpoint
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, 'w') as handle:
+            json.dump(checkpoint, handle)
+        os.replace(temporary, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _source_signature(self) -> Dict:
+        """Size and mtime of the dump, so a refreshed dump at the same path starts over"""
+        stat = os.stat(self.source)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    async def run(self, resume=True) -> Dict:
+        start_position = self.load_checkpoint() if resume else 0
+        if start_position:
+            self.report(f"Resuming {self.source} after {start_position:,} records")
+        elif not self.dry_run and os.path.exists(self.rejected_path):
+            # Rejections from an earlier, unrelated run
+            os.remove(self.rejected_path)
+        if not self.dry_run:
+            state = await typesense_service.ensure_collection(force=True)
+            if not state['verified']:
+                raise exceptions.TypesenseClientError(f"Collection {state['collection']} is {state['status']}")
+
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+        # Batches finish out of order, the checkpoint only advances over a contiguous prefix
+        completed = {}
+        next_sequence = [0]
+        position = [start_position]
+        started = time.monotonic()
+
+        def batch_done(sequence, end_position):
+            completed[sequence] = end_position
+            advanced = False
+            while next_sequence[0] in completed:
+                position[0] = completed.pop(next_sequence[0])
+                next_sequence[0] += 1
+                advanced = True
+            if advanced and not self.dry_run:
+                self.save_checkpoint(position[0])
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    sequence, end_position, documents = item
+                    await self._import_batch(documents)
+                    batch_done(sequence, end_position)
+                finally:
+                    queue.task_done()
+
+        async def reporter():
+            while True:
+                await asyncio.sleep(self.report_interval)
+                self._report_progress(started)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        progress = asyncio.create_task(reporter())
+        try:
+            await self._produce(queue, start_position, workers)
+            for _ in workers:
+                await self._enqueue(queue, None, workers)
+            await asyncio.gather(*workers)
+        finally:
+            progress.cancel()
+            for task in workers:
+                task.cancel()
+
+        if not self.dry_run:
+            # The whole dump is in, a rerun (e.g. on a refreshed dump) starts from the top
+            self.clear_checkpoint()
+        self.stats['seconds'] = round(time.monotonic() - started, 2)
+        self.stats['docs_per_sec'] = round((self.stats['imported'] + self.stats['failed']) / max(self.stats['seconds'], 1e-9))
+        self.stats['position'] = position[0]
+        return self.stats
+
+    async def _produce(self, queue, start_position, workers):
+        sequence = 0
+        documents = []
+        record_position = start_position
+        for record in read_records(self.source, skip=start_position):
+            record_position += 1
+            self.stats['read'] += 1
+            document = manager_document(record)
+            if document is None:
+                self.stats['skipped'] += 1
+            else:
+                documents.append(encode_json(document))
+            if len(documents) >= self.batch_size:
+                await self._enqueue(queue, (sequence, record_position, documents), workers)
+                sequence += 1
+                documents = []
+        if documents or sequence == 0:
+            await self._enqueue(queue, (sequence, record_position, documents), workers)
+
+    @staticmethod
+    async def _enqueue(queue, item, workers):
+        """Put item on the queue, waiting while it's full, unless an upload worker has failed"""
+        put = asyncio.ensure_future(queue.put(item))
+        while not put.done():
+            for task in workers:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    put.cancel()
+                    raise task.exception()
+            running = [task for task in workers if not task.done()]
+            if not running:
+                put.cancel()
+                raise RuntimeError("Upload workers stopped unexpectedly")
+            await asyncio.wait([put, *running], return_when=asyncio.FIRST_COMPLETED)
+
+    async def _import_batch(self, documents):
+        if not documents:
+            return
+        if self.dry_run:
+            self.stats['imported'] += len(documents)
+            self.stats['batches'] += 1
+            return
+
+        body = b"\n".join(documents).decode()
+        for attempt in range(self.max_retries + 1):
+            delay = self._pause_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                results = await typesense_service.async_client.import_documents(
+                    typesense_service.collection_name, body, action=self.action, timeout=self.timeout
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                self.stats['retries'] += 1
+                backoff = min(2 ** attempt, 30)
+                # Every worker holds off, not just this one, so the cluster gets room to catch up
+                self._pause_until = max(self._pause_until, time.monotonic() + backoff)
+                logger.warning(f"Import batch failed ({e!r}), retrying in {backoff}s")
+
+        failures = [result for result in results if not result.get('success')]
+        if failures:
+            if len(failures) > len(results) * self.max_rejected_ratio:
+                raise exceptions.TypesenseClientError(
+                    f"{len(failures)} of {len(results)} documents rejected in one batch (first: {failures[0].get('error')}), stopping"
+                )
+            logger.warning(f"{len(failures)} documents rejected in batch, first: {failures[0].get('error')}")
+            self._write_rejected(documents, results)
+        self.stats['imported'] += len(results) - len(failures)
+        self.stats['failed'] += len(failures)
+        self.stats['batches'] += 1
+
+    def _write_rejected(self, documents, results):
+        """Append rejected documents and their errors to the side file, one JSON object per line"""
+        # Import results come back one per document, in order
+        with open(self.rejected_path, 'ab') as handle:
+            for document, result in zip(documents, results):
+                if not result.get('success'):
+                    handle.write(encode_json({'error': result.get('error'), 'document': decode_json(document)}) + b"\n")
+
+    def _report_progress(self, started):
+        elapsed = time.monotonic() - started
+        done = self.stats['imported'] + self.stats['failed']
+        self.report(f"{done:,} documents in {elapsed:.0f}s ({done / max(elapsed, 1e-9):,.0f} docs/sec), {self.stats['retries']} retries")
@@ -0,0 +1,29 @@
+# api/middleware.py
+import asyncio
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .responses import compress_response
+
+class CompressionMiddleware:
+    """gzip/brotli for large API responses, negotiated per request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        config = getattr(settings, 'FPL_RESPONSE_COMPRESSION', {})
+        if not response.streaming and len(response.content) >= config.get('THREAD_MIN_SIZE', 256 * 1024):
+            # Compressing a multi-megabyte body takes tens of ms, keep it off the event loop
+            return await asyncio.to_thread(compress_response, request, response)
+        return compress_response(request, response)
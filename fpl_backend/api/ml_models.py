@@ -1,17 +1,23 @@
 # api/ml_models.py
 import numpy as np
-import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+from .bet_history import BetHistoryStore, create_bet_history_store
 
 logger = logging.getLogger(__name__)
 
 class BetGenerator:
+    # Percentile of the ownership/form/ICT blend, and ownership %, above which a player is high profile
+    HIGH_PROFILE_PERCENTILE = 0.95
+    HIGH_PROFILE_OWNERSHIP = 20.0
+
     def __init__(self):
         self.player_profiles = self._load_player_profiles()
-        self.user_betting_history = self._load_user_history()
+        self.profile_index: Dict[int, str] = {}
+        self._profile_source = None
+        self.history_store = self._load_user_history()
         self.bet_types = {
             'goal_scorer': {'base_odds': 2.0, 'multiplier': 1.2},  # Evens
             'assist': {'base_odds': 2.5, 'multiplier': 1.3},       # 3/2 shot
@@ -52,38 +58,12 @@ class BetGenerator:
             logger.error(f"Error loading player profiles: {e}")
             return {}
 
-    def _load_user_history(self) -> Dict[str, List]:
-        """Load user betting history for personalization"""
-        try:
-            # Use absolute path to ensure file is saved in the correct location
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            history_file = os.path.join(current_dir, 'user_betting_history.json')
-            
-            if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    data = json.load(f)
-                    logger.info(f"Loaded user history from {history_file}: {len(data)} users")
-                    return data
-            else:
-                logger.info(f"No existing user history file found at {history_file}")
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading user history: {e}")
-            return {}
-
-    def _save_user_history(self):
-        """Save user betting history"""
-        try:
-            # Use absolute path to ensure file is saved in the correct location
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            history_file = os.path.join(current_dir, 'user_betting_history.json')
-            
-            with open(history_file, 'w') as f:
-                json.dump(self.user_betting_history, f, indent=2)
-            
-            logger.info(f"Saved user history to {history_file}: {len(self.user_betting_history)} users")
-        except Exception as e:
-            logger.error(f"Error saving user history: {e}")
+    def _load_user_history(self) -> BetHistoryStore:
+        """Open the configured bet history store for personalization"""
+        # Use absolute path to ensure the legacy file is found in the correct location
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        legacy_file = os.path.join(current_dir, 'user_betting_history.json')
+        return create_bet_history_store(legacy_file)
 
     def analyze_team_composition(self, team_data: List[Dict]) -> Dict[str, Any]:
         """Analyze team composition to determine betting strategy"""
@@ -105,10 +85,9 @@ class BetGenerator:
             
             # Categorize players by position and profile
             element_type = player.get('element_type', 1)
-            player_name = player.get('name', '').lower()
             
-            # Determine player profile based on name and position
-            profile = self._determine_player_profile(player_name, element_type)
+            # Look up the player's profile (form, ownership and ICT based)
+            profile = self._get_player_profile(player)
             
             if profile == 'high_profile':
                 analysis['high_profile_players'].append(player)
@@ -124,8 +103,50 @@ class BetGenerator:
         
         return analysis
 
+    def build_profile_index(self, elements) -> Dict[int, str]:
+        """
+        Classify every FPL element from bootstrap-static in one vectorised pass.
+        The top 5% of players on a blend of ownership, form and ICT index
+        percentiles (and anyone very widely owned) are high profile.
+        """
+        elements = list(elements)
+        if not elements:
+            return {}
+        
+        def column(field):
+            return np.array([float(e.get(field) or 0) for e in elements])
+        
+        def percentile_rank(values):
+            if len(values) < 2:
+                return np.ones(len(values))
+            return values.argsort().argsort() / (len(values) - 1)
+        
+        ownership = column('selected_by_percent')
+        composite = (percentile_rank(ownership) + percentile_rank(column('form')) + percentile_rank(column('ict_index'))) / 3
+        high_profile = (percentile_rank(composite) >= self.HIGH_PROFILE_PERCENTILE) | (ownership >= self.HIGH_PROFILE_OWNERSHIP)
+        goalkeeper = np.array([e.get('element_type') == 1 for e in elements])
+        
+        profiles = np.where(high_profile, 'high_profile', np.where(goalkeeper, 'mid_profile', 'low_profile'))
+        return {e['id']: str(profile) for e, profile in zip(elements, profiles)}
+
+    def use_bootstrap(self, snapshot):
+        """Rebuild the profile index when a new bootstrap-static snapshot arrives"""
+        if snapshot is None or snapshot is self._profile_source:
+            return
+        self.profile_index = self.build_profile_index(snapshot.players.values())
+        self._profile_source = snapshot
+        high_count = sum(1 for profile in self.profile_index.values() if profile == 'high_profile')
+        logger.info(f"Built player profile index: {len(self.profile_index)} players, {high_count} high profile")
+
+    def _get_player_profile(self, player: Dict) -> str:
+        """O(1) profile lookup by element id, falling back to name recognition"""
+        profile = self.profile_index.get(player.get('id'))
+        if profile is None:
+            profile = self._determine_player_profile(player.get('name', '').lower(), player.get('element_type', 1))
+        return profile
+
     def _determine_player_profile(self, player_name: str, position: int) -> str:
-        """Determine player profile based on name recognition and position"""
+        """Determine player profile based on name recognition and position (used before bootstrap data is loaded)"""
         high_profile_names = [
             'salah', 'haaland', 'kane', 'de bruyne', 'bruno', 'son', 'rashford',
             'saka', 'martinelli', 'odegaard', 'palmer', 'foden', 'grealish',
@@ -140,64 +161,102 @@ class BetGenerator:
             return 'low_profile'
 
     def generate_bet_suggestions(self, team_data: List[Dict], player_id: str, luck_level: int = 0) -> Dict[str, Any]:
-        """Generate personalized bet suggestions based on team analysis"""
+        """
+        Generate personalized bet suggestions based on team analysis.
+        A single slip is priced with the scalar odds adjustment; the NumPy
+        pass in generate_bet_suggestions_batch only pays off across many slips.
+        """
         analysis = self.analyze_team_composition(team_data)
-        user_history = self.user_betting_history.get(player_id, [])
-        
+        bet_legs = self._plan_bet_legs(team_data, analysis, luck_level)
         # Determine baseline odds based on user history
-        baseline_odds = self._calculate_baseline_odds(user_history)
+        baseline_odds = self._calculate_baseline_odds(self.get_user_history(player_id))
         
-        # Generate bet legs with luck-based player selection
-        bet_legs = []
         total_odds = 1.0
+        for leg in bet_legs:
+            leg['odds'] = self._adjust_odds_for_luck(leg['odds'], luck_level, baseline_odds)
+            total_odds *= leg['odds']
+        
+        return {
+            'bet_legs': bet_legs,
+            'total_odds': total_odds,
+            'team_analysis': analysis,
+            'luck_level': luck_level
+        }
+
+    def generate_bet_suggestions_batch(self, entries: List[Tuple[List[Dict], str, int]]) -> List[Dict[str, Any]]:
+        """
+        Generate bet suggestions for many (team_data, player_id, luck_level) entries.
+        Legs are picked per squad, then the odds for every leg of every slip are
+        adjusted in one vectorised pass.
+        """
+        if not entries:
+            return []
+        
+        planned = []
+        for team_data, player_id, luck_level in entries:
+            analysis = self.analyze_team_composition(team_data)
+            bet_legs = self._plan_bet_legs(team_data, analysis, luck_level)
+            # Determine baseline odds based on user history
+            baseline_odds = self._calculate_baseline_odds(self.get_user_history(player_id))
+            planned.append((analysis, bet_legs, luck_level, baseline_odds))
+        
+        leg_counts = [len(bet_legs) for _, bet_legs, _, _ in planned]
+        base_odds = np.array([leg['odds'] for _, bet_legs, _, _ in planned for leg in bet_legs], dtype=float)
+        luck_levels = np.repeat(np.array([luck_level for _, _, luck_level, _ in planned], dtype=float), leg_counts)
+        baselines = np.repeat(np.array([baseline for _, _, _, baseline in planned], dtype=float), leg_counts)
+        adjusted_odds = self._adjust_odds_for_luck_array(base_odds, luck_levels, baselines)
+        
+        results = []
+        offset = 0
+        for (analysis, bet_legs, luck_level, _), leg_count in zip(planned, leg_counts):
+            total_odds = 1.0
+            for leg, odds in zip(bet_legs, adjusted_odds[offset:offset + leg_count]):
+                leg['odds'] = float(odds)
+                total_odds *= leg['odds']
+            offset += leg_count
+            results.append({
+                'bet_legs': bet_legs,
+                'total_odds': total_odds,
+                'team_analysis': analysis,
+                'luck_level': luck_level
+            })
+        
+        return results
+
+    def _plan_bet_legs(self, team_data: List[Dict], analysis: Dict, luck_level: int) -> List[Dict]:
+        """Pick the bet legs for a squad, priced at their unadjusted base odds"""
+        bet_legs = []
         
         # Select players based on luck level
         selected_players = self._select_players_by_luck(team_data, analysis, luck_level)
         
         # Captain bet (highest confidence)
         if selected_players.get('captain'):
-            captain_leg = self._create_captain_bet(selected_players['captain'], luck_level, baseline_odds)
-            bet_legs.append(captain_leg)
-            total_odds *= captain_leg['odds']
+            bet_legs.append(self._create_captain_bet(selected_players['captain']))
         
         # Vice captain bet
         if selected_players.get('vice_captain'):
-            vc_leg = self._create_vice_captain_bet(selected_players['vice_captain'], luck_level, baseline_odds)
-            bet_legs.append(vc_leg)
-            total_odds *= vc_leg['odds']
+            bet_legs.append(self._create_vice_captain_bet(selected_players['vice_captain']))
         
         # High profile player bets
         for player in selected_players.get('high_profile', [])[:2]:  # Limit to 2 high profile bets
             if player not in [selected_players.get('captain'), selected_players.get('vice_captain')]:
-                high_profile_leg = self._create_high_profile_bet(player, luck_level, baseline_odds)
-                bet_legs.append(high_profile_leg)
-                total_odds *= high_profile_leg['odds']
+                bet_legs.append(self._create_high_profile_bet(player))
         
         # Defensive bet (yellow card)
         if selected_players.get('defensive'):
-            defensive_leg = self._create_defensive_bet([selected_players['defensive']], luck_level, baseline_odds)
-            bet_legs.append(defensive_leg)
-            total_odds *= defensive_leg['odds']
+            bet_legs.append(self._create_defensive_bet([selected_players['defensive']]))
         
         # Attacking bet
         if selected_players.get('attacking'):
-            attacking_leg = self._create_attacking_bet([selected_players['attacking']], luck_level, baseline_odds)
-            bet_legs.append(attacking_leg)
-            total_odds *= attacking_leg['odds']
+            bet_legs.append(self._create_attacking_bet([selected_players['attacking']]))
         
         # Ensure we have 4-6 legs
         while len(bet_legs) < 4 and len(selected_players.get('extra', [])) > 0:
             extra_player = selected_players['extra'].pop(0)
-            extra_leg = self._create_extra_bet(extra_player, luck_level, baseline_odds)
-            bet_legs.append(extra_leg)
-            total_odds *= extra_leg['odds']
+            bet_legs.append(self._create_extra_bet(extra_player))
         
-        return {
-            'bet_legs': bet_legs,
-            'total_odds': total_odds,
-            'team_analysis': analysis,
-            'luck_level': luck_level
-        }
+        return bet_legs
 
     def _select_players_by_luck(self, team_data: List[Dict], analysis: Dict, luck_level: int) -> Dict[str, Any]:
         """Select different players based on luck level"""
@@ -210,7 +269,7 @@ class BetGenerator:
         if luck_level > 0:
             # Sort by potential for higher odds (lower profile players, attacking positions)
             all_players.sort(key=lambda x: (
-                self._determine_player_profile(x['name'].lower(), x.get('element_type', 1)) != 'high_profile',
+                self._get_player_profile(x) != 'high_profile',
                 x.get('element_type', 1) in [3, 4],  # Midfielders and forwards first
                 x.get('total_points', 0)  # Lower points = higher odds
             ))
@@ -224,7 +283,7 @@ class BetGenerator:
         else:
             # For lower luck levels, prioritize safer players
             all_players.sort(key=lambda x: (
-                self._determine_player_profile(x['name'].lower(), x.get('element_type', 1)) == 'high_profile',
+                self._get_player_profile(x) == 'high_profile',
                 x.get('total_points', 0),  # Higher points = safer
                 x.get('element_type', 1)  # Goalkeepers and defenders first
             ))
@@ -242,7 +301,7 @@ class BetGenerator:
                 selected['captain'] = riskier_captains[0] if riskier_captains else all_players[0]
             else:
                 # For lower luck, choose from the shifted safe players
-                safe_captains = [p for p in all_players if self._determine_player_profile(p['name'].lower(), p.get('element_type', 1)) == 'high_profile']
+                safe_captains = [p for p in all_players if self._get_player_profile(p) == 'high_profile']
                 selected['captain'] = safe_captains[0] if safe_captains else all_players[0]
         
         # Select vice captain
@@ -259,7 +318,7 @@ class BetGenerator:
         # Select high profile players
         high_profile_available = [p for p in all_players 
                                 if p not in [selected.get('captain'), selected.get('vice_captain')]
-                                and self._determine_player_profile(p['name'].lower(), p.get('element_type', 1)) == 'high_profile']
+                                and self._get_player_profile(p) == 'high_profile']
         selected['high_profile'] = high_profile_available[:2]
         
         # Select defensive player
@@ -308,9 +367,8 @@ class BetGenerator:
         
         return 1.2
 
-    def _create_captain_bet(self, player: Dict, luck_level: int, baseline_odds: float) -> Dict:
+    def _create_captain_bet(self, player: Dict) -> Dict:
         """Create a bet for the captain"""
-        profile = self._determine_player_profile(player['name'].lower(), player.get('element_type', 1))
         position = player.get('element_type', 1)
         
         # Choose appropriate bet type based on position
@@ -324,20 +382,17 @@ class BetGenerator:
             bet_type = 'Goal Scorer (Captain)'
             base_odds = 1.8  # 4/5 shot
         
-        adjusted_odds = self._adjust_odds_for_luck(base_odds, luck_level, baseline_odds)
-        
         return {
             'id': f"captain_{player['id']}",
             'player': player['name'],
             'team': player.get('team_name', 'Unknown'),
             'betType': bet_type,
-            'odds': adjusted_odds,
+            'odds': base_odds,  # Luck/history adjustment applied in generate_bet_suggestions(_batch)
             'confidence': 'High'
         }
 
-    def _create_vice_captain_bet(self, player: Dict, luck_level: int, baseline_odds: float) -> Dict:
+    def _create_vice_captain_bet(self, player: Dict) -> Dict:
         """Create a bet for the vice captain"""
-        profile = self._determine_player_profile(player['name'].lower(), player.get('element_type', 1))
         position = player.get('element_type', 1)
         
         # Choose appropriate bet type based on position
@@ -351,20 +406,17 @@ class BetGenerator:
             bet_type = 'Assist (Vice Captain)'
             base_odds = 2.0  # Evens
         
-        adjusted_odds = self._adjust_odds_for_luck(base_odds, luck_level, baseline_odds)
-        
         return {
             'id': f"vc_{player['id']}",
             'player': player['name'],
             'team': player.get('team_name', 'Unknown'),
             'betType': bet_type,
-            'odds': adjusted_odds,
+            'odds': base_odds,  # Luck/history adjustment applied in generate_bet_suggestions(_batch)
             'confidence': 'Medium-High'
         }
 
-    def _create_high_profile_bet(self, player: Dict, luck_level: int, baseline_odds: float) -> Dict:
+    def _create_high_profile_bet(self, player: Dict) -> Dict:
         """Create a bet for high profile players"""
-        profile = self._determine_player_profile(player['name'].lower(), player.get('element_type', 1))
         position = player.get('element_type', 1)
         
         # Choose appropriate bet type based on position
@@ -378,54 +430,50 @@ class BetGenerator:
             bet_type = 'Goal Scorer'
             base_odds = 2.2  # 6/5 shot
         
-        adjusted_odds = self._adjust_odds_for_luck(base_odds, luck_level, baseline_odds)
-        
         return {
             'id': f"high_{player['id']}",
             'player': player['name'],
             'team': player.get('team_name', 'Unknown'),
             'betType': bet_type,
-            'odds': adjusted_odds,
+            'odds': base_odds,  # Luck/history adjustment applied in generate_bet_suggestions(_batch)
             'confidence': 'Medium'
         }
 
-    def _create_defensive_bet(self, defenders: List[Dict], luck_level: int, baseline_odds: float) -> Dict:
+    def _create_defensive_bet(self, defenders: List[Dict]) -> Dict:
         """Create a defensive bet (yellow card)"""
         # Use the highest profile defender
-        best_defender = max(defenders, key=lambda x: self._determine_player_profile(x['name'].lower(), x.get('element_type', 1)) == 'high_profile')
+        best_defender = max(defenders, key=lambda x: self._get_player_profile(x) == 'high_profile')
         
         base_odds = self.bet_types['yellow_card']['base_odds']
-        adjusted_odds = self._adjust_odds_for_luck(base_odds, luck_level, baseline_odds)
         
         return {
             'id': f"def_{best_defender['id']}",
             'player': best_defender['name'],
             'team': best_defender.get('team_name', 'Unknown'),
             'betType': 'Yellow Card',
-            'odds': adjusted_odds,
+            'odds': base_odds,  # Luck/history adjustment applied in generate_bet_suggestions(_batch)
             'confidence': 'Medium'
         }
 
-    def _create_attacking_bet(self, attackers: List[Dict], luck_level: int, baseline_odds: float) -> Dict:
+    def _create_attacking_bet(self, attackers: List[Dict]) -> Dict:
         """Create an attacking bet"""
         # Use the highest profile attacker
-        best_attacker = max(attackers, key=lambda x: self._determine_player_profile(x['name'].lower(), x.get('element_type', 1)) == 'high_profile')
+        best_attacker = max(attackers, key=lambda x: self._get_player_profile(x) == 'high_profile')
         
         base_odds = self.bet_types['assist']['base_odds']
-        adjusted_odds = self._adjust_odds_for_luck(base_odds, luck_level, baseline_odds)
         
         return {
             'id': f"att_{best_attacker['id']}",
             'player': best_attacker['name'],
             'team': best_attacker.get('team_name', 'Unknown'),
             'betType': 'Assist',
-            'odds': adjusted_odds,
+            'odds': base_odds,  # Luck/history adjustment applied in generate_bet_suggestions(_batch)
             'confidence': 'Medium'
         }
 
-    def _create_extra_bet(self, player: Dict, luck_level: int, baseline_odds: float) -> Dict:
+    def _create_extra_bet(self, player: Dict) -> Dict:
         """Create an extra bet for remaining players"""
-        profile = self._determine_player_profile(player['name'].lower(), player.get('element_type', 1))
+        profile = self._get_player_profile(player)
         position = player.get('element_type', 1)
         
         # Choose bet type based on position and profile
@@ -450,14 +498,12 @@ class BetGenerator:
                 bet_type = 'Shots on Target'
                 base_odds = 1.8  # 4/5 shot
         
-        adjusted_odds = self._adjust_odds_for_luck(base_odds, luck_level, baseline_odds)
-        
         return {
             'id': f"extra_{player['id']}",
             'player': player['name'],
             'team': player.get('team_name', 'Unknown'),
             'betType': bet_type,
-            'odds': adjusted_odds,
+            'odds': base_odds,  # Luck/history adjustment applied in generate_bet_suggestions(_batch)
             'confidence': 'Low-Medium'
         }
 
@@ -486,24 +532,33 @@ class BetGenerator:
         
         return max(min_odds, min(max_odds, adjusted_odds))
 
+    def _adjust_odds_for_luck_array(self, base_odds: np.ndarray, luck_levels: np.ndarray, baseline_odds: np.ndarray) -> np.ndarray:
+        """Vectorised _adjust_odds_for_luck over arrays of legs"""
+        # +20% per level when feeling lucky, -15% per level when not, base odds when neutral
+        luck_factor = np.where(luck_levels > 0, 1 + (luck_levels * 0.2), np.where(luck_levels < 0, 1 + (luck_levels * 0.15), 1.0))
+        adjusted_odds = base_odds * luck_factor
+        
+        # Apply user history baseline adjustment
+        adjusted_odds = adjusted_odds * (baseline_odds / 1.2)
+        
+        # Clamp to reasonable range
+        max_odds = np.where(luck_levels > 0, 8.0, 5.0)
+        return np.maximum(1.1, np.minimum(max_odds, adjusted_odds))
+
     def get_user_history(self, player_id: str) -> List[Dict]:
         """Get betting history for a specific user (for debugging)"""
-        return self.user_betting_history.get(player_id, [])
+        return self.history_store.get(player_id)
     
     def reload_history(self):
-        """Reload user history from file (for debugging)"""
-        self.user_betting_history = self._load_user_history()
-        logger.info(f"Reloaded user history: {len(self.user_betting_history)} users")
+        """Reload user history from storage (only needed for per-process stores)"""
+        self.history_store.load()
+        logger.info(f"Reloaded user history: {self.history_store.user_count()} users")
 
     def record_bet(self, player_id: str, bet_data: Dict):
         """Record a bet in user history for learning"""
         logger.info(f"Recording bet for player {player_id}")
         logger.info(f"Bet data: {bet_data}")
         
-        if player_id not in self.user_betting_history:
-            self.user_betting_history[player_id] = []
-            logger.info(f"Created new history for player {player_id}")
-        
         bet_record = {
             'timestamp': datetime.now().isoformat(),
             'total_odds': bet_data.get('total_odds', 1.0),
@@ -514,18 +569,9 @@ class BetGenerator:
             'bet_id': bet_data.get('bet_id', 'unknown')
         }
         
-        self.user_betting_history[player_id].append(bet_record)
-        logger.info(f"Added bet record: {bet_record}")
-        
-        # Keep only last 50 bets per user
-        if len(self.user_betting_history[player_id]) > 50:
-            self.user_betting_history[player_id] = self.user_betting_history[player_id][-50:]
-            logger.info(f"Trimmed history for player {player_id} to 50 bets")
-        
-        # Save immediately after recording
-        self._save_user_history()
+        # Append to the history store (keeps only the last 50 bets per user)
+        self.history_store.append(player_id, bet_record)
         logger.info(f"Recorded bet for player {player_id}: {bet_record}")
-        logger.info(f"Total bets for player {player_id}: {len(self.user_betting_history[player_id])}")
 
 # Global instance
 bet_generator = BetGenerator() 
\ No newline at end of file
@@ -0,0 +1,95 @@
+# api/news_scheduler.py
+import asyncio
+import logging
+import time
+from django.conf import settings
+from .article_store import article_store
+from .bootstrap_cache import bootstrap_cache
+from .league_news import collect_league_news
+from .league_snapshot import league_snapshot_cache
+from .services import get_current_event
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'last_precomputed_event'
+
+class NewsPrecomputeScheduler:
+    """
+    Background worker that pre-generates league news once a gameweek ends.
+    It polls bootstrap-static and, whenever the current event's
+    finished/data_checked flags change, renders every known manager's
+    articles into the article store so the news view serves them directly.
+    """
+
+    def __init__(self, store=article_store):
+        config = getattr(settings, 'FPL_NEWS_PRECOMPUTE', {})
+        self.store = store
+        self.poll_interval = config.get('POLL_INTERVAL', 300)
+        self.concurrency = config.get('CONCURRENCY', 4)
+        self.manager_max_age = config.get('MANAGER_MAX_AGE_DAYS', 30) * 86400
+        self.keep_gameweeks = config.get('KEEP_GAMEWEEKS', 2)
+
+    @staticmethod
+    def event_marker(event):
+        return f"{event['id']}:{bool(event.get('finished'))}:{bool(event.get('data_checked'))}"
+
+    async def check_once(self, force=False):
+        """Precompute if the current event's flags moved since the last run; returns stats or None"""
+        # Revalidate bootstrap-static (cheap with the cached ETag) so flag flips are seen promptly
+        bootstrap_cache.expire()
+        event = await get_current_event()
+        if not event or not event.get('finished'):
+            return None
+
+        marker = self.event_marker(event)
+        if not force and self.store.get_state(STATE_KEY) == marker:
+            return None
+
+        logger.info(f"Gameweek {event['id']} flags now {marker}, precomputing league news")
+        stats = await self.precompute(event['id'])
+        self.store.set_state(STATE_KEY, marker)
+        self.store.prune(event['id'] - self.keep_gameweeks + 1)
+        return stats
+
+    async def precompute(self, gameweek):
+        """Render and store league news for every recently seen manager"""
+        # Standings moved when the event finished, don't reuse live snapshots
+        league_snapshot_cache.clear()
+        managers = self.store.managers(seen_since=time.time() - self.manager_max_age)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {'gameweek': gameweek, 'managers': len(managers), 'stored': 0, 'partial': 0, 'failed': 0}
+
+        async def precompute_manager(manager):
+            async with semaphore:
+                try:
+                    error, result = await collect_league_news(manager['player_id'], manager['team_name'], manager['manager_name'])
+                except Exception as e:
+                    logger.error(f"Error precomputing league news for {manager['player_id']}: {e}")
+                    error, result = (500, str(e)), None
+            if error or result['gameweek'] != gameweek:
+                stats['failed'] += 1
+                return
+            if result['league_errors']:
+                # Leave it to the live path so failed leagues are retried
+                stats['partial'] += 1
+                return
+            self.store.put_articles(
+                manager['player_id'], gameweek, manager['team_name'], manager['manager_name'],
+                {'articles': result['articles'], 'league_errors': []},
+                result['etag']
+            )
+            stats['stored'] += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(precompute_manager(manager) for manager in managers))
+        stats['seconds'] = round(time.monotonic() - started, 2)
+        logger.info(f"Precomputed league news for gameweek {gameweek}: {stats}")
+        return stats
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.check_once()
+            except Exception as e:
+                logger.error(f"League news precompute check failed: {e}")
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,230 @@
+# api/news_templates.py
+import hashlib
+import json
+import random
+import string
+import zlib
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional
+
+# Headline templates per article type
+HEADLINE_TEMPLATES = {
+    'captain_masterstroke': [
+        "{team_name} Take Top Spot in {league_name} After {captain_name} Captaincy Masterstroke",
+        "{manager_name}'s {captain_name} Gamble Pays Off as {team_name} Climb {league_name}",
+        "Captain {captain_name} Delivers as {team_name} Claim {league_name} Lead",
+        "{team_name} Soar to Top of {league_name} After {captain_name} Captain Brilliance",
+        "{manager_name} Celebrates {captain_name} Masterclass as {team_name} Lead {league_name}"
+    ],
+    'big_rise': [
+        "{team_name} Rocket Up {league_name} After {player_name} Heroics",
+        "{manager_name} Celebrates as {team_name} Soar Up {league_name} Standings",
+        "Massive Gameweek for {team_name} as They Climb {league_name} Table",
+        "{team_name} Make Big Move in {league_name} After {player_name} Stellar Performance",
+        "{manager_name}'s {team_name} Climb {league_name} Rankings After {player_name} Magic"
+    ],
+    'dramatic_fall': [
+        "{team_name} Slip Down {league_name} After Disastrous Gameweek",
+        "{manager_name} Left Reeling as {team_name} Drop Places in {league_name}",
+        "Tough Week for {team_name} as {league_name} Position Slides",
+        "{team_name} Struggle in {league_name} as {manager_name} Faces League Drop",
+        "Disappointing Gameweek Sees {team_name} Fall Down {league_name} Table"
+    ],
+    'consistent_performance': [
+        "{team_name} Maintain Strong Position in {league_name}",
+        "{manager_name}'s {team_name} Hold Steady in {league_name} Race",
+        "Solid Gameweek Keeps {team_name} in {league_name} Contention",
+        "{team_name} Stay Consistent in {league_name} Battle",
+        "{manager_name} Keeps {team_name} Competitive in {league_name}"
+    ]
+}
+
+# Opening paragraph templates per article type
+OPENING_TEMPLATES = {
+    'captain_masterstroke': [
+        "In a masterstroke of tactical genius, {manager_name} made the bold decision to captain {captain_name} this gameweek, and boy did it pay off! {team_name} now sit proudly at the top of {league_name} after {captain_name} delivered a stunning {captain_points} points, proving that sometimes the biggest risks yield the biggest rewards. The fantasy football world is buzzing with this inspired choice, as {manager_name} has shown the tactical nous that separates the great managers from the good ones.",
+
+        "The fantasy football world is buzzing after {manager_name}'s inspired captaincy choice. By selecting {captain_name} as captain, {team_name} have rocketed to the summit of {league_name}. {captain_name}'s incredible {captain_points} points this gameweek shows why they're considered one of the game's elite performers. This wasn't just luck - it was a calculated risk that paid dividends, showcasing {manager_name}'s deep understanding of the game and their players' form.",
+
+        "What a week for {team_name}! {manager_name}'s decision to captain {captain_name} has been vindicated in spectacular fashion. With {captain_name} racking up an impressive {captain_points} points, {team_name} now lead {league_name} and have sent a clear message to their rivals. The timing couldn't have been better, as this masterclass in captaincy selection has propelled {team_name} to the top of the table. {manager_name} must be feeling like a tactical genius right now.",
+
+        "Sometimes in fantasy football, you need to trust your instincts, and {manager_name} did exactly that. The decision to captain {captain_name} was met with some skepticism, but the results speak for themselves. {captain_name}'s {captain_points} points have catapulted {team_name} to the summit of {league_name}, proving that bold moves often lead to the biggest rewards. This is what separates the champions from the also-rans.",
+
+        "The art of captaincy selection is one of the most crucial skills in fantasy football, and {manager_name} has mastered it to perfection. By choosing {captain_name} as captain, {team_name} have soared to the top of {league_name} with {captain_name} delivering a magnificent {captain_points} points. This wasn't just a good choice - it was a game-changing decision that has reshaped the entire league table."
+    ],
+    'big_rise': [
+        "What a turnaround for {team_name}! {manager_name} must be absolutely delighted as their team has climbed {position_change} places in {league_name} this gameweek. The standout performance came from {player_name}, who delivered {player_points} points and proved to be the catalyst for this remarkable rise up the table. This kind of momentum shift doesn't happen by accident - it's the result of careful planning, astute transfers, and perfect timing.",
+
+        "Fantasy football is all about momentum, and {team_name} have it in spades! {manager_name} has guided their team up {position_change} places in {league_name}, with {player_name} leading the charge with an outstanding {player_points} points. This could be the start of something special for {team_name}, as they've shown they have the quality to compete with the best teams in the league. The rest of the competition will be looking over their shoulders now.",
+
+        "The {league_name} table has been shaken up by {team_name}'s incredible gameweek! {manager_name} has seen their team jump {position_change} places, thanks in large part to {player_name}'s magnificent {player_points} points. This kind of performance doesn't come around often, and {team_name} have made the most of it. The league is now wide open, and {team_name} have thrown their hat into the ring as serious contenders.",
+
+        "Sometimes a single gameweek can change everything, and that's exactly what happened for {team_name}. {manager_name} has orchestrated a remarkable {position_change}-place climb in {league_name}, with {player_name} delivering a performance for the ages with {player_points} points. This is the kind of week that managers dream about - when everything clicks and your team delivers beyond expectations.",
+
+        "The {league_name} has a new force to be reckoned with! {team_name} have stormed up the table with a {position_change}-place climb, and {manager_name} is the architect of this remarkable transformation. {player_name} was the star of the show with {player_points} points, but this was a team effort that showcased the depth and quality of {team_name}'s squad. The league title race just got a lot more interesting."
+    ],
+    'dramatic_fall': [
+        "It's been a week to forget for {team_name} as they've slipped {position_change_abs} places down the {league_name} table. {manager_name} will be hoping this is just a temporary blip, but with their team struggling to find form, they'll need to regroup quickly if they want to climb back up the standings. Every manager knows that fantasy football is a rollercoaster, and this is just one of those dips that every team experiences.",
+
+        "The wheels have come off for {team_name} this gameweek as they've dropped {position_change_abs} places in {league_name}. {manager_name} will be scratching their head wondering what went wrong, but in fantasy football, fortunes can change quickly. This is the harsh reality of the game - one bad week can undo weeks of good work. Time to bounce back stronger!",
+
+        "A disappointing gameweek for {team_name} sees them fall {position_change_abs} places in {league_name}. {manager_name} will be looking for answers after this setback, but every manager knows that fantasy football is a marathon, not a sprint. The key now is to learn from this experience and come back stronger. There's still plenty of time to turn things around.",
+
+        "Sometimes the fantasy football gods are cruel, and this week they've been particularly unkind to {team_name}. A {position_change_abs}-place drop in {league_name} is hard to swallow, but {manager_name} knows that this is part of the game. The best managers are those who can weather the storm and come back fighting. This is just a temporary setback in what promises to be an exciting season.",
+
+        "The {league_name} table can be unforgiving, and {team_name} have learned that lesson the hard way this gameweek. A {position_change_abs}-place fall is a bitter pill to swallow, but {manager_name} will be using this as motivation to improve. Every champion has faced adversity, and how you respond to it defines your character. {team_name} will be back stronger."
+    ],
+    'consistent_performance': [
+        "Steady as she goes for {team_name}! {manager_name} has maintained their team's position in {league_name} with another solid gameweek. While they might not have made headlines, consistency is key in fantasy football, and {team_name} are showing they have what it takes to stay competitive. This kind of steady performance often goes unnoticed, but it's the foundation of any successful fantasy campaign.",
+
+        "No fireworks this week for {team_name}, but {manager_name} will be pleased with another steady performance that keeps them in the mix in {league_name}. Sometimes the best strategy is to avoid the big mistakes, and {team_name} are doing exactly that. This consistency will serve them well as the season progresses, and they'll be ready to pounce when opportunities arise.",
+
+        "Another week, another solid performance from {team_name}. {manager_name} has their team positioned well in {league_name}, and while they might not be grabbing the headlines, they're quietly going about their business and staying in contention. This is the mark of a well-managed team - consistent, reliable, and always in the mix.",
+
+        "The {league_name} table shows {team_name} holding their ground, and {manager_name} will be satisfied with another week of steady progress. While other teams are making dramatic moves up and down the table, {team_name} are maintaining their position with the kind of consistency that wins championships. Sometimes the best move is no move at all.",
+
+        "Consistency is the name of the game for {team_name}, and {manager_name} has their team performing exactly as they need to in {league_name}. While they haven't made any dramatic moves this gameweek, they've maintained their position and stayed competitive. This kind of steady performance builds confidence and sets the foundation for future success.",
+
+        "In a league full of ups and downs, {team_name} are providing the stability that {manager_name} craves. Another week of consistent performance in {league_name} shows that this team has the right formula. While others chase the big scores, {team_name} are building a platform for sustained success. This is smart fantasy football management.",
+
+        "The {league_name} table reflects the steady progress that {team_name} have made under {manager_name}'s guidance. While they haven't set the world alight this gameweek, they've done exactly what was needed to maintain their position. This kind of reliability is invaluable in fantasy football, and {team_name} are proving they have what it takes to compete at the highest level."
+    ]
+}
+
+# Body paragraphs after the opening, keyed by the branch that selects them.
+# Single-entry groups are selected the same way, so variants can be added freely.
+PARAGRAPH_TEMPLATES = {
+    'captain_high': [
+        "The tactical masterclass continued with {manager_name}'s inspired captaincy choice. {captain_name} delivered {captain_points} points (doubled from {captain_base_points} base points), proving once again that great managers trust their instincts when it matters most."
+    ],
+    'captain_mid': [
+        "Captaincy decisions can make or break a gameweek, and {manager_name} got it right this time. {captain_name} rewarded the faith shown in them with {captain_points} points (doubled from {captain_base_points} base points), contributing significantly to the team's overall performance."
+    ],
+    'captain_low': [
+        "Sometimes the captaincy choice doesn't quite work out, and that was the case for {manager_name} this gameweek. {captain_name} could only manage {captain_points} points (doubled from {captain_base_points} base points), but every manager knows these weeks are part of the fantasy football journey."
+    ],
+    'transfer_single': [
+        "The transfer market proved fruitful for {manager_name}, with {transfer_name} delivering {transfer_points} points and justifying the manager's faith in their scouting abilities."
+    ],
+    'transfer_multiple': [
+        "Bold transfer moves paid off handsomely for {team_name}, with the new signings combining for {transfer_points} points. {transfer_names} showed exactly why {manager_name} brought them to the club."
+    ],
+    'transfer_unscored': [
+        "Transfer activity saw {manager_name} make {transfers_made} moves, spending {transfer_cost}m in the process. Time will tell if these acquisitions prove to be shrewd investments."
+    ],
+    'transfer_none': [
+        "Sometimes the best transfer is no transfer at all, and {manager_name} showed faith in their current squad by keeping their powder dry this gameweek."
+    ],
+    'chips_used': [
+        "Strategic chip usage came into play for {team_name}, with {manager_name} deploying {chips_used} to maximize their gameweek potential. These calculated risks often separate the contenders from the pretenders."
+    ],
+    'chips_none': [
+        "No chips were played this gameweek, suggesting {manager_name} is saving their ammunition for the crucial weeks ahead when strategic advantages can make all the difference."
+    ],
+    'performance_high': [
+        "What a week for {team_name}! The squad delivered a magnificent {total_points} points, with {top_scorer} leading the charge with {top_scorer_points} points. This kind of collective performance is what championship dreams are made of."
+    ],
+    'performance_mid': [
+        "A solid {total_points} points shows the consistency that {team_name} are building under {manager_name}'s guidance. {top_scorer} was the standout performer with {top_scorer_points} points, but this was truly a team effort."
+    ],
+    'performance_low': [
+        "While {total_points} points might not set the world alight, it's the kind of steady performance that keeps teams competitive. {top_scorer} led by example with {top_scorer_points} points, showing the depth of quality in this squad."
+    ],
+    'league_competition': [
+        "The {league_title} continues to provide fierce competition, with several managers making their mark this gameweek. {competitor_text} This level of competition keeps everyone on their toes and makes every gameweek crucial in the title race."
+    ],
+    'league_table': [
+        "\n[LEAGUE_TABLE_PLACEHOLDER]\n"
+    ],
+    'position_change': [
+        "Position Change: {arrow} {position_change_abs} places {direction} this gameweek."
+    ],
+    'outlook_high': [
+        "With this kind of form, {team_name} are well-positioned to challenge for the {league_title} title. The coming gameweeks will be crucial as teams look to consolidate their positions and make their moves up the table."
+    ],
+    'outlook_mid': [
+        "The consistency shown by {team_name} suggests they'll be a force to be reckoned with in the coming weeks. The foundation is there for a strong finish to the season."
+    ],
+    'outlook_low': [
+        "There's room for improvement for {team_name}, but the foundation is there for a strong finish to the season. The coming gameweeks will be crucial as teams look to consolidate their positions and make their moves up the table."
+    ]
+}
+
+def compile_template(template: str) -> Callable[[Dict], str]:
+    """
+    Turn a str.format template into a render callable.
+    Plain {field} templates are parsed once into a %-format string and an
+    itemgetter, so rendering is a single C-level % with no format parsing.
+    Templates with conversions, format specs or attribute/index fields
+    fall back to str.format_map.
+    """
+    pattern = []
+    fields = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if field is not None and (not field.isidentifier() or format_spec or conversion):
+            return template.format_map
+        pattern.append(literal.replace('%', '%%'))
+        if field is not None:
+            pattern.append('%s')
+            fields.append(field)
+    pattern = ''.join(pattern)
+
+    if not fields:
+        text = pattern % ()
+        return lambda values: text
+    if len(fields) == 1:
+        # A lone value is wrapped, so a tuple value isn't taken as the argument list
+        field = fields[0]
+        return lambda values: pattern % (values[field],)
+    getter = itemgetter(*fields)
+    return lambda values: pattern % getter(values)
+
+class TemplateEngine:
+    """
+    Compiled template groups with optional seeded selection.
+    With a seed, the variant picked for each group is a stable hash of
+    (seed, group), so the same seed always renders the same article.
+    Without one, variants are picked at random as before.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]], compile_templates: bool = True):
+        self.sources = groups
+        # Uncompiled engines render with str.format_map, for comparison benchmarks
+        build = compile_template if compile_templates else (lambda t: t.format_map)
+        self.compiled = {name: [build(t) for t in templates] for name, templates in groups.items()}
+
+    def choose(self, group: str, seed: Optional[str] = None) -> int:
+        count = len(self.compiled[group])
+        if seed is None:
+            return int(random.random() * count)
+        return zlib.crc32(f"{seed}:{group}".encode()) % count
+
+    def render(self, group: str, context: Dict, seed: Optional[str] = None) -> str:
+        variants = self.compiled[group]
+        return variants[self.choose(group, seed)](context)
+
+    def render_many(self, groups: List[str], context: Dict, seed: Optional[str] = None) -> List[str]:
+        """Render several groups against one context, e.g. every paragraph of an article"""
+        rendered = []
+        for group in groups:
+            variants = self.compiled[group]
+            if len(variants) == 1:
+                rendered.append(variants[0](context))
+            else:
+                rendered.append(variants[self.choose(group, seed)](context))
+        return rendered
+
+def _prefixed(prefix: str, groups: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {f"{prefix}.{name}": templates for name, templates in groups.items()}
+
+ALL_TEMPLATES = {
+    **_prefixed('headline', HEADLINE_TEMPLATES),
+    **_prefixed('opening', OPENING_TEMPLATES),
+    **_prefixed('paragraph', PARAGRAPH_TEMPLATES)
+}
+
+# Changes whenever any template text changes, so cached articles are invalidated on deploy
+TEMPLATES_DIGEST = hashlib.blake2b(json.dumps(ALL_TEMPLATES, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+# Global instance, compiled once at import
+news_templates = TemplateEngine(ALL_TEMPLATES)
@@ -0,0 +1,141 @@
+# api/responses.py
+import gzip
+import json
+import logging
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+logger = logging.getLogger(__name__)
+
+# Optional faster encoders, used when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+_django_encoder = DjangoJSONEncoder()
+
+def _encode_default(value):
+    # NumPy scalars and arrays from the odds model, then whatever DjangoJSONEncoder knows (Decimal, lazy strings, ...)
+    if hasattr(value, 'tolist') and hasattr(value, 'dtype'):
+        return value.tolist()
+    return _django_encoder.default(value)
+
+def encode_json(payload) -> bytes:
+    if orjson is not None:
+        # Articles key position changes by entry id, which orjson only accepts with OPT_NON_STR_KEYS
+        return orjson.dumps(payload, default=_encode_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_encode_default).encode()
+
+def decode_json(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def encode_msgpack(payload) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
+
+def negotiate_content_type(request) -> str:
+    """
+    JSON unless the client explicitly prefers MessagePack and msgpack is
+    installed; a bare */* (browsers, curl) always gets JSON
+    """
+    if msgpack is None:
+        return JSON_CONTENT_TYPE
+    preferred = request.get_preferred_type([JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE, 'application/x-msgpack'])
+    if preferred in (MSGPACK_CONTENT_TYPE, 'application/x-msgpack'):
+        return MSGPACK_CONTENT_TYPE
+    return JSON_CONTENT_TYPE
+
+def encoded_response(request, payload, status=200, content_type=None) -> HttpResponse:
+    """Serialise payload in the negotiated format"""
+    content_type = content_type or negotiate_content_type(request)
+    if content_type == MSGPACK_CONTENT_TYPE:
+        body = encode_msgpack(payload)
+    else:
+        body = encode_json(payload)
+    response = HttpResponse(body, status=status, content_type=content_type)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+class JsonResponse(HttpResponse):
+    """Drop-in for django.http.JsonResponse that serialises with encode_json"""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault('content_type', JSON_CONTENT_TYPE)
+        super().__init__(content=encode_json(data), **kwargs)
+
+# Response bodies worth compressing, and the encodings the client accepts
+COMPRESSIBLE_CONTENT_TYPES = (JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE, 'application/x-ndjson')
+_accept_encoding_re = _lazy_re_compile(r"\b(br|gzip)\b(?:\s*;\s*q\s*=\s*([0-9.]+))?")
+
+def negotiate_encoding(request):
+    """'br' or 'gzip' if the client accepts it (brotli preferred when installed), else None"""
+    accepted = {}
+    for name, quality in _accept_encoding_re.findall(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        try:
+            accepted[name] = float(quality) if quality else 1.0
+        except ValueError:
+            continue
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    config = getattr(settings, 'FPL_RESPONSE_COMPRESSION', {})
+    if encoding == 'br':
+        return brotli.compress(body, quality=config.get('BROTLI_QUALITY', 5))
+    # mtime=0 keeps the output byte-identical for identical bodies
+    return gzip.compress(body, compresslevel=config.get('GZIP_LEVEL', 4), mtime=0)
+
+def compress_response(request, response):
+    """
+    Compress a buffered API response in place when it's large enough and the
+    client accepts br/gzip. Streaming responses are left alone so NDJSON
+    frames still reach the client as they are produced.
+    """
+    config = getattr(settings, 'FPL_RESPONSE_COMPRESSION', {})
+    if not config.get('ENABLED', True) or response.streaming or response.has_header('Content-Encoding'):
+        return response
+    if response.get('Content-Type', '').split(';')[0].strip() not in COMPRESSIBLE_CONTENT_TYPES:
+        return response
+    # Vary even when this body stays uncompressed, another client may get a compressed one
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if len(response.content) < config.get('MIN_SIZE', 1024):
+        return response
+
+    encoding = negotiate_encoding(request)
+    if encoding is None:
+        return response
+    compressed = compress_body(response.content, encoding)
+    if len(compressed) >= len(response.content):
+        return response
+
+    response.content = compressed
+    response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = encoding
+    # The compressed bytes differ from the identity representation, as GZipMiddleware does
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
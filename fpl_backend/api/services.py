@@ -1,6 +1,11 @@
 # api/services.py
-import aiohttp
+import asyncio
 import logging
+from django.conf import settings
+from .bootstrap_cache import bootstrap_cache
+from .http_client import fpl_api_url, fpl_http_client
+from .league_snapshot import LeagueSnapshot, league_snapshot_cache
+from .standings import CompactStandings
 from .typesense_service import typesense_service
 
 logger = logging.getLogger(__name__)
@@ -11,7 +16,7 @@ async def get_player_id_from_api(player_name, team_name):
     """
     try:
         # Search for the player in Typesense
-        player_id = typesense_service.search_player(player_name, team_name)
+        player_id = await typesense_service.search_player(player_name, team_name)
         
         if player_id:
             logger.info(f"Found player ID {player_id} for {player_name} in {team_name}")
@@ -24,77 +29,75 @@ async def get_player_id_from_api(player_name, team_name):
         logger.error(f"Error fetching player ID from Typesense: {e}")
         return None
 
+async def get_bootstrap_snapshot():
+    """
+    Get the cached bootstrap-static snapshot (players/teams indexed by id)
+    """
+    return await bootstrap_cache.get_snapshot()
+
 async def get_current_event():
-    url = 'https://fantasy.premierleague.com/api/bootstrap-static/'
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                # Check if the response is successful
-                if not response.ok:
-                    logger.error(f"Failed to fetch bootstrap-static data. Status: {response.status}")
-                    return None
-
-                data = await response.json()
+        snapshot = await get_bootstrap_snapshot()
+        if not snapshot:
+            logger.error("Failed to fetch bootstrap-static data.")
+            return None
 
-                # Find the current event
-                current_event = next((event for event in data['events'] if event['is_current']), None)
-                if not current_event:
-                    logger.error("No current event found in bootstrap-static response.")
-                    return None
+        # Find the current event
+        current_event = snapshot.current_event
+        if not current_event:
+            logger.error("No current event found in bootstrap-static response.")
+            return None
 
-                logger.info(f"Current event found: {current_event['id']}")
-                return current_event
+        logger.info(f"Current event found: {current_event['id']}")
+        return current_event
 
     except Exception as e:
         logger.error(f"Error fetching current event: {e}")
         return None
     
 async def get_team_data(player_id, gameweek):
-    url = f'https://fantasy.premierleague.com/api/entry/{player_id}/event/{gameweek}/picks/'
+    url = fpl_api_url(f'entry/{player_id}/event/{gameweek}/picks/')
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                # Check if response is successful
-                if response.status != 200:
-                    logger.error(f"FPL API Error: Status {response.status} for player {player_id}, GW {gameweek}")
-                    return None
-                data = await response.json()
-                logger.info(f"Fetched team data: {data}")
-                if 'picks' not in data:
-                    logger.error(f"No 'picks' in response for player {player_id}, GW {gameweek}")
-                    return None
-                
-                # Fetch additional player details from bootstrap-static
-                bootstrap_url = 'https://fantasy.premierleague.com/api/bootstrap-static/'
-                async with session.get(bootstrap_url) as bootstrap_response:
-                    if bootstrap_response.status != 200:
-                        logger.error(f"Failed to fetch bootstrap data. Status: {bootstrap_response.status}")
-                        return None
-                    
-                    bootstrap_data = await bootstrap_response.json()
-                    players = {p['id']: p for p in bootstrap_data['elements']}
-                    teams = {t['id']: t for t in bootstrap_data['teams']}
+        session = await fpl_http_client.get_session()
+        async with session.get(url) as response:
+            # Check if response is successful
+            if response.status != 200:
+                logger.error(f"FPL API Error: Status {response.status} for player {player_id}, GW {gameweek}")
+                return None
+            data = await response.json()
+            logger.info(f"Fetched team data: {data}")
+            if 'picks' not in data:
+                logger.error(f"No 'picks' in response for player {player_id}, GW {gameweek}")
+                return None
+            
+        # Player details come from the cached bootstrap-static indexes
+        snapshot = await get_bootstrap_snapshot()
+        if not snapshot:
+            logger.error("Failed to fetch bootstrap data.")
+            return None
+        players = snapshot.players
+        teams = snapshot.teams
 
-                team_data = []
-                for pick in data['picks']:
-                    player = players.get(pick['element'], {})
-                    team_data.append({
-                        'id': pick['element'],
-                        'name': player.get('web_name', 'Unknown'),
-                        'position': pick['position'],
-                        'element_type': player.get('element_type', 1),
-                        'points': player.get('event_points', 0),
-                        'is_captain': pick['is_captain'],
-                        'is_vice_captain': pick['is_vice_captain'],
-                        'multiplier': pick['multiplier'],
-                        'team_name': teams.get(player.get('team', 0), {}).get('short_name', '')
-                    })
-                
-                return {
-                    'team_data': team_data,
-                    'active_chip': data.get('active_chip'),
-                    'automatic_subs': data.get('automatic_subs', [])
-                }
+        team_data = []
+        for pick in data['picks']:
+            player = players.get(pick['element'], {})
+            team_data.append({
+                'id': pick['element'],
+                'name': player.get('web_name', 'Unknown'),
+                'position': pick['position'],
+                'element_type': player.get('element_type', 1),
+                'points': player.get('event_points', 0),
+                'is_captain': pick['is_captain'],
+                'is_vice_captain': pick['is_vice_captain'],
+                'multiplier': pick['multiplier'],
+                'team_name': teams.get(player.get('team', 0), {}).get('short_name', '')
+            })
+        
+        return {
+            'team_data': team_data,
+            'active_chip': data.get('active_chip'),
+            'automatic_subs': data.get('automatic_subs', [])
+        }
     except Exception as e:
         logger.error(f"Error in get_team_data: {e}")
         return None
@@ -103,178 +106,270 @@ async def get_player_leagues(player_id):
     """
     Fetch all leagues a player is involved in, excluding unwanted leagues
     """
-    url = f'https://fantasy.premierleague.com/api/entry/{player_id}/'
+    url = fpl_api_url(f'entry/{player_id}/')
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch player leagues. Status: {response.status}")
-                    return None
-                
-                data = await response.json()
-                # Extract league information from the response
-                all_leagues = data.get('leagues', {}).get('classic', [])
-                
-                # Filter out unwanted leagues
-                unwanted_league_names = [
-                    'second chance',
-                    'overall',
-                    'gameweek 1',
-                    'country league',
-                    'club league',
-                    'supporters league'
-                ]
+        session = await fpl_http_client.get_session()
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.error(f"Failed to fetch player leagues. Status: {response.status}")
+                return None
+            
+            data = await response.json()
+            # Extract league information from the response
+            all_leagues = data.get('leagues', {}).get('classic', [])
+            
+            # Filter out unwanted leagues
+            unwanted_league_names = [
+                'second chance',
+                'overall',
+                'gameweek 1',
+                'country league',
+                'club league',
+                'supporters league'
+            ]
+            
+            # Also filter by common league name patterns
+            unwanted_patterns = [
+                'second chance',
+                'overall',
+                'gameweek',
+                'country',
+                'club',
+                'supporters',
+                'global',
+                'worldwide'
+            ]
+            
+            # Premier League club names to filter out
+            premier_league_clubs = [
+                'arsenal', 'aston villa', 'brighton', 'burnley', 'chelsea', 'crystal palace',
+                'everton', 'fulham', 'leeds', 'leicester', 'liverpool', 'manchester city',
+                'manchester united', 'man city', 'man united', 'man utd', 'newcastle',
+                'norwich', 'sheffield', 'southampton', 'tottenham', 'tottenham hotspur',
+                'spurs', 'watford', 'west brom', 'west ham', 'wolves', 'wolverhampton'
+            ]
+            
+            # Country names to filter out
+            countries = [
+                'ireland', 'england', 'scotland', 'wales', 'northern ireland', 'spain',
+                'france', 'germany', 'italy', 'portugal', 'netherlands', 'belgium',
+                'brazil', 'argentina', 'mexico', 'usa', 'canada', 'australia', 'japan',
+                'south korea', 'china', 'india', 'nigeria', 'south africa', 'egypt',
+                'morocco', 'tunisia', 'algeria', 'ghana', 'senegal', 'ivory coast',
+                'cameroon', 'kenya', 'uganda', 'tanzania', 'ethiopia', 'sudan',
+                'libya', 'angola', 'mozambique', 'zimbabwe', 'zambia', 'botswana',
+                'namibia', 'lesotho', 'swaziland', 'madagascar', 'mauritius',
+                'seychelles', 'comoros', 'malawi', 'zambia', 'malawi', 'zimbabwe'
+            ]
+            
+            filtered_leagues = []
+            for league in all_leagues:
+                league_name = league.get('name', '').lower()
                 
-                # Also filter by common league name patterns
-                unwanted_patterns = [
-                    'second chance',
-                    'overall',
-                    'gameweek',
-                    'country',
-                    'club',
-                    'supporters',
-                    'global',
-                    'worldwide'
-                ]
+                # Skip if league name contains any unwanted patterns
+                should_exclude = False
+                for pattern in unwanted_patterns:
+                    if pattern in league_name:
+                        should_exclude = True
+                        break
                 
-                # Premier League club names to filter out
-                premier_league_clubs = [
-                    'arsenal', 'aston villa', 'brighton', 'burnley', 'chelsea', 'crystal palace',
-                    'everton', 'fulham', 'leeds', 'leicester', 'liverpool', 'manchester city',
-                    'manchester united', 'man city', 'man united', 'man utd', 'newcastle',
-                    'norwich', 'sheffield', 'southampton', 'tottenham', 'tottenham hotspur',
-                    'spurs', 'watford', 'west brom', 'west ham', 'wolves', 'wolverhampton'
-                ]
+                # Skip if it's an exact match with unwanted names
+                if league_name in unwanted_league_names:
+                    should_exclude = True
                 
-                # Country names to filter out
-                countries = [
-                    'ireland', 'england', 'scotland', 'wales', 'northern ireland', 'spain',
-                    'france', 'germany', 'italy', 'portugal', 'netherlands', 'belgium',
-                    'brazil', 'argentina', 'mexico', 'usa', 'canada', 'australia', 'japan',
-                    'south korea', 'china', 'india', 'nigeria', 'south africa', 'egypt',
-                    'morocco', 'tunisia', 'algeria', 'ghana', 'senegal', 'ivory coast',
-                    'cameroon', 'kenya', 'uganda', 'tanzania', 'ethiopia', 'sudan',
-                    'libya', 'angola', 'mozambique', 'zimbabwe', 'zambia', 'botswana',
-                    'namibia', 'lesotho', 'swaziland', 'madagascar', 'mauritius',
-                    'seychelles', 'comoros', 'malawi', 'zambia', 'malawi', 'zimbabwe'
-                ]
+                # Skip if league name contains any Premier League club names
+                for club in premier_league_clubs:
+                    if club in league_name:
+                        should_exclude = True
+                        break
                 
-                filtered_leagues = []
-                for league in all_leagues:
-                    league_name = league.get('name', '').lower()
-                    
-                    # Skip if league name contains any unwanted patterns
-                    should_exclude = False
-                    for pattern in unwanted_patterns:
-                        if pattern in league_name:
-                            should_exclude = True
-                            break
-                    
-                    # Skip if it's an exact match with unwanted names
-                    if league_name in unwanted_league_names:
+                # Skip if league name contains any country names
+                for country in countries:
+                    if country in league_name:
                         should_exclude = True
-                    
-                    # Skip if league name contains any Premier League club names
-                    for club in premier_league_clubs:
-                        if club in league_name:
-                            should_exclude = True
-                            break
-                    
-                    # Skip if league name contains any country names
-                    for country in countries:
-                        if country in league_name:
-                            should_exclude = True
-                            break
-                    
-                    if not should_exclude:
-                        filtered_leagues.append(league)
+                        break
                 
-                logger.info(f"Fetched {len(all_leagues)} total leagues, filtered to {len(filtered_leagues)} leagues for player {player_id}")
-                return filtered_leagues
+                if not should_exclude:
+                    filtered_leagues.append(league)
+            
+            logger.info(f"Fetched {len(all_leagues)} total leagues, filtered to {len(filtered_leagues)} leagues for player {player_id}")
+            return filtered_leagues
     except Exception as e:
         logger.error(f"Error fetching player leagues: {e}")
         return None
 
-async def get_league_standings(league_id, gameweek=None):
+async def _get_standings_page(session, league_id, page):
+    url = fpl_api_url(f'leagues-classic/{league_id}/standings/?page_standings={page}')
+    async with session.get(url) as response:
+        if response.status != 200:
+            logger.error(f"Failed to fetch standings page {page} for league {league_id}. Status: {response.status}")
+            return None
+        return await response.json()
+
+async def get_full_league_standings(league_id, first_page=None):
     """
-    Fetch league standings and recent results
+    Fetch every standings page of a classic league into a CompactStandings.
+    Page 1 is fetched first (unless already in hand); further pages are
+    requested in bounded concurrent windows until one reports has_next=false.
+    A table cut short by a failed page or the page cap is marked truncated.
     """
-    url = f'https://fantasy.premierleague.com/api/leagues-classic/{league_id}/standings/'
+    config = getattr(settings, 'FPL_STANDINGS', {})
+    concurrency = config.get('PAGE_CONCURRENCY', 4)
+    max_pages = config.get('MAX_PAGES', 100)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch league standings for {league_id}. Status: {response.status}")
-                    return None
-                
-                data = await response.json()
-                logger.info(f"Fetched league standings for league {league_id}")
-                return data
+        session = await fpl_http_client.get_session()
+        if first_page is None:
+            first_page = await _get_standings_page(session, league_id, 1)
+        if not first_page or not first_page.get('standings'):
+            return None
+
+        standings = CompactStandings(first_page)
+        has_next = first_page['standings'].get('has_next', False)
+        page = 2
+        while has_next:
+            if page > max_pages:
+                logger.warning(f"League {league_id} has more than {max_pages} standings pages, truncating")
+                standings.truncated = True
+                break
+            window = range(page, min(page + concurrency, max_pages + 1))
+            pages = await asyncio.gather(*(_get_standings_page(session, league_id, p) for p in window))
+            for data in pages:
+                if not data or not data.get('standings'):
+                    standings.truncated = True
+                    has_next = False
+                    break
+                standings.extend(data['standings'].get('results', []))
+                has_next = data['standings'].get('has_next', False)
+                if not has_next:
+                    # Pages past the last one come back empty, ignore them
+                    break
+            page += len(window)
+
+        standings.finalise()
+        logger.info(f"Fetched {len(standings)} standings rows for league {league_id} ({page - 1} pages)")
+        return standings
     except Exception as e:
-        logger.error(f"Error fetching league standings: {e}")
+        logger.error(f"Error fetching full league standings for {league_id}: {e}")
         return None
 
+async def _load_league_snapshot(league_id, gameweek):
+    try:
+        session = await fpl_http_client.get_session()
+        first_page = await _get_standings_page(session, league_id, 1)
+    except Exception as e:
+        logger.error(f"Error fetching league standings for {league_id}: {e}")
+        return None
+    if not first_page or not first_page.get('standings'):
+        return None
+
+    # Standings unchanged since the cached snapshot: skip the remaining pages
+    snapshot = league_snapshot_cache.touch(league_id, gameweek, first_page.get('last_updated_data'))
+    if snapshot is not None:
+        return snapshot
+
+    standings = await get_full_league_standings(league_id, first_page)
+    if standings is None:
+        return None
+    snapshot = LeagueSnapshot(league_id, gameweek, standings)
+    if not standings.truncated:
+        league_snapshot_cache.put(snapshot)
+    return snapshot
+
+# (league_id, gameweek) -> in-flight snapshot load, shared by concurrent callers
+_snapshot_loads = {}
+
+async def get_league_snapshot(league_id, gameweek=None):
+    """
+    Shared per-gameweek view of a league (standings, rank movements and
+    competitor insights). Concurrent requests for the same league share
+    one load, and snapshots are reused across every member of the league.
+    """
+    snapshot = league_snapshot_cache.get_fresh(league_id, gameweek)
+    if snapshot is not None:
+        return snapshot
+
+    key = (league_id, gameweek)
+    task = _snapshot_loads.get(key)
+    # Tasks belong to one event loop, don't share them across loops
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_load_league_snapshot(league_id, gameweek))
+        _snapshot_loads[key] = task
+
+        def _forget(done):
+            if _snapshot_loads.get(key) is done:
+                del _snapshot_loads[key]
+        task.add_done_callback(_forget)
+    # Shielded so one caller timing out doesn't cancel the load for the rest
+    return await asyncio.shield(task)
+
+async def fetch_league_standings_limited(league_id, gameweek, semaphore, timeout):
+    """
+    Fetch one league's snapshot under a shared semaphore and timeout.
+    Returns (league_id, snapshot, error) where error is None on success.
+    """
+    async with semaphore:
+        try:
+            snapshot = await asyncio.wait_for(get_league_snapshot(league_id, gameweek), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out fetching standings for league {league_id} after {timeout}s")
+            return league_id, None, 'timeout'
+    if snapshot is None:
+        return league_id, None, 'fetch_failed'
+    return league_id, snapshot, None
+
+def create_league_standings_tasks(league_ids, gameweek=None, concurrency=None, timeout=None):
+    """
+    Start bounded concurrent standings fetches for many leagues.
+    Concurrency and per-league timeout default to the FPL_LEAGUE_FETCH_* settings.
+    """
+    concurrency = concurrency or getattr(settings, 'FPL_LEAGUE_FETCH_CONCURRENCY', 5)
+    timeout = timeout or getattr(settings, 'FPL_LEAGUE_FETCH_TIMEOUT', 8)
+    semaphore = asyncio.Semaphore(concurrency)
+    return [
+        asyncio.create_task(fetch_league_standings_limited(league_id, gameweek, semaphore, timeout))
+        for league_id in league_ids
+    ]
+
 async def get_player_transfers(player_id, gameweek):
     """
     Fetch player's transfers for a specific gameweek
     """
-    url = f'https://fantasy.premierleague.com/api/entry/{player_id}/transfers/'
+    url = fpl_api_url(f'entry/{player_id}/transfers/')
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch transfers for player {player_id}. Status: {response.status}")
-                    return []
-                
-                data = await response.json()
-                # Filter transfers for the specific gameweek
-                gameweek_transfers = [transfer for transfer in data if transfer.get('event') == gameweek]
-                logger.info(f"Fetched {len(gameweek_transfers)} transfers for player {player_id} in GW{gameweek}")
-                return gameweek_transfers
+        session = await fpl_http_client.get_session()
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.error(f"Failed to fetch transfers for player {player_id}. Status: {response.status}")
+                return []
+            
+            data = await response.json()
+            # Filter transfers for the specific gameweek
+            gameweek_transfers = [transfer for transfer in data if transfer.get('event') == gameweek]
+            logger.info(f"Fetched {len(gameweek_transfers)} transfers for player {player_id} in GW{gameweek}")
+            return gameweek_transfers
     except Exception as e:
         logger.error(f"Error fetching transfers: {e}")
         return []
 
-async def get_player_captain_chips(player_id, gameweek):
+# FPL active_chip codes as shown in articles
+CHIP_NAMES = {
+    'wildcard': 'Wildcard',
+    'freehit': 'Free Hit',
+    '3xc': 'Triple Captain',
+    'triplecaptain': 'Triple Captain',
+    'bboost': 'Bench Boost',
+}
+
+def get_player_captain_chips(squad):
     """
-    Fetch player's captain and chips used for a specific gameweek
+    Player's captain and chips used for the gameweek, read from the squad
+    already built from the picks, so the picks aren't fetched a second time
     """
-    url = f'https://fantasy.premierleague.com/api/entry/{player_id}/event/{gameweek}/picks/'
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch captain/chips for player {player_id}. Status: {response.status}")
-                    return None
-
-                data = await response.json()
-                
-                # Find captain
-                captain = None
-                for pick in data.get('picks', []):
-                    if pick.get('is_captain'):
-                        captain = {
-                            'name': pick.get('element', {}).get('web_name', 'Unknown'),
-                            'points': pick.get('points', 0)
-                        }
-                        break
-                
-                # Get chips used
-                chips_used = []
-                if data.get('active_chip') == 'wildcard':
-                    chips_used.append('Wildcard')
-                elif data.get('active_chip') == 'freehit':
-                    chips_used.append('Free Hit')
-                elif data.get('active_chip') == 'triplecaptain':
-                    chips_used.append('Triple Captain')
-                elif data.get('active_chip') == 'bboost':
-                    chips_used.append('Bench Boost')
-                
-                logger.info(f"Fetched captain/chips for player {player_id} in GW{gameweek}: Captain={captain}, Chips={chips_used}")
-                return {
-                    'captain': captain,
-                    'chips_used': chips_used
-                }
-    except Exception as e:
-        logger.error(f"Error fetching captain/chips: {e}")
-        return None
\ No newline at end of file
+    captain = None
+    if squad.captain is not None:
+        captain = {'name': squad.captain.get('name', 'Unknown'), 'points': squad.captain.get('points', 0)}
+    chips_used = [CHIP_NAMES[squad.active_chip]] if squad.active_chip in CHIP_NAMES else []
+    return {
+        'captain': captain,
+        'chips_used': chips_used
+    }
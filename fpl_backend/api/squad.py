@@ -0,0 +1,145 @@
+# api/squad.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+STARTING_XI_SIZE = 11
+
+class Squad:
+    """
+    A manager's picks with captaincy applied, computed once per request.
+    `players` holds the picks with effective points; picks whose points or
+    captaincy change are copies, so the raw team data is never mutated.
+    """
+
+    __slots__ = (
+        'players', 'active_chip', 'bench_boost_active', 'total_points', 'bench_points',
+        'captain', 'vice_captain', 'top_scorer'
+    )
+
+    def __init__(self, players: List[Dict], active_chip: Optional[str], total_points: int, bench_points: int,
+                 captain: Optional[Dict], vice_captain: Optional[Dict], top_scorer: Optional[Dict]):
+        self.players = players
+        self.active_chip = active_chip
+        self.bench_boost_active = active_chip == 'bboost'
+        self.total_points = total_points
+        self.bench_points = bench_points
+        self.captain = captain
+        self.vice_captain = vice_captain
+        self.top_scorer = top_scorer
+
+def build_squad(team_data: List[Dict], active_chip: Optional[str] = None) -> Squad:
+    """
+    Apply captain/vice-captain logic and point multipliers to the picks in
+    one pass, collecting totals, captaincy and the top scorer as it goes.
+    Any pick with a multiplier of 2 or more has its points multiplied. If
+    the captain scored nothing and the vice-captain did, the vice-captain
+    is promoted afterwards with the captain's multiplier (x3 under triple
+    captain).
+    """
+    bench_boost_active = active_chip == 'bboost'
+    players = []
+    total_points = bench_points = 0
+    captain = vice_captain = top_scorer = None
+    top_points = None
+    captain_playing = False
+    captain_multiplier = 2
+    for player in team_data:
+        points = player.get('points', 0)
+        if player.get('is_captain'):
+            captain_playing = captain_playing or points > 0
+            captain_multiplier = max(captain_multiplier, player.get('multiplier', 2))
+        # If player has a captain multiplier (2, or 3 for triple captain), multiply their points
+        if player.get('multiplier', 1) >= 2:
+            points *= player['multiplier']
+            player = {**player, 'points': points}
+            if not player.get('is_captain'):
+                player['is_captain'] = True
+                player['is_vice_captain'] = False
+        players.append(player)
+
+        # Only count points from starting 11 unless bench boost is active
+        if player['position'] <= STARTING_XI_SIZE:
+            total_points += points
+        else:
+            bench_points += points
+            if bench_boost_active:
+                total_points += points
+        if captain is None and player.get('is_captain'):
+            captain = player
+        if vice_captain is None and player.get('is_vice_captain'):
+            vice_captain = player
+        if top_points is None or points > top_points:
+            top_scorer, top_points = player, points
+
+    # If captain is not playing and vice-captain is playing, make vice-captain the captain
+    if not captain_playing and vice_captain is not None and vice_captain.get('points', 0) > 0:
+        index = players.index(vice_captain)
+        promoted = players[index] = dict(vice_captain)
+        extra_points = promoted['points'] * (captain_multiplier - 1)
+        promoted.update(is_captain=True, is_vice_captain=False, multiplier=captain_multiplier, points=promoted['points'] + extra_points)
+        if promoted['position'] <= STARTING_XI_SIZE or bench_boost_active:
+            total_points += extra_points
+        if promoted['position'] > STARTING_XI_SIZE:
+            bench_points += extra_points
+        if captain is None or index < players.index(captain):
+            captain = promoted
+        vice_captain = None
+        if promoted['points'] > top_points or (promoted['points'] == top_points and index <= players.index(top_scorer)):
+            top_scorer = promoted
+        logger.info(f"Vice-captain {promoted.get('name')} promoted to captain due to captain not playing")
+
+    return Squad(players, active_chip, total_points, bench_points, captain, vice_captain, top_scorer)
+
+class SquadCache:
+    """
+    LRU cache of built squads keyed by (player_id, gameweek).
+    Entries expire quickly while the gameweek is live (points still change)
+    and live much longer once the event is finished.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'FPL_SQUAD_CACHE', {})
+        self.max_entries = config.get('MAX_ENTRIES', 5000)
+        self.live_ttl = config.get('LIVE_TTL', 60)
+        self.finished_ttl = config.get('FINISHED_TTL', 3600)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def ttl_for_event(self, current_event: Dict) -> int:
+        return self.finished_ttl if current_event.get('finished') else self.live_ttl
+
+    def get(self, player_id, gameweek) -> Optional[Squad]:
+        key = (str(player_id), gameweek)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, player_id, gameweek, squad: Squad, ttl: int):
+        key = (str(player_id), gameweek)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, squad)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Global instance
+squad_cache = SquadCache()
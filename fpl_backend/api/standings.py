@@ -0,0 +1,133 @@
+# api/standings.py
+import hashlib
+import json
+import logging
+from array import array
+from typing import Dict, List, Optional
+import numpy as np
+from .league_ranking import LeagueRankings
+
+logger = logging.getLogger(__name__)
+
+class CompactStandings:
+    """
+    Classic league standings held as typed arrays instead of a list of dicts.
+    Pages are appended as they arrive and frozen into NumPy arrays once the
+    last page is in; row dicts are only rebuilt on demand.
+    """
+
+    def __init__(self, first_page: Dict):
+        self.league = first_page.get('league', {})
+        self.last_updated_data = first_page.get('last_updated_data')
+        self.truncated = False
+        self._entry = array('q')
+        self._rank = array('i')
+        self._last_rank = array('i')
+        self._total = array('i')
+        self._event_total = array('i')
+        self.entry_name: List[str] = []
+        self.player_name: List[str] = []
+        self._rankings = None
+        self.extend(first_page['standings'].get('results', []))
+
+    def extend(self, results: List[Dict]):
+        """Append one page of standings rows"""
+        for row in results:
+            self._entry.append(row['entry'])
+            self._rank.append(row.get('rank') or 0)
+            self._last_rank.append(row.get('last_rank') or 0)
+            self._total.append(row.get('total') or 0)
+            self._event_total.append(row.get('event_total') or 0)
+            self.entry_name.append(row.get('entry_name', ''))
+            self.player_name.append(row.get('player_name', ''))
+
+    def finalise(self):
+        """Freeze the appended pages into NumPy arrays"""
+        self.entry = np.frombuffer(self._entry, dtype=np.int64).copy()
+        self.rank = np.frombuffer(self._rank, dtype=np.int32).copy()
+        self.last_rank = np.frombuffer(self._last_rank, dtype=np.int32).copy()
+        self.total = np.frombuffer(self._total, dtype=np.int32).copy()
+        self.event_total = np.frombuffer(self._event_total, dtype=np.int32).copy()
+        del self._entry, self._rank, self._last_rank, self._total, self._event_total
+        return self
+
+    def __len__(self):
+        return len(self.entry)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by this table"""
+        arrays = self.entry.nbytes + self.rank.nbytes + self.last_rank.nbytes + self.total.nbytes + self.event_total.nbytes
+        names = sum(len(name) for name in self.entry_name) + sum(len(name) for name in self.player_name)
+        return arrays + names
+
+    def digest(self) -> str:
+        """Content hash of the table, stable across processes"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps([self.league.get('id'), self.league.get('name'), self.last_updated_data], default=str).encode())
+        for column in (self.entry, self.rank, self.last_rank, self.total, self.event_total):
+            h.update(column.tobytes())
+        h.update('\x1f'.join(self.entry_name).encode())
+        h.update('\x1f'.join(self.player_name).encode())
+        return h.hexdigest()
+
+    def rankings(self) -> LeagueRankings:
+        """Rank movements for the whole table, computed once"""
+        if self._rankings is None:
+            self._rankings = LeagueRankings.from_arrays(self.entry, self.total, self.event_total)
+        return self._rankings
+
+    def row(self, i: int) -> Dict:
+        return {
+            'entry': int(self.entry[i]),
+            'entry_name': self.entry_name[i],
+            'player_name': self.player_name[i],
+            'rank': int(self.rank[i]),
+            'last_rank': int(self.last_rank[i]),
+            'total': int(self.total[i]),
+            'event_total': int(self.event_total[i])
+        }
+
+    def top_by_event_total(self, n: int) -> List[Dict]:
+        """The n best gameweek scores, ties kept in table order"""
+        order = np.argsort(-self.event_total, kind='stable')[:n]
+        return [self.row(i) for i in order.tolist()]
+
+    def window_indices(self, entry_id, top: int, radius: int) -> List[int]:
+        """Row indices for the top `top` rows plus `radius` rows either side of entry_id"""
+        indices = set(range(min(top, len(self))))
+        matches = np.flatnonzero(self.entry == entry_id)
+        if len(matches):
+            i = int(matches[0])
+            indices.update(range(max(0, i - radius), min(len(self), i + radius + 1)))
+        return sorted(indices)
+
+    def to_window_payload(self, entry_id, top: int, radius: int) -> Dict:
+        """
+        Compact standings: only the rows around the leaders and the manager,
+        each with its table position since the rows are no longer contiguous
+        """
+        rows = []
+        for i in self.window_indices(entry_id, top, radius):
+            row = self.row(i)
+            row['position'] = i + 1
+            rows.append(row)
+        return {
+            'standings': {
+                'results': rows,
+                'total_entries': len(self),
+                'window': True
+            }
+        }
+
+    def to_payload(self, start: int = 0, stop: Optional[int] = None) -> Dict:
+        """Rebuild the leagues-classic API shape for rows [start, stop)"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        return {
+            'league': self.league,
+            'last_updated_data': self.last_updated_data,
+            'standings': {
+                'has_next': False,
+                'page': 1,
+                'results': [self.row(i) for i in range(start, stop)]
+            }
+        }
@@ -1,3 +1,1121 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import gzip
+import string
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+from unittest import mock
+from asgiref.sync import async_to_sync
+import numpy as np
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from typesense import exceptions
+from .article_store import ArticleStore
+from . import bet_history
+from .bet_history import MAX_BETS_PER_USER, BetHistoryStore, InMemoryRedis, JsonlBetHistoryStore, RedisBetHistoryStore
+from .autocomplete import AutocompleteIndex
+from .bootstrap_cache import BootstrapCache, BootstrapSnapshot, bootstrap_cache
+from .fpl_simulator import FPLFixtures, FPLSimulator
+from .http_client import fpl_http_client, typesense_http_client
+from .league_ranking import LeagueRankings
+from . import services
+from .league_news import cancel_tasks, prepare_league_news
+from .league_snapshot import LeagueSnapshotCache, league_snapshot_cache
+from .manager_ingest import ManagerIngestPipeline
+from .middleware import CompressionMiddleware
+from .ml_models import BetGenerator, bet_generator
+from .news_generator import NewsGenerator
+from .news_scheduler import NewsPrecomputeScheduler
+from . import responses
+from .news_templates import ALL_TEMPLATES, compile_template
+from .squad import SquadCache, build_squad, squad_cache
+from .typesense_client import AsyncTypesenseClient
+from .typesense_local import LocalCollection, LocalTypesenseClient
+from .typesense_service import TypesenseService, player_id_cache, typesense_service
+from . import views
 
-# Create your tests here.
+BOOTSTRAP = {'events': [{'id': 1, 'is_current': True}], 'elements': [{'id': 1, 'web_name': 'Saka'}], 'teams': [{'id': 1, 'short_name': 'ARS'}]}
+
+class FakeResponse:
+    def __init__(self, status=200, payload=None, headers=None):
+        self.status = status
+        self.ok = status < 400
+        self.payload = payload
+        self.headers = headers or {}
+
+    async def json(self):
+        return self.payload
+
+class FakeSession:
+    """aiohttp-like session answering every GET with `respond()` after `delay` seconds"""
+
+    def __init__(self, respond, delay=0.01):
+        self.respond = respond
+        self.delay = delay
+        self.calls = 0
+        self.headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        session = self
+        self.headers.append(headers or {})
+
+        class Request:
+            async def __aenter__(self):
+                session.calls += 1
+                await asyncio.sleep(session.delay)
+                return session.respond()
+
+            async def __aexit__(self, *exc):
+                return False
+        return Request()
+
+def failing_response():
+    raise ConnectionError("FPL API down")
+
+class HttpClientThreadTests(SimpleTestCase):
+    """Under WSGI/runserver every async_to_sync call runs on its own loop, in its own thread"""
+
+    def test_concurrent_loops_each_get_their_own_session(self):
+        url = FPLSimulator(FPLFixtures(managers=5, leagues=1, league_size=5), latency_ms=5).start_in_thread()
+        cache = BootstrapCache()
+        start = threading.Barrier(4)
+        sessions, errors = [], []
+
+        async def requests():
+            for _ in range(10):
+                session = await fpl_http_client.get_session()
+                sessions.append(session)
+                async with session.get(f"{url}/bootstrap-static/") as response:
+                    self.assertEqual(response.status, 200)
+                    await response.read()
+                await cache.get_snapshot()
+
+        def worker():
+            start.wait()
+            try:
+                async_to_sync(requests)()
+            except Exception as e:
+                errors.append(e)
+        with override_settings(FPL_API_BASE_URL=url):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(map(id, sessions))), 4)
+        # Each session was closed on its own loop as that loop shut down
+        self.assertTrue(all(session.closed for session in sessions))
+        self.assertEqual(fpl_http_client.get_metrics()['sessions_open'], 0)
+
+    async def test_typesense_requests_use_their_own_pool(self):
+        url = urlsplit(FPLSimulator(FPLFixtures(managers=1, leagues=1, league_size=1)).start_in_thread())
+        client = AsyncTypesenseClient({'nodes': [{'protocol': url.scheme, 'host': url.hostname, 'port': url.port}], 'api_key': 'key'})
+        fpl_requests = fpl_http_client.stats['requests_total']
+        typesense_requests = typesense_http_client.stats['requests_total']
+        try:
+            with self.assertRaises(exceptions.ObjectNotFound):
+                await client.retrieve_collection('missing')
+            self.assertEqual(typesense_http_client.get_metrics()['sessions_open'], 1)
+            self.assertEqual(fpl_http_client.get_metrics()['sessions_open'], 0)
+        finally:
+            await typesense_http_client.close()
+        self.assertEqual(typesense_http_client.stats['requests_total'], typesense_requests + 1)
+        self.assertEqual(fpl_http_client.stats['requests_total'], fpl_requests)
+        self.assertIn('typesense_http_requests_total', typesense_http_client.render_prometheus_metrics())
+
+class BootstrapCacheTests(SimpleTestCase):
+    def cache_with(self, session):
+        cache = BootstrapCache()
+        cache.retry_interval = 60
+        patcher = mock.patch.object(fpl_http_client, 'get_session', mock.AsyncMock(return_value=session))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return cache
+
+    async def test_concurrent_callers_share_one_fetch(self):
+        session = FakeSession(lambda: FakeResponse(payload=BOOTSTRAP, headers={'ETag': '"v1"'}))
+        cache = self.cache_with(session)
+        snapshots = await asyncio.gather(*(cache.get_snapshot() for _ in range(20)))
+        self.assertEqual(session.calls, 1)
+        self.assertTrue(all(snapshot is snapshots[0] for snapshot in snapshots))
+        self.assertEqual(snapshots[0].players[1]['web_name'], 'Saka')
+
+    async def test_failed_refresh_serves_stale_snapshot_to_every_waiter(self):
+        session = FakeSession(failing_response)
+        cache = self.cache_with(session)
+        stale = BootstrapSnapshot(BOOTSTRAP, '"v1"')
+        stale.fetched_at = time.monotonic() - cache.ttl - 1
+        cache._snapshot = stale
+
+        snapshots = await asyncio.gather(*(cache.get_snapshot() for _ in range(20)))
+        self.assertEqual(session.calls, 1)
+        self.assertTrue(all(snapshot is stale for snapshot in snapshots))
+        self.assertEqual(cache.stats['errors'], 1)
+
+        # Still backing off: no new upstream call
+        await cache.get_snapshot()
+        self.assertEqual(session.calls, 1)
+
+        # Once the retry interval has passed the next caller tries again
+        cache._failed_at -= cache.retry_interval
+        await cache.get_snapshot()
+        self.assertEqual(session.calls, 2)
+
+    async def test_error_status_without_snapshot_is_not_retried_by_waiters(self):
+        session = FakeSession(lambda: FakeResponse(status=503))
+        cache = self.cache_with(session)
+        snapshots = await asyncio.gather(*(cache.get_snapshot() for _ in range(10)))
+        self.assertEqual(snapshots, [None] * 10)
+        self.assertEqual(session.calls, 1)
+
+    async def test_scheduler_poll_revalidates_with_cached_etag(self):
+        session = FakeSession(lambda: FakeResponse(status=304))
+        self.cache_with(session)
+        self.addCleanup(bootstrap_cache.invalidate)
+        cached = BootstrapSnapshot(BOOTSTRAP, '"v1"')
+        bootstrap_cache._snapshot = cached
+
+        self.assertIsNone(await NewsPrecomputeScheduler(store=mock.Mock()).check_once())
+        self.assertEqual(session.headers, [{'If-None-Match': '"v1"'}])
+        self.assertIs(await bootstrap_cache.get_snapshot(), cached)
+        self.assertEqual(session.calls, 1)
+
+class RedisBetHistoryStoreTests(SimpleTestCase):
+    def test_each_file_backend_defaults_to_its_own_file(self):
+        for backend, store_class, suffix in (('jsonl', 'JsonlBetHistoryStore', '.jsonl'), ('sqlite', 'SqliteBetHistoryStore', '.sqlite3')):
+            with override_settings(BET_HISTORY_STORE={'BACKEND': backend, 'PATH': None}), \
+                    mock.patch.object(bet_history, store_class) as store:
+                store.return_value.is_empty.return_value = False
+                bet_history.create_bet_history_store()
+            self.assertTrue(store.call_args.args[0].endswith(f"user_betting_history{suffix}"))
+
+    def test_round_trip_keeps_order_and_indexes_users(self):
+        store = RedisBetHistoryStore(InMemoryRedis())
+        store.append(7, {'bet_id': 'a', 'luck_level': 1})
+        store.append('7', {'bet_id': 'b', 'luck_level': 2})
+        store.append(8, {'bet_id': 'c'})
+        self.assertEqual([bet['bet_id'] for bet in store.get(7)], ['a', 'b'])
+        self.assertEqual(store.user_count(), 2)
+        self.assertEqual(store.get(9), [])
+
+    def test_history_is_trimmed_to_the_most_recent_bets(self):
+        store = RedisBetHistoryStore(InMemoryRedis())
+        for i in range(MAX_BETS_PER_USER + 15):
+            store.append(1, {'bet_id': i})
+        bets = store.get(1)
+        self.assertEqual(len(bets), MAX_BETS_PER_USER)
+        self.assertEqual(bets[0]['bet_id'], 15)
+        self.assertEqual(bets[-1]['bet_id'], MAX_BETS_PER_USER + 14)
+
+    def test_concurrent_appends_stay_trimmed_and_indexed(self):
+        store = RedisBetHistoryStore(InMemoryRedis())
+
+        def place(player_id):
+            for i in range(40):
+                store.append(player_id, {'bet_id': i})
+        threads = [threading.Thread(target=place, args=(player_id % 4,)) for player_id in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(store.user_count(), 4)
+        self.assertTrue(all(len(store.get(player_id)) == MAX_BETS_PER_USER for player_id in range(4)))
+
+    def test_incomplete_backend_fails_on_construction(self):
+        class NoUserCount(BetHistoryStore):
+            def append(self, player_id, bet):
+                pass
+
+            def get(self, player_id):
+                return []
+        with self.assertRaises(TypeError):
+            NoUserCount()
+
+    def test_append_runs_as_one_multi_exec_transaction(self):
+        client = InMemoryRedis()
+        store = RedisBetHistoryStore(client)
+        store.append(3, {'bet_id': 'a'})
+        seen = {}
+        real_pipeline = client.pipeline
+
+        def pipeline(transaction=True):
+            pipe = real_pipeline(transaction)
+            execute = pipe.execute
+
+            def checked_execute():
+                # Nothing reaches the client until EXEC
+                seen['before_exec'] = client.lrange('fpl:bets:3', 0, -1)
+                seen['queued'] = [command.__name__ for command, _ in pipe._commands]
+                return execute()
+            pipe.execute = checked_execute
+            seen['transaction'] = transaction
+            return pipe
+        with mock.patch.object(client, 'pipeline', pipeline):
+            store.append(3, {'bet_id': 'b'})
+        self.assertTrue(seen['transaction'])
+        self.assertEqual(seen['queued'], ['rpush', 'ltrim', 'sadd'])
+        self.assertEqual(len(seen['before_exec']), 1)
+        self.assertEqual([bet['bet_id'] for bet in store.get(3)], ['a', 'b'])
+        self.assertEqual(client.scard('fpl:bets:users'), 1)
+
+    def test_pipeline_runs_queued_commands_in_order(self):
+        client = InMemoryRedis()
+        pipe = client.pipeline(transaction=True)
+        pipe.rpush('k', 'a', 'b', 'c')
+        pipe.ltrim('k', -2, -1)
+        pipe.sadd('users', '1')
+        self.assertEqual(client.lrange('k', 0, -1), [])
+        self.assertEqual(pipe.execute(), [3, True, 1])
+        self.assertEqual(client.lrange('k', 0, -1), [b'b', b'c'])
+
+def team_data(seed):
+    return [
+        {'id': seed * 100 + i, 'name': f"Player {i}", 'position': i + 1, 'element_type': 1 + i % 4, 'points': (seed + i) % 7,
+         'is_captain': i == 3, 'is_vice_captain': i == 4, 'multiplier': 2 if i == 3 else (1 if i < 11 else 0), 'team_name': 'ARS'}
+        for i in range(15)
+    ]
+
+def picks(points, captain=0, vice_captain=1, captain_multiplier=2):
+    """15 picks scoring `points` in position order, 12-15 on the bench"""
+    return [
+        {'id': i + 1, 'name': f"P{i + 1}", 'position': i + 1, 'points': score, 'is_captain': i == captain, 'is_vice_captain': i == vice_captain,
+         'multiplier': captain_multiplier if i == captain else (1 if i < 11 else 0)}
+        for i, score in enumerate(points)
+    ]
+
+class BuildSquadTests(SimpleTestCase):
+    POINTS = [6, 4, 2, 2, 2, 2, 2, 2, 2, 2, 2, 1, 3, 0, 5]
+
+    def test_captain_points_are_doubled_and_bench_is_excluded(self):
+        team_data = picks(self.POINTS)
+        squad = build_squad(team_data)
+        self.assertEqual(squad.total_points, 6 * 2 + 4 + 2 * 9)
+        self.assertEqual(squad.bench_points, 9)
+        self.assertEqual(squad.captain['points'], 12)
+        self.assertEqual(squad.vice_captain['id'], 2)
+        self.assertEqual(squad.top_scorer['id'], 1)
+        # The raw picks are left alone
+        self.assertEqual(team_data[0]['points'], 6)
+
+    def test_vice_captain_is_promoted_when_captain_blanks(self):
+        points = [0] + self.POINTS[1:]
+        squad = build_squad(picks(points))
+        self.assertEqual(squad.captain['id'], 1)
+        promoted = squad.players[1]
+        self.assertEqual((promoted['is_captain'], promoted['is_vice_captain'], promoted['multiplier'], promoted['points']), (True, False, 2, 8))
+        self.assertIsNone(squad.vice_captain)
+        self.assertEqual(squad.total_points, 8 + 2 * 9)
+        self.assertEqual(squad.top_scorer['id'], 2)
+
+    def test_triple_captain(self):
+        squad = build_squad(picks(self.POINTS, captain_multiplier=3), '3xc')
+        self.assertEqual(squad.captain['points'], 18)
+        self.assertEqual(squad.total_points, 18 + 4 + 2 * 9)
+        # A blanking triple captain passes the x3 to the vice-captain
+        squad = build_squad(picks([0] + self.POINTS[1:], captain_multiplier=3), '3xc')
+        self.assertEqual(squad.players[1]['points'], 12)
+        self.assertEqual(squad.total_points, 12 + 2 * 9)
+
+    def test_bench_boost_counts_the_bench(self):
+        squad = build_squad(picks(self.POINTS), 'bboost')
+        self.assertTrue(squad.bench_boost_active)
+        self.assertEqual(squad.total_points, 6 * 2 + 4 + 2 * 9 + 9)
+        self.assertEqual(squad.bench_points, 9)
+
+class SquadCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SquadCache()
+        cache.max_entries = 2
+        squads = [build_squad(picks(BuildSquadTests.POINTS)) for _ in range(3)]
+        cache.put(1, 5, squads[0], 60)
+        cache.put(2, 5, squads[1], 60)
+        self.assertIs(cache.get('1', 5), squads[0])
+        cache.put(3, 5, squads[2], 60)
+        self.assertIsNone(cache.get(2, 5))
+        self.assertIs(cache.get(1, 5), squads[0])
+        self.assertIs(cache.get(3, 5), squads[2])
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_live_gameweeks_expire_sooner_than_finished_ones(self):
+        cache = SquadCache()
+        live_ttl = cache.ttl_for_event({'id': 5, 'finished': False})
+        finished_ttl = cache.ttl_for_event({'id': 5, 'finished': True})
+        self.assertEqual((live_ttl, finished_ttl), (cache.live_ttl, cache.finished_ttl))
+        self.assertLess(live_ttl, finished_ttl)
+
+        squad = build_squad(picks(BuildSquadTests.POINTS))
+        cache.put(1, 5, squad, live_ttl)
+        cache.put(2, 5, squad, finished_ttl)
+        with mock.patch('api.squad.time.monotonic', return_value=time.monotonic() + live_ttl + 1):
+            self.assertIsNone(cache.get(1, 5))
+            self.assertIs(cache.get(2, 5), squad)
+        # Entries are per gameweek
+        self.assertIsNone(cache.get(2, 6))
+
+class BetSuggestionTests(SimpleTestCase):
+    def generator(self):
+        generator = BetGenerator()
+        generator.history_store = RedisBetHistoryStore(InMemoryRedis())
+        generator.history_store.append(2, {'total_odds': 3.5, 'luck_level': 1})
+        return generator
+
+    def test_single_slip_matches_batch_pricing(self):
+        generator = self.generator()
+        entries = [(team_data(seed), player_id, luck_level) for seed in range(4) for player_id in (1, 2) for luck_level in (-2, 0, 2)]
+        for entry, batch in zip(entries, generator.generate_bet_suggestions_batch(entries)):
+            single = generator.generate_bet_suggestions(*entry)
+            self.assertEqual(single['total_odds'], batch['total_odds'])
+            self.assertEqual([leg['odds'] for leg in single['bet_legs']], [leg['odds'] for leg in batch['bet_legs']])
+
+    async def test_batch_squads_are_not_stored_in_the_interactive_cache(self):
+        squad_cache.clear()
+        self.addCleanup(squad_cache.clear)
+        fetch = mock.AsyncMock(return_value={'team_data': team_data(1), 'active_chip': None})
+        with mock.patch.object(views, 'get_team_data', fetch):
+            current_event = {'id': 5, 'finished': False}
+            self.assertIsNotNone(await views._get_squad(1, current_event, store=False))
+            self.assertIsNone(squad_cache.get(1, 5))
+            interactive = await views._get_squad(1, current_event)
+            self.assertIs(squad_cache.get(1, 5), interactive)
+            # A batch run reads what interactive requests cached
+            self.assertIs(await views._get_squad(1, current_event, store=False), interactive)
+        self.assertEqual(fetch.await_count, 2)
+
+    def test_profile_index_marks_top_five_percent_and_widely_owned_players(self):
+        elements = [
+            {'id': i, 'element_type': 1 if i % 10 == 0 else 3, 'selected_by_percent': str(i / 10), 'form': str(i), 'ict_index': str(i)}
+            for i in range(1, 101)
+        ]
+        # Low form and ICT, but owned by more than HIGH_PROFILE_OWNERSHIP percent of managers
+        elements[2]['selected_by_percent'] = '25.0'
+        generator = self.generator()
+        index = generator.build_profile_index(elements)
+        self.assertEqual({i for i, profile in index.items() if profile == 'high_profile'}, {3, 96, 97, 98, 99, 100})
+        self.assertEqual((index[10], index[95]), ('mid_profile', 'low_profile'))
+        self.assertEqual(generator.build_profile_index([]), {})
+        self.assertEqual(generator.build_profile_index(elements[:1]), {1: 'high_profile'})
+
+    def test_profile_index_is_rebuilt_once_per_snapshot(self):
+        generator = self.generator()
+        snapshot = SimpleNamespace(players={7: {'id': 7, 'element_type': 4, 'selected_by_percent': '30.0', 'form': None, 'ict_index': '1.0'}})
+        with mock.patch.object(generator, 'build_profile_index', wraps=generator.build_profile_index) as build:
+            generator.use_bootstrap(snapshot)
+            generator.use_bootstrap(snapshot)
+            generator.use_bootstrap(None)
+        build.assert_called_once()
+        self.assertEqual(generator._get_player_profile({'id': 7, 'name': 'Unknown'}), 'high_profile')
+
+class InterruptingClient(LocalTypesenseClient):
+    """Local search backend whose imports can fail after a number of batches, or reject some documents"""
+
+    def __init__(self, fail_after=None, reject_ids=(), on_import=None):
+        super().__init__()
+        self.fail_after = fail_after
+        self.reject_ids = set(reject_ids)
+        self.on_import = on_import
+        self.imports = 0
+
+    async def import_documents(self, collection, jsonl, action='upsert', timeout=None):
+        if self.on_import:
+            self.on_import()
+        await asyncio.sleep(0.001)
+        if self.fail_after is not None and self.imports >= self.fail_after:
+            raise exceptions.RequestMalformed(400, "Cluster gone")
+        self.imports += 1
+        documents = [json.loads(line) for line in jsonl.splitlines()]
+        imported = iter(self.import_lines(collection, [json.dumps(document) for document in documents if document['id'] not in self.reject_ids], action))
+        rejection = {'success': False, 'error': 'Field `manager_name` must be a string.'}
+        return [rejection if document['id'] in self.reject_ids else next(imported) for document in documents]
+
+class ManagerIngestTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.source = os.path.join(directory, 'managers.jsonl')
+        self.write_dump(range(1, 101))
+        for attribute in ('schema_state', '_schema_check', 'async_client'):
+            patcher = mock.patch.object(typesense_service, attribute, getattr(typesense_service, attribute))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_dump(self, entry_ids):
+        with open(self.source, 'w') as handle:
+            for entry_id in entry_ids:
+                handle.write(json.dumps({'id': entry_id, 'player_first_name': 'Manager', 'player_last_name': str(entry_id), 'name': f"Squad {entry_id}"}) + "\n")
+
+    def pipeline(self, client, workers=2):
+        typesense_service.async_client = client
+        return ManagerIngestPipeline(self.source, batch_size=10, workers=workers, report=lambda message: None)
+
+    def indexed(self, client):
+        return set(client.collections[typesense_service.collection_name].documents)
+
+    async def test_interrupted_run_resumes_from_checkpoint_then_clears_it(self):
+        client = InterruptingClient(fail_after=4)
+        pipeline = self.pipeline(client, workers=1)
+        with self.assertRaises(exceptions.RequestMalformed):
+            await pipeline.run()
+        self.assertEqual(pipeline.load_checkpoint(), 40)
+
+        client.fail_after = None
+        resumed = self.pipeline(client)
+        stats = await resumed.run()
+        self.assertEqual(stats['read'], 60)
+        self.assertEqual(stats['imported'], 60)
+        self.assertEqual(self.indexed(client), {str(entry_id) for entry_id in range(1, 101)})
+        self.assertFalse(os.path.exists(resumed.checkpoint_path))
+
+    async def test_checkpoint_for_a_different_dump_is_ignored(self):
+        pipeline = self.pipeline(InterruptingClient())
+        pipeline.save_checkpoint(50)
+        self.assertEqual(pipeline.load_checkpoint(), 50)
+        self.write_dump(range(1, 201))
+        self.assertEqual(pipeline.load_checkpoint(), 0)
+
+    async def test_reader_is_held_back_by_slow_imports(self):
+        pipeline = None
+        ahead = []
+
+        def on_import():
+            # Records read but not yet imported when a batch goes up
+            ahead.append(pipeline.stats['read'] - pipeline.stats['imported'])
+        client = InterruptingClient(on_import=on_import)
+        pipeline = self.pipeline(client)
+        self.write_dump(range(1, 1001))
+        stats = await pipeline.run()
+        self.assertEqual(stats['imported'], 1000)
+        # Queue of workers * 2 batches, one batch per worker and the one being assembled
+        self.assertLessEqual(max(ahead), (pipeline.workers * 3 + 1) * pipeline.batch_size)
+
+    async def test_rejected_documents_go_to_side_file(self):
+        client = InterruptingClient(reject_ids={'7'})
+        pipeline = self.pipeline(client)
+        pipeline.max_rejected_ratio = 0.2
+        stats = await pipeline.run()
+        self.assertEqual((stats['imported'], stats['failed']), (99, 1))
+        with open(pipeline.rejected_path) as handle:
+            rejected = [json.loads(line) for line in handle]
+        self.assertEqual([row['document']['id'] for row in rejected], ['7'])
+        self.assertIn('manager_name', rejected[0]['error'])
+
+    async def test_batch_with_too_many_rejections_stops_before_the_checkpoint(self):
+        client = InterruptingClient(reject_ids={str(entry_id) for entry_id in range(21, 26)})
+        pipeline = self.pipeline(client, workers=1)
+        with self.assertRaises(exceptions.TypesenseClientError):
+            await pipeline.run()
+        self.assertEqual(pipeline.load_checkpoint(), 20)
+
+class ArticleStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'league_news.sqlite3')
+
+    def test_database_is_opened_on_first_use(self):
+        store = ArticleStore(self.path)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(store.get_articles(1, 5, 'Squad', 'Manager'))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_manager_is_only_rewritten_when_names_change_or_last_seen_is_old(self):
+        store = ArticleStore(self.path)
+        self.assertFalse(store.is_remembered(1, 'Squad', 'Manager'))
+        store.remember_manager(1, 'Squad', 'Manager')
+        self.assertTrue(store.is_remembered('1', 'Squad', 'Manager'))
+        self.assertFalse(store.is_remembered(1, 'Renamed', 'Manager'))
+        with mock.patch('api.article_store.time.time', return_value=time.time() + store.LAST_SEEN_REFRESH):
+            self.assertFalse(store.is_remembered(1, 'Squad', 'Manager'))
+        self.assertEqual(store.managers(), [{'player_id': '1', 'team_name': 'Squad', 'manager_name': 'Manager'}])
+
+class JsonlBetHistoryStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'bets.jsonl')
+
+    def log_lines(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_log_is_replayed_on_startup(self):
+        store = JsonlBetHistoryStore(self.path)
+        for n in range(MAX_BETS_PER_USER + 5):
+            store.append(1, {'n': n})
+        store.append('2', {'n': 0})
+
+        replayed = JsonlBetHistoryStore(self.path)
+        self.assertEqual(replayed.user_count(), 2)
+        self.assertEqual(replayed.get('1'), [{'n': n} for n in range(5, MAX_BETS_PER_USER + 5)])
+        self.assertEqual(replayed.get(2), [{'n': 0}])
+
+    def test_torn_last_line_is_skipped_and_rewritten(self):
+        with open(self.path, 'w') as f:
+            f.write('{"player_id":"1","bet":{"n":0}}\n{"player_id":"1","bet":{"n":1}}\n{"player_id":"1","bet":{"n"')
+        store = JsonlBetHistoryStore(self.path)
+        self.assertEqual(store.get(1), [{'n': 0}, {'n': 1}])
+        self.assertEqual(len(self.log_lines()), 2)
+
+        store.append(1, {'n': 2})
+        self.assertEqual(JsonlBetHistoryStore(self.path).get(1), [{'n': 0}, {'n': 1}, {'n': 2}])
+
+    def test_log_is_compacted_atomically_and_appends_continue(self):
+        store = JsonlBetHistoryStore(self.path, compact_min_lines=10)
+        with mock.patch('api.bet_history.os.replace', wraps=os.replace) as replace:
+            # Compacts once the log holds more than twice the live records
+            for n in range(2 * MAX_BETS_PER_USER + 1):
+                store.append(1, {'n': n})
+            replace.assert_called_once_with(f"{self.path}.tmp", self.path)
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+        self.assertEqual(len(self.log_lines()), MAX_BETS_PER_USER)
+
+        for n in range(2 * MAX_BETS_PER_USER + 1, 2 * MAX_BETS_PER_USER + 4):
+            store.append(1, {'n': n})
+        self.assertEqual(len(self.log_lines()), MAX_BETS_PER_USER + 3)
+        expected = [{'n': n} for n in range(MAX_BETS_PER_USER + 4, 2 * MAX_BETS_PER_USER + 4)]
+        self.assertEqual(store.get(1), expected)
+        self.assertEqual(JsonlBetHistoryStore(self.path).get(1), expected)
+
+class ThreadRecordingStore(RedisBetHistoryStore):
+    """Bet store noting which threads touched it"""
+
+    def __init__(self):
+        super().__init__(InMemoryRedis())
+        self.threads = set()
+
+    def append(self, player_id, bet):
+        self.threads.add(threading.get_ident())
+        super().append(player_id, bet)
+
+    def get(self, player_id):
+        self.threads.add(threading.get_ident())
+        return super().get(player_id)
+
+class BetHistoryViewTests(SimpleTestCase):
+    async def test_history_store_is_used_off_the_event_loop(self):
+        store = ThreadRecordingStore()
+        client = AsyncClient()
+        with mock.patch.object(bet_generator, 'history_store', store):
+            response = await client.post(reverse('place_bet'), json.dumps({'playerId': 7, 'total_odds': 3.0, 'legs': [{}]}), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            response = await client.get(reverse('user_history'), {'playerId': 7})
+        self.assertEqual(json.loads(response.content)['bet_count'], 1)
+        self.assertTrue(store.threads)
+        self.assertNotIn(threading.get_ident(), store.threads)
+
+class CompileTemplateTests(SimpleTestCase):
+    def test_matches_str_format(self):
+        values = {'x': 'Saka', 'y': 'Palmer', 'z': 3.14159, 'w': 5, 'a': {'b': 1}, 't': (1, 2)}
+        for template in (
+            "a {x} b {{literal}} {y!r:>8} {z:.2f}", "", "{x}", "{a[b]}", "{x:>{w}}",
+            "100% {{x}}", "{t}", "{x} %s {t} {z}", "{w}%"
+        ):
+            self.assertEqual(compile_template(template)(values), template.format_map(values))
+
+    def test_module_templates_render_like_str_format(self):
+        values = {field: f"<{field}>" for templates in ALL_TEMPLATES.values() for template in templates
+                  for _, field, _, _ in string.Formatter().parse(template) if field}
+        for templates in ALL_TEMPLATES.values():
+            for template in templates:
+                self.assertEqual(compile_template(template)(values), template.format_map(values))
+
+class LocalSearchTests(SimpleTestCase):
+    def collection(self):
+        collection = LocalCollection(typesense_service.collection_schema())
+        for doc_id, manager_name, squad_name in [
+            ('1', 'Sam Allardyce', 'Big Sam FC'),
+            ('2', 'Samantha Kerr', 'Kerrnage'),
+            ('3', 'Alex Sam', 'Sammy Squad'),
+            ('4', 'Jo Smith', 'Samba Boys'),
+        ]:
+            collection.upsert({'id': doc_id, 'manager_name': manager_name, 'squad_name': squad_name})
+        return collection
+
+    def ids(self, result):
+        return [hit['document']['id'] for hit in result['hits']]
+
+    def test_exact_tokens_outrank_prefixes_and_earlier_fields_win(self):
+        result = self.collection().search({'q': 'sam', 'query_by': 'manager_name,squad_name'})
+        # Exact manager_name matches first (ties in insertion order), then prefix matches
+        self.assertEqual(self.ids(result)[:2], ['1', '3'])
+        self.assertEqual(set(self.ids(result)), {'1', '2', '3', '4'})
+        self.assertEqual(self.ids(self.collection().search({'q': 'sam', 'query_by': 'squad_name,manager_name'}))[0], '1')
+
+    def test_only_the_last_token_is_a_prefix(self):
+        collection = self.collection()
+        self.assertEqual(self.ids(collection.search({'q': 'sam all', 'query_by': 'manager_name'})), ['1'])
+        # 'sa' is not a prefix when followed by another token, so nothing matches both and 'allardyce' is dropped
+        self.assertEqual(collection.search({'q': 'sa allardyce', 'query_by': 'manager_name'}), {
+            **collection.search({'q': 'sa', 'query_by': 'manager_name'}), 'request_params': mock.ANY, 'search_time_ms': mock.ANY
+        })
+        self.assertEqual(self.ids(collection.search({'q': 'samb', 'query_by': 'manager_name', 'prefix': 'false'})), [])
+
+    def test_unmatched_tokens_are_dropped_from_the_right(self):
+        result = self.collection().search({'q': 'jo smith nobody', 'query_by': 'manager_name,squad_name'})
+        self.assertEqual(self.ids(result), ['4'])
+        self.assertEqual(self.collection().search({'q': 'nobody jo', 'query_by': 'manager_name'})['found'], 0)
+
+    def test_upsert_replaces_indexed_tokens(self):
+        collection = self.collection()
+        collection.upsert({'id': '4', 'manager_name': 'Jo Bloggs', 'squad_name': 'Bloggers'})
+        self.assertEqual(collection.search({'q': 'smith', 'query_by': 'manager_name'})['found'], 0)
+        self.assertEqual(self.ids(collection.search({'q': 'blogg', 'query_by': 'squad_name'})), ['4'])
+
+    async def test_search_player_resolves_through_local_backend(self):
+        client = LocalTypesenseClient()
+        client.collections[typesense_service.collection_name] = self.collection()
+        player_id_cache.clear()
+        self.addCleanup(player_id_cache.clear)
+        with mock.patch.object(typesense_service, 'async_client', client), \
+                mock.patch.object(typesense_service, 'schema_state', {'verified': True}):
+            self.assertEqual(str(await typesense_service.search_player('Samantha Kerr', 'Kerrnage')), '2')
+        response = await client.multi_search([{'collection': 'missing', 'q': 'x', 'query_by': 'manager_name'}])
+        self.assertEqual(response['results'][0]['code'], 404)
+
+class LeagueNewsETagTests(SimpleTestCase):
+    """generate_league_news against the FPL API simulator"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fixtures = FPLFixtures(managers=40, leagues=4, league_size=20)
+        cls.simulator = FPLSimulator(cls.fixtures)
+        cls.simulator_url = cls.simulator.start_in_thread()
+
+    def setUp(self):
+        for clear in (bootstrap_cache.invalidate, squad_cache.clear, league_snapshot_cache.clear):
+            clear()
+            self.addCleanup(clear)
+        self.enterContext(override_settings(FPL_API_BASE_URL=self.simulator_url, FPL_NEWS_DETERMINISTIC=True))
+        self.enterContext(mock.patch.object(views, 'article_store', ArticleStore(os.path.join(tempfile.mkdtemp(), 'league_news.sqlite3'))))
+        manager = self.fixtures.manager(self.fixtures.entry_ids[0])
+        self.params = {'playerId': manager['id'], 'teamName': manager['squad_name'], 'managerName': manager['manager_name']}
+
+    async def get(self, extra=None, **headers):
+        try:
+            return await AsyncClient().get(reverse('generate_league_news'), {**self.params, **(extra or {})}, headers=headers)
+        finally:
+            await fpl_http_client.close()
+
+    async def test_same_inputs_give_the_same_strong_etag_and_body(self):
+        first = await self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(json.loads(first.content)['articles'])
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertIn('must-revalidate', first['Cache-Control'])
+        league_snapshot_cache.clear()
+        second = await self.get()
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.content, first.content)
+
+    async def test_current_etag_gets_304_without_rendering(self):
+        etag = (await self.get())['ETag']
+        with mock.patch.object(NewsGenerator, 'generate_article') as generate_article:
+            response = await self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        generate_article.assert_not_called()
+
+        stale = await self.get(If_None_Match='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale['ETag'], etag)
+
+    async def test_each_representation_has_its_own_etag(self):
+        etag = (await self.get())['ETag']
+        full = await self.get({'standings': 'full'}, If_None_Match=etag)
+        self.assertEqual(full.status_code, 200)
+        self.assertNotEqual(full['ETag'], etag)
+        self.assertEqual((await self.get({'standings': 'full'}, If_None_Match=full['ETag'])).status_code, 304)
+
+    async def test_picks_are_fetched_once_per_request(self):
+        before = self.simulator.request_counts().get('picks', 0)
+        try:
+            error, context = await prepare_league_news(self.params['playerId'], 'Squad', 'Manager')
+            self.assertIsNone(error)
+            cancel_tasks(context['standings_tasks'])
+            await asyncio.gather(*context['standings_tasks'], return_exceptions=True)
+        finally:
+            await fpl_http_client.close()
+        self.assertEqual(self.simulator.request_counts()['picks'] - before, 1)
+        squad = context['player_context']['squad']
+        self.assertEqual(context['chips_data']['captain'], {'name': squad.captain['name'], 'points': squad.captain['points']})
+
+class CaptainChipsTests(SimpleTestCase):
+    def test_captain_and_chip_come_from_the_squad(self):
+        squad = build_squad(picks(BuildSquadTests.POINTS, captain_multiplier=3), '3xc')
+        self.assertEqual(services.get_player_captain_chips(squad), {'captain': {'name': 'P1', 'points': 18}, 'chips_used': ['Triple Captain']})
+        self.assertEqual(services.get_player_captain_chips(build_squad(picks(BuildSquadTests.POINTS)))['chips_used'], [])
+
+class LeagueFanOutTests(SimpleTestCase):
+    async def test_concurrency_is_bounded_and_slow_leagues_time_out(self):
+        running = 0
+        peak = 0
+
+        async def fake_snapshot(league_id, gameweek):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                await asyncio.sleep(5 if league_id == 'slow' else 0.01)
+            finally:
+                running -= 1
+            return None if league_id == 'missing' else f"snapshot {league_id}"
+        league_ids = [1, 2, 'slow', 3, 'missing', 4, 5, 6]
+        with mock.patch.object(services, 'get_league_snapshot', fake_snapshot):
+            tasks = services.create_league_standings_tasks(league_ids, 5, concurrency=3, timeout=0.1)
+            results = await asyncio.gather(*tasks)
+        self.assertLessEqual(peak, 3)
+        self.assertEqual([league_id for league_id, _, _ in results], league_ids)
+        self.assertEqual(dict((league_id, error) for league_id, _, error in results)['slow'], 'timeout')
+        self.assertEqual(results[4], ('missing', None, 'fetch_failed'))
+        self.assertEqual(results[0], (1, 'snapshot 1', None))
+        # The slow league only held its slot until the timeout
+        self.assertEqual(running, 0)
+
+def sorted_position_change(results, player_id):
+    """Movement as the per-entry sort LeagueRankings replaced computed it"""
+    current = next(i + 1 for i, entry in enumerate(results) if entry['entry'] == player_id)
+    previous = sorted(results, key=lambda entry: entry['total'] - entry['event_total'], reverse=True)
+    return next(i + 1 for i, entry in enumerate(previous) if entry['entry'] == player_id) - current
+
+class LeagueRankingsTests(SimpleTestCase):
+    def test_ties_keep_standings_order(self):
+        results = [
+            {'entry': 10, 'total': 100, 'event_total': 10},
+            {'entry': 11, 'total': 95, 'event_total': 5},
+            {'entry': 12, 'total': 95, 'event_total': 5},
+            {'entry': 13, 'total': 90, 'event_total': 0},
+        ]
+        rankings = LeagueRankings(results)
+        # All four were on 90 before the gameweek, so nobody moved
+        self.assertEqual(rankings.all_movements(), {10: 0, 11: 0, 12: 0, 13: 0})
+        self.assertEqual([rankings.position(entry) for entry in (10, 11, 12, 13)], [1, 2, 3, 4])
+        self.assertIsNone(rankings.position(99))
+        self.assertEqual(rankings.movement_for(99), 0)
+
+    def test_movements_match_sorting_each_entry(self):
+        rng = random.Random(11)
+        for _ in range(100):
+            # Narrow point ranges so most leagues have ties before and after the gameweek
+            rows = [{'entry': entry, 'event_total': rng.randint(0, 6), 'total': rng.randint(20, 30)} for entry in rng.sample(range(1, 10000), rng.randint(1, 40))]
+            results = sorted(rows, key=lambda entry: entry['total'], reverse=True)
+            rankings = LeagueRankings(results)
+            self.assertEqual(rankings.all_movements(), {entry['entry']: sorted_position_change(results, entry['entry']) for entry in results})
+
+class FullLeagueStandingsTests(SimpleTestCase):
+    PAGE_SIZE = 3
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(fpl_http_client, 'get_session', mock.AsyncMock()))
+        self.enterContext(override_settings(FPL_STANDINGS={'PAGE_CONCURRENCY': 4, 'MAX_PAGES': 10}))
+        self.requested = []
+
+    def serve(self, pages, failing=()):
+        async def get_page(session, league_id, page):
+            self.requested.append(page)
+            if page in failing or page > pages:
+                return None if page in failing else {'standings': {'has_next': False, 'results': []}}
+            start = (page - 1) * self.PAGE_SIZE
+            results = [{'entry': n, 'total': 1000 - n, 'event_total': 0} for n in range(start, start + self.PAGE_SIZE)]
+            return {'last_updated_data': 'now', 'standings': {'has_next': page < pages, 'page': page, 'results': results}}
+        self.enterContext(mock.patch.object(services, '_get_standings_page', get_page))
+
+    async def test_every_page_is_read_across_window_boundaries(self):
+        # Page 1, then windows of 4: a last page at the window's end, just past it, and inside it
+        for pages, requested in ((5, 5), (6, 9), (8, 9)):
+            with self.subTest(pages=pages):
+                self.requested = []
+                self.serve(pages)
+                standings = await services.get_full_league_standings(1)
+                self.assertFalse(standings.truncated)
+                self.assertEqual(standings.entry.tolist(), list(range(pages * self.PAGE_SIZE)))
+                self.assertEqual(sorted(self.requested), list(range(1, requested + 1)))
+
+    async def test_failed_page_and_page_cap_truncate(self):
+        self.serve(8, failing={4})
+        standings = await services.get_full_league_standings(1)
+        self.assertTrue(standings.truncated)
+        self.assertEqual(len(standings), 3 * self.PAGE_SIZE)
+
+        self.serve(12)
+        standings = await services.get_full_league_standings(1)
+        self.assertTrue(standings.truncated)
+        self.assertEqual(len(standings), 10 * self.PAGE_SIZE)
+
+def fake_snapshot(league_id, nbytes, gameweek=5, last_updated='t1'):
+    return SimpleNamespace(league_id=league_id, gameweek=gameweek, key=(league_id, gameweek, last_updated), nbytes=nbytes)
+
+class LeagueSnapshotCacheTests(SimpleTestCase):
+    def cache(self):
+        with override_settings(FPL_LEAGUE_SNAPSHOT_CACHE={'TTL': 60, 'MEMORY_BUDGET_MB': 1}):
+            return LeagueSnapshotCache()
+
+    def test_least_recently_used_snapshot_is_evicted_past_the_budget(self):
+        cache = self.cache()
+        third = 400 * 1024
+        cache.put(fake_snapshot(1, third))
+        cache.put(fake_snapshot(2, third))
+        # Reading league 1 makes league 2 the least recently used
+        self.assertIsNotNone(cache.get_fresh(1, 5))
+        cache.put(fake_snapshot(3, third))
+        self.assertIsNone(cache.get_fresh(2, 5))
+        self.assertIsNotNone(cache.get_fresh(1, 5))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+        self.assertEqual(cache.nbytes, 2 * third)
+
+        # A snapshot over the whole budget still displaces everything else
+        cache.put(fake_snapshot(4, 2 * 1024 * 1024))
+        self.assertEqual(cache.get_stats()['snapshots'], 1)
+        self.assertIsNotNone(cache.get_fresh(4, 5))
+
+    def test_new_stamp_replaces_and_touch_restarts_the_ttl(self):
+        cache = self.cache()
+        cache.put(fake_snapshot(1, 100))
+        newer = fake_snapshot(1, 200, last_updated='t2')
+        cache.put(newer)
+        self.assertEqual((cache.get_stats()['snapshots'], cache.nbytes), (1, 200))
+        self.assertIsNone(cache.touch(1, 5, 't1'))
+
+        with mock.patch('api.league_snapshot.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get_fresh(1, 5))
+            self.assertIs(cache.touch(1, 5, 't2'), newer)
+            self.assertIs(cache.get_fresh(1, 5), newer)
+
+class LeagueSnapshotLoadTests(SimpleTestCase):
+    def setUp(self):
+        self.release = asyncio.Event()
+        self.loads = []
+
+        async def load(league_id, gameweek):
+            self.loads.append(league_id)
+            await self.release.wait()
+            return f"snapshot {league_id}"
+        self.enterContext(mock.patch.object(services, '_load_league_snapshot', load))
+        self.enterContext(mock.patch.object(league_snapshot_cache, 'get_fresh', return_value=None))
+
+    async def test_concurrent_callers_share_one_load(self):
+        callers = [asyncio.ensure_future(services.get_league_snapshot(7, 5)) for _ in range(10)]
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*callers), ['snapshot 7'] * 10)
+        self.assertEqual(self.loads, [7])
+        self.assertNotIn((7, 5), services._snapshot_loads)
+
+    async def test_timed_out_caller_does_not_cancel_the_shared_load(self):
+        waiting = asyncio.ensure_future(services.get_league_snapshot(8, 5))
+        timed_out = await services.fetch_league_standings_limited(8, 5, asyncio.Semaphore(1), 0.01)
+        self.assertEqual(timed_out, (8, None, 'timeout'))
+
+        self.release.set()
+        self.assertEqual(await waiting, 'snapshot 8')
+        self.assertEqual(self.loads, [8])
+
+class EncodeJsonTests(SimpleTestCase):
+    PAYLOAD = {'odds': np.float32(1.5), 'count': np.int64(3), 'totals': np.array([1, 2]), 'stake': Decimal('2.50'), 7: 'entry'}
+
+    def test_stdlib_fallback_handles_numpy_values(self):
+        expected = {'odds': 1.5, 'count': 3, 'totals': [1, 2], 'stake': '2.50', '7': 'entry'}
+        with mock.patch.object(responses, 'orjson', None):
+            self.assertEqual(json.loads(responses.encode_json(self.PAYLOAD)), expected)
+        if responses.orjson is not None:
+            self.assertEqual(json.loads(responses.encode_json(self.PAYLOAD)), expected)
+
+class CompressionTests(SimpleTestCase):
+    BODY = json.dumps({'articles': ['Saka hauls again'] * 200}).encode()
+
+    def setUp(self):
+        # Keep the negotiation deterministic whether or not brotli is installed
+        self.enterContext(mock.patch.object(responses, 'brotli', None))
+
+    def compress(self, body=BODY, accept_encoding='gzip, deflate', **headers):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = HttpResponse(body, content_type='application/json')
+        for name, value in headers.items():
+            response[name] = value
+        return responses.compress_response(request, response)
+
+    def test_large_body_is_gzipped_with_weak_etag_and_vary(self):
+        response = self.compress(ETag='"abc"')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_body_and_unaccepted_encodings_stay_identity(self):
+        for response in (
+            self.compress(body=b'{"ok": true}'),
+            self.compress(accept_encoding='identity'),
+            self.compress(accept_encoding='gzip;q=0'),
+            self.compress(accept_encoding='br'),
+        ):
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(self.compress(accept_encoding='br').content, self.BODY)
+
+    async def test_async_middleware_compresses_large_bodies_off_the_loop(self):
+        async def get_response(request):
+            return HttpResponse(self.BODY, content_type='application/json')
+        middleware = CompressionMiddleware(get_response)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        with override_settings(FPL_RESPONSE_COMPRESSION={'MIN_SIZE': 1024, 'THREAD_MIN_SIZE': 2048}), \
+                mock.patch('api.middleware.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+            response = await middleware(request)
+        to_thread.assert_called_once()
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+
+class AutocompleteIndexTests(SimpleTestCase):
+    RECORDS = [('Bukayo Saka', 'Gunners'), ('Mo Salah', 'Pharaohs'), ('Son Heung-min', 'Spurs')]
+
+    def index(self, **config):
+        with override_settings(FPL_AUTOCOMPLETE={'INDEX_REBUILD_INTERVAL': 0, **config}):
+            return AutocompleteIndex()
+
+    def test_cached_query_is_a_hit(self):
+        index = self.index()
+        self.assertIsNone(index.lookup('Sa'))
+        index.store('sa', self.RECORDS[:2], complete=False)
+        self.assertEqual([s['full_name'] for s in index.lookup('SA')], ['Bukayo Saka', 'Mo Salah'])
+        self.assertEqual((index.stats['hits'], index.stats['misses']), (1, 1))
+
+    def test_complete_prefix_is_narrowed_locally(self):
+        index = self.index(PREFIX_INDEX=False)
+        index.store('sa', self.RECORDS[:2], complete=False)
+        # An incomplete page can't answer a longer query
+        self.assertIsNone(index.lookup('sak'))
+
+        index.store('sa', self.RECORDS[:2], complete=True)
+        self.assertEqual([s['full_name'] for s in index.lookup('sak')], ['Bukayo Saka'])
+        self.assertEqual(index.stats['narrowed'], 1)
+        # The narrowed result is cached under the longer query
+        self.assertEqual([s['full_name'] for s in index.lookup('sak', field='name')], ['Bukayo Saka'])
+        self.assertEqual(index.stats['hits'], 1)
+
+    def test_prefix_index_is_rebuilt_off_the_calling_thread(self):
+        index = self.index()
+        records = [(f"Saka Fan {n}", f"Team {n}") for n in range(12)]
+        index.store('saka fan', records, complete=False)
+        started = threading.Event()
+        release = threading.Event()
+        rebuild = index.rebuild_index
+
+        def slow_rebuild():
+            started.set()
+            release.wait(5)
+            rebuild()
+        with mock.patch.object(index, 'rebuild_index', slow_rebuild):
+            # The stale (empty) index answers while the rebuild is still running
+            self.assertIsNone(index.lookup('saka'))
+            self.assertTrue(started.wait(5))
+            self.assertIsNone(index.lookup('fan'))
+            thread = index._rebuild_thread
+            release.set()
+            thread.join(5)
+        self.assertEqual(len(index.lookup('fan')), 10)
+        self.assertEqual(index.stats['index_hits'], 1)
+        self.assertIs(index._rebuild_thread, thread)
+
+class EnsureCollectionTests(SimpleTestCase):
+    def service(self, fields=None):
+        service = TypesenseService()
+        service.async_client = mock.Mock()
+        if fields is None:
+            service.async_client.retrieve_collection = mock.AsyncMock(side_effect=exceptions.ObjectNotFound(404, 'Not found'))
+        else:
+            service.async_client.retrieve_collection = mock.AsyncMock(return_value={'fields': fields, 'num_documents': 3})
+        service.async_client.create_collection = mock.AsyncMock(side_effect=lambda schema: {**schema, 'num_documents': 0})
+        return service
+
+    async def test_schema_drift_is_reported_but_searchable(self):
+        service = self.service([
+            {'name': 'manager_name', 'type': 'string'},
+            {'name': 'squad_name', 'type': 'string[]'},
+            {'name': 'region', 'type': 'string'},
+        ])
+        states = await asyncio.gather(*(service.ensure_collection() for _ in range(5)))
+        state = states[0]
+        self.assertEqual((state['status'], state['verified']), ('drift', True))
+        self.assertEqual(state['unexpected_fields'], ['region'])
+        self.assertEqual(state['type_mismatches'], {'squad_name': {'declared': 'string', 'actual': 'string[]'}})
+        # Concurrent callers share one check, and a verified collection isn't rechecked
+        await service.ensure_collection()
+        service.async_client.retrieve_collection.assert_awaited_once()
+
+    async def test_missing_query_field_is_incompatible_until_rechecked(self):
+        service = self.service([{'name': 'manager_name', 'type': 'string'}])
+        state = await service.ensure_collection()
+        self.assertEqual((state['status'], state['verified']), ('incompatible', False))
+        self.assertEqual(state['missing_query_fields'], ['squad_name'])
+        await service.ensure_collection()
+        self.assertEqual(service.async_client.retrieve_collection.await_count, 1)
+
+        service.async_client.retrieve_collection.return_value = {'fields': [{'name': '.*', 'type': 'auto'}]}
+        state = await service.ensure_collection(force=True)
+        self.assertEqual((state['status'], state['auto_schema'], state['missing_fields']), ('ok', True, []))
+
+    async def test_missing_collection_is_created(self):
+        service = self.service()
+        state = await service.ensure_collection()
+        self.assertEqual((state['status'], state['created']), ('ok', True))
+        service.async_client.create_collection.assert_awaited_once_with(service.collection_schema())
+
+        service = self.service()
+        service.auto_create = False
+        self.assertEqual((await service.ensure_collection())['status'], 'missing')
+        service.async_client.create_collection.assert_not_awaited()
+
+def sequential_player_id(strategy_hits, player_name, team_name):
+    """The one-strategy-per-request loop search_player ran before multi_search"""
+    for i, hits in enumerate(strategy_hits):
+        if hits:
+            for hit in hits:
+                player_data = hit['document']
+                if (player_data.get('manager_name', '').lower() == player_name.lower() and
+                        player_data.get('squad_name', '').lower() == team_name.lower()):
+                    return hit['document']['id']
+            if i == 0:
+                return hits[0]['document']['id']
+    return None
+
+class StrategyHitsClient:
+    """Answers the three player search strategies with fixed hit lists, counting round trips"""
+
+    def __init__(self, strategy_hits):
+        self.strategy_hits = strategy_hits
+        self.requests = 0
+
+    def _hits(self, search_parameters):
+        strategy = 0 if search_parameters['query_by'] == 'manager_name,squad_name' else 1 if search_parameters['query_by'] == 'manager_name' else 2
+        return {'hits': self.strategy_hits[strategy]}
+
+    async def search(self, collection, search_parameters):
+        self.requests += 1
+        return self._hits(search_parameters)
+
+    async def multi_search(self, searches, common_parameters=None):
+        self.requests += 1
+        return {'results': [self._hits(search) for search in searches]}
+
+class PlayerSearchRankingTests(SimpleTestCase):
+    def test_every_mode_picks_the_sequential_result(self):
+        rng = random.Random(22)
+        names = [('Sam Allardyce', 'Big Sam FC'), ('sam allardyce', 'BIG SAM FC'), ('Sam Allardyce', 'Sammy Squad'), ('Alex Sam', 'Big Sam FC')]
+        self.addCleanup(player_id_cache.clear)
+        for _ in range(200):
+            strategy_hits = [
+                [{'document': {'id': str(rng.randint(1, 50)), 'manager_name': manager, 'squad_name': squad}} for manager, squad in rng.sample(names, rng.randint(0, 3))]
+                for _ in range(3)
+            ]
+            expected = sequential_player_id(strategy_hits, 'Sam Allardyce', 'Big Sam FC')
+            for mode in ('multi_search', 'concurrent', 'sequential'):
+                player_id_cache.clear()
+                client = StrategyHitsClient(strategy_hits)
+                with mock.patch.object(typesense_service, 'async_client', client), \
+                        mock.patch.object(typesense_service, 'schema_state', {'verified': True}), \
+                        mock.patch.object(typesense_service, 'player_search_mode', mode):
+                    self.assertEqual(async_to_sync(typesense_service.search_player)('Sam Allardyce', 'Big Sam FC'), expected, (mode, strategy_hits))
+                if mode == 'multi_search':
+                    self.assertEqual(client.requests, 1)
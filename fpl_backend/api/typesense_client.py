@@ -0,0 +1,89 @@
+# api/typesense_client.py
+import json
+import logging
+import aiohttp
+from typesense import exceptions
+from django.conf import settings
+from .http_client import typesense_http_client
+
+logger = logging.getLogger(__name__)
+
+# Same mapping as the typesense package, so callers can keep catching its exceptions
+STATUS_EXCEPTIONS = {
+    400: exceptions.RequestMalformed,
+    401: exceptions.RequestUnauthorized,
+    403: exceptions.RequestForbidden,
+    404: exceptions.ObjectNotFound,
+    409: exceptions.ObjectAlreadyExists,
+    422: exceptions.ObjectUnprocessable,
+    # Rate limited, callers back off as for an overloaded node
+    429: exceptions.ServiceUnavailable,
+    500: exceptions.ServerError,
+    503: exceptions.ServiceUnavailable,
+}
+
+class AsyncTypesenseClient:
+    """
+    Minimal asyncio Typesense client over its own pooled aiohttp session, so
+    searches await the network instead of blocking the event loop. Nodes
+    from TYPESENSE_CONFIG are tried in order on connection errors, timeouts
+    and 5xx responses.
+    """
+
+    def __init__(self, config=None):
+        config = config or settings.TYPESENSE_CONFIG
+        self.base_urls = [f"{node['protocol']}://{node['host']}:{node['port']}" for node in config['nodes']]
+        self.headers = {'X-TYPESENSE-API-KEY': config['api_key']}
+        self.timeout = aiohttp.ClientTimeout(total=float(config.get('connection_timeout_seconds', 2)))
+
+    async def request(self, method, path, params=None, body=None, data=None, content_type='application/json', timeout=None, raw=False):
+        """Send one API call and return the decoded JSON (or text for non-JSON or raw replies)"""
+        session = await typesense_http_client.get_session()
+        headers = dict(self.headers)
+        if body is not None:
+            data = json.dumps(body)
+        if data is not None:
+            headers['Content-Type'] = content_type
+        params = {key: str(value).lower() if isinstance(value, bool) else str(value) for key, value in (params or {}).items()}
+
+        last_error = None
+        for base_url in self.base_urls:
+            try:
+                async with session.request(method, base_url + path, params=params, data=data, headers=headers, timeout=timeout or self.timeout) as response:
+                    if response.status >= 500 and base_url != self.base_urls[-1]:
+                        last_error = STATUS_EXCEPTIONS.get(response.status, exceptions.ServerError)(response.status, await response.text())
+                        continue
+                    if response.content_type == 'application/json' and not raw:
+                        payload = await response.json()
+                    else:
+                        payload = await response.text()
+                    if response.status >= 400:
+                        message = payload.get('message') if isinstance(payload, dict) else payload
+                        raise STATUS_EXCEPTIONS.get(response.status, exceptions.TypesenseClientError)(response.status, message)
+                    return payload
+            except (aiohttp.ClientError, TimeoutError) as e:
+                logger.warning(f"Typesense node {base_url} failed: {e!r}")
+                last_error = e
+        if isinstance(last_error, exceptions.TypesenseClientError):
+            raise last_error
+        raise exceptions.ServiceUnavailable(f"No Typesense node reachable: {last_error!r}")
+
+    async def search(self, collection, search_parameters):
+        return await self.request('GET', f"/collections/{collection}/documents/search", params=search_parameters)
+
+    async def multi_search(self, searches, common_parameters=None):
+        return await self.request('POST', '/multi_search', params=common_parameters, body={'searches': searches})
+
+    async def retrieve_collection(self, collection):
+        return await self.request('GET', f"/collections/{collection}")
+
+    async def create_collection(self, schema):
+        return await self.request('POST', '/collections', body=schema)
+
+    async def import_documents(self, collection, jsonl, action='upsert', timeout=None):
+        """Bulk import newline-delimited JSON documents; returns one result dict per document"""
+        body = await self.request(
+            'POST', f"/collections/{collection}/documents/import", params={'action': action},
+            data=jsonl, content_type='text/plain', timeout=timeout, raw=True
+        )
+        return [json.loads(line) for line in body.splitlines() if line]
@@ -0,0 +1,242 @@
+# api/typesense_local.py
+import asyncio
+import json
+import logging
+import re
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+from typesense import exceptions
+
+logger = logging.getLogger(__name__)
+
+_token_re = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text) -> List[str]:
+    return _token_re.findall(str(text).lower())
+
+class LocalCollection:
+    """Documents plus a per-field inverted index (token -> document ids) with sorted tokens for prefix lookups"""
+
+    def __init__(self, schema: Dict):
+        self.schema = {'name': schema['name'], 'fields': list(schema.get('fields', []))}
+        self.documents: Dict[str, Dict] = {}
+        # Insertion order, ties in ranking go to the earliest indexed document like Typesense's seq_id
+        self.order: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, set]] = {}
+        self._sorted_tokens: Dict[str, List[str]] = {}
+
+    def info(self):
+        return {**self.schema, 'num_documents': len(self.documents), 'created_at': 0}
+
+    def upsert(self, document: Dict):
+        doc_id = str(document['id'])
+        if doc_id in self.documents:
+            self.remove(doc_id)
+        self.documents[doc_id] = document
+        self.order.setdefault(doc_id, len(self.order))
+        for field, value in document.items():
+            if field == 'id' or not isinstance(value, str):
+                continue
+            field_postings = self.postings.setdefault(field, {})
+            for token in tokenize(value):
+                postings = field_postings.get(token)
+                if postings is None:
+                    field_postings[token] = postings = set()
+                    self._sorted_tokens.pop(field, None)
+                postings.add(doc_id)
+
+    def remove(self, doc_id):
+        document = self.documents.pop(doc_id)
+        for field, value in document.items():
+            if field == 'id' or not isinstance(value, str):
+                continue
+            field_postings = self.postings.get(field, {})
+            for token in tokenize(value):
+                postings = field_postings.get(token)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del field_postings[token]
+                        self._sorted_tokens.pop(field, None)
+
+    def sorted_tokens(self, field) -> List[str]:
+        tokens = self._sorted_tokens.get(field)
+        if tokens is None:
+            tokens = self._sorted_tokens[field] = sorted(self.postings.get(field, {}))
+        return tokens
+
+    def matching(self, field, token, prefix) -> Dict[str, bool]:
+        """Document ids whose field has the token (or a token starting with it), mapped to whether the match was exact"""
+        field_postings = self.postings.get(field, {})
+        matches = {doc_id: True for doc_id in field_postings.get(token, ())}
+        if prefix:
+            tokens = self.sorted_tokens(field)
+            position = bisect_left(tokens, token)
+            while position < len(tokens) and tokens[position].startswith(token):
+                if tokens[position] != token:
+                    for doc_id in field_postings[tokens[position]]:
+                        matches.setdefault(doc_id, False)
+                position += 1
+        return matches
+
+    def search(self, params: Dict) -> Dict:
+        started = time.perf_counter()
+        query_by = [field.strip() for field in str(params.get('query_by', '')).split(',') if field.strip()]
+        if not query_by:
+            raise exceptions.RequestMalformed(400, "Parameter `query_by` is required.")
+        per_page = int(params.get('per_page', 10))
+        page = int(params.get('page', 1))
+        prefix = str(params.get('prefix', 'true')).lower() != 'false'
+        query = str(params.get('q', ''))
+
+        if query.strip() == '*':
+            ranked = sorted(self.documents, key=self.order.get)
+            scores = {doc_id: 0 for doc_id in ranked}
+        else:
+            tokens = tokenize(query)
+            scores = {}
+            # Like drop_tokens_threshold=1: drop query tokens from the right until something matches
+            while tokens and not scores:
+                scores = self._score(tokens, query_by, prefix)
+                tokens = tokens[:-1]
+            ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], self.order[doc_id]))
+
+        start = (page - 1) * per_page
+        hits = [{'document': self.documents[doc_id], 'text_match': scores[doc_id]} for doc_id in ranked[start:start + per_page]]
+        return {
+            'found': len(ranked),
+            'out_of': len(self.documents),
+            'page': page,
+            'hits': hits,
+            'search_time_ms': int((time.perf_counter() - started) * 1000),
+            'request_params': {'collection_name': self.schema['name'], 'per_page': per_page, 'q': query}
+        }
+
+    def _score(self, tokens, query_by, prefix):
+        """
+        Documents matching every token in some query_by field (only the last
+        token as a prefix, as Typesense does), scored by exact token matches
+        and then by how early the matching fields are in query_by
+        """
+        scores = None
+        for i, token in enumerate(tokens):
+            token_prefix = prefix and i == len(tokens) - 1
+            token_scores = {}
+            for rank, field in enumerate(query_by):
+                field_weight = len(query_by) - rank
+                for doc_id, exact in self.matching(field, token, token_prefix).items():
+                    score = (2 if exact else 1) * 100 + field_weight
+                    if score > token_scores.get(doc_id, 0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: score + token_scores[doc_id] for doc_id, score in scores.items() if doc_id in token_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+class LocalTypesenseClient:
+    """
+    In-process stand-in for AsyncTypesenseClient with the same coroutine
+    API, for benchmarking and regression-testing the search path with no
+    network. Matches like Typesense for the parameters TypesenseService
+    sends (q, query_by, per_page, page, prefix) without typo tolerance.
+    """
+
+    def __init__(self, latency_ms: float = 0, fixture: Optional[str] = None, collection_schema: Optional[Dict] = None):
+        self.latency = latency_ms / 1000
+        self.collections: Dict[str, LocalCollection] = {}
+        self.stats = {'requests': 0}
+        # Indexed on first use, the service (and so this client) is built at import time
+        self._pending_fixture = (collection_schema, fixture) if fixture else None
+
+    async def _round_trip(self):
+        if self._pending_fixture is not None:
+            collection_schema, fixture = self._pending_fixture
+            self._pending_fixture = None
+            self.load_fixture(collection_schema, fixture)
+        self.stats['requests'] += 1
+        # Optional simulated network latency, yields to the loop like a real request
+        await asyncio.sleep(self.latency)
+
+    def _collection(self, name) -> LocalCollection:
+        collection = self.collections.get(name)
+        if collection is None:
+            raise exceptions.ObjectNotFound(404, "Not found.")
+        return collection
+
+    async def request(self, method, path, params=None, body=None, data=None, content_type='application/json', timeout=None, raw=False):
+        raise exceptions.RequestMalformed(400, f"{method} {path} is not supported by the local search backend")
+
+    async def search(self, collection, search_parameters):
+        await self._round_trip()
+        return self._collection(collection).search(search_parameters)
+
+    async def multi_search(self, searches, common_parameters=None):
+        await self._round_trip()
+        results = []
+        for search in searches:
+            params = {**(common_parameters or {}), **search}
+            try:
+                results.append(self._collection(params.pop('collection')).search(params))
+            except exceptions.TypesenseClientError as e:
+                status, message = (e.args + (None, None))[:2]
+                results.append({'code': status, 'error': message})
+        return {'results': results}
+
+    async def retrieve_collection(self, collection):
+        await self._round_trip()
+        return self._collection(collection).info()
+
+    async def create_collection(self, schema):
+        await self._round_trip()
+        if schema['name'] in self.collections:
+            raise exceptions.ObjectAlreadyExists(409, f"A collection with name `{schema['name']}` already exists.")
+        self.collections[schema['name']] = LocalCollection(schema)
+        return self.collections[schema['name']].info()
+
+    async def import_documents(self, collection, jsonl, action='upsert', timeout=None):
+        await self._round_trip()
+        return self.import_lines(collection, jsonl.splitlines(), action)
+
+    def import_lines(self, collection, lines, action='upsert'):
+        target = self._collection(collection)
+        results = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                document = json.loads(line)
+            except ValueError:
+                results.append({'success': False, 'error': 'Bad JSON.', 'document': line})
+                continue
+            doc_id = str(document.get('id', ''))
+            if not doc_id:
+                results.append({'success': False, 'error': "Document has no `id`.", 'document': line})
+            elif action == 'create' and doc_id in target.documents:
+                results.append({'success': False, 'code': 409, 'error': f"A document with id {doc_id} already exists.", 'document': line})
+            elif action == 'update' and doc_id not in target.documents:
+                results.append({'success': False, 'code': 404, 'error': f"Could not find a document with id: {doc_id}", 'document': line})
+            else:
+                if action in ('update', 'emplace') and doc_id in target.documents:
+                    document = {**target.documents[doc_id], **document}
+                target.upsert(document)
+                results.append({'success': True})
+        return results
+
+    def load_fixture(self, collection_schema: Dict, path: str) -> int:
+        """Create the collection and index a JSONL/CSV manager dump into it; returns documents indexed"""
+        # Imported here, the ingest module depends on the search service this backend plugs into
+        from .manager_ingest import manager_document, read_records
+        self.collections.setdefault(collection_schema['name'], LocalCollection(collection_schema))
+        target = self.collections[collection_schema['name']]
+        count = 0
+        for record in read_records(path):
+            document = manager_document(record)
+            if document is not None:
+                target.upsert(document)
+                count += 1
+        logger.info(f"Local search backend indexed {count} documents from {path}")
+        return count
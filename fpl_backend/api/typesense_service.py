@@ -1,51 +1,180 @@
 # api/typesense_service.py
+import asyncio
 import typesense
 import logging
+import threading
+import time
+from collections import OrderedDict
 from django.conf import settings
+from .autocomplete import autocomplete_index, build_suggestions
+from .typesense_client import AsyncTypesenseClient
+from .typesense_local import LocalTypesenseClient
 
 logger = logging.getLogger(__name__)
 
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+# Fields the searches query and read back; the document id is the FPL entry id
+COLLECTION_FIELDS = [
+    {'name': 'manager_name', 'type': 'string'},
+    {'name': 'squad_name', 'type': 'string'},
+]
+QUERY_FIELDS = ('manager_name', 'squad_name')
+
+class PlayerIdCache:
+    """
+    TTL/LRU cache of resolved (manager name, squad name) -> player_id, so
+    repeat Connect-page lookups never reach the search cluster. Misses
+    aren't cached, a manager who just signed up is found on the next try.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'TYPESENSE_PLAYER_SEARCH', {})
+        self.ttl = config.get('CACHE_TTL', 3600)
+        self.max_entries = config.get('CACHE_SIZE', 10000)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def _key(player_name, team_name):
+        return (' '.join(player_name.lower().split()), ' '.join(team_name.lower().split()))
+
+    def get(self, player_name, team_name):
+        key = self._key(player_name, team_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, player_name, team_name, player_id):
+        key = self._key(player_name, team_name)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, player_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 class TypesenseService:
     def __init__(self):
-        self.client = typesense.Client(settings.TYPESENSE_CONFIG)
-        self.collection_name = 'fplmanagers'
+        config = getattr(settings, 'TYPESENSE_COLLECTION', {})
+        self.collection_name = config.get('NAME', 'fplmanagers')
+        # Searches go through the asyncio client so they don't block the event loop
+        self.async_client = self._create_async_client()
+        self.auto_create = config.get('AUTO_CREATE', True)
+        self.retry_interval = config.get('RETRY_INTERVAL', 60)
+        # 'multi_search' (one request), 'concurrent' (parallel searches) or 'sequential'
+        self.player_search_mode = getattr(settings, 'TYPESENSE_PLAYER_SEARCH', {}).get('MODE', 'multi_search')
+        self._schema_check = None
+        self.schema_state = {'collection': self.collection_name, 'status': 'unchecked', 'verified': False, 'checked_at': None}
         
-    def get_client(self):
-        """Get the Typesense client instance"""
-        return self.client
-    
-    def create_collection_if_not_exists(self):
-        """Create the FPL users collection if it doesn't exist"""
+    def _create_async_client(self):
+        """The hosted cluster, or the in-process stand-in when TYPESENSE_BACKEND['ENGINE'] is 'local'"""
+        backend = getattr(settings, 'TYPESENSE_BACKEND', {})
+        if backend.get('ENGINE', 'remote') == 'local':
+            logger.info("Using the in-process local search backend instead of Typesense")
+            return LocalTypesenseClient(backend.get('LATENCY_MS', 0), backend.get('FIXTURE'), self.collection_schema())
+        return AsyncTypesenseClient()
+
+    def collection_schema(self):
+        return {'name': self.collection_name, 'fields': COLLECTION_FIELDS}
+
+    async def ensure_collection(self, force=False):
+        """
+        Verify (creating it if allowed) the collection once and cache the result,
+        so searches don't pay a schema round trip. An unverified state is
+        rechecked at most every retry_interval seconds, or when forced.
+        """
+        state = self.schema_state
+        if not force and (state['verified'] or (state['checked_at'] and time.time() - state['checked_at'] < self.retry_interval)):
+            return state
+
+        # Concurrent callers share one in-flight check
+        check = self._schema_check
+        if check is None or check.done() or check.get_loop() is not asyncio.get_running_loop():
+            check = self._schema_check = asyncio.ensure_future(self._check_collection())
+        self.schema_state = await asyncio.shield(check)
+        return self.schema_state
+
+    async def _check_collection(self):
+        state = {'collection': self.collection_name, 'verified': False, 'created': False, 'checked_at': time.time()}
         try:
-            # Check if collection exists
-            collections = self.client.collections.retrieve()
-            collection_names = [col['name'] for col in collections]
-            
-            if self.collection_name not in collection_names:
-                # Create the collection
-                schema = {
-                    'name': self.collection_name,
-                    'fields': [
-                        {'name': 'player_name', 'type': 'string'},
-                        {'name': 'team_name', 'type': 'string'},
-                        {'name': 'player_id', 'type': 'int32'},
-                        {'name': 'full_name', 'type': 'string'},
-                        {'name': 'created_at', 'type': 'int64'}
-                    ]
-                }
-                self.client.collections.create(schema)
-                logger.info(f"Created Typesense collection: {self.collection_name}")
-            else:
-                logger.info(f"Typesense collection {self.collection_name} already exists")
-                
+            try:
+                collection = await self.async_client.retrieve_collection(self.collection_name)
+            except typesense.exceptions.ObjectNotFound:
+                if not self.auto_create:
+                    logger.error(f"Typesense collection {self.collection_name} does not exist")
+                    return {**state, 'status': 'missing'}
+                try:
+                    collection = await self.async_client.create_collection(self.collection_schema())
+                    state['created'] = True
+                    logger.info(f"Created Typesense collection: {self.collection_name}")
+                except typesense.exceptions.ObjectAlreadyExists:
+                    # Another worker created it first
+                    collection = await self.async_client.retrieve_collection(self.collection_name)
         except Exception as e:
-            logger.error(f"Error creating Typesense collection: {e}")
-            raise
+            logger.error(f"Error verifying Typesense collection {self.collection_name}: {e}")
+            return {**state, 'status': 'unavailable', 'error': str(e)}
+
+        state.update(self._schema_drift(collection.get('fields', [])))
+        state['num_documents'] = collection.get('num_documents')
+        # Searches still work with extra or retyped fields, but not without the queried ones
+        state['verified'] = not state['missing_query_fields']
+        if not state['verified']:
+            state['status'] = 'incompatible'
+            logger.error(f"Typesense collection {self.collection_name} lacks queried fields {state['missing_query_fields']}")
+        elif state['missing_fields'] or state['unexpected_fields'] or state['type_mismatches']:
+            state['status'] = 'drift'
+            logger.warning(
+                f"Typesense collection {self.collection_name} schema drift: missing {state['missing_fields']}, "
+                f"unexpected {state['unexpected_fields']}, retyped {state['type_mismatches']}"
+            )
+        else:
+            state['status'] = 'ok'
+            logger.info(f"Typesense collection {self.collection_name} schema verified")
+        return state
+
+    @staticmethod
+    def _schema_drift(actual_fields):
+        """Differences between the declared fields and the collection's"""
+        actual = {field['name']: field.get('type') for field in actual_fields}
+        declared = {field['name']: field['type'] for field in COLLECTION_FIELDS}
+        # A '.*' auto field indexes whatever documents contain, so nothing is missing as such
+        auto_schema = '.*' in actual
+        missing = [] if auto_schema else [name for name in declared if name not in actual]
+        return {
+            'auto_schema': auto_schema,
+            'missing_fields': missing,
+            'missing_query_fields': [name for name in QUERY_FIELDS if name in missing],
+            'unexpected_fields': sorted(name for name in actual if name not in declared and name != '.*'),
+            'type_mismatches': {
+                name: {'declared': declared[name], 'actual': actual[name]}
+                for name in declared if name in actual and actual[name] != declared[name]
+            }
+        }
+
+    async def create_collection_if_not_exists(self):
+        """Create the FPL users collection if it doesn't exist"""
+        return await self.ensure_collection()
     
-    def search_player(self, player_name, team_name):
+    async def search_player(self, player_name, team_name):
         """Search for a player in Typesense"""
+        cached = player_id_cache.get(player_name, team_name)
+        if cached is not None:
+            return cached
+
         try:
-            self.create_collection_if_not_exists()
+            await self.ensure_collection()
             logger.info(f"Searching for player: '{player_name}' in team: '{team_name}'")
             
             # Try multiple search strategies
@@ -54,40 +183,89 @@ class TypesenseService:
                 {'q': f'{player_name}', 'query_by': 'manager_name', 'per_page': 10},
                 {'q': f'{team_name}', 'query_by': 'squad_name', 'per_page': 10}
             ]
-            
-            for i, search_parameters in enumerate(search_strategies):
-                search_result = self.client.collections[self.collection_name].documents.search(search_parameters)
-                
-                if search_result['hits']:
-                    # Look for exact match first
-                    for hit in search_result['hits']:
-                        player_data = hit['document']
-                        if (player_data.get('manager_name', '').lower() == player_name.lower() and 
-                            player_data.get('squad_name', '').lower() == team_name.lower()):
-                            logger.info(f"Exact match found for {player_name} in {team_name}")
-                            return hit.get('document', {}).get('id') or hit.get('id')
-                    
-                    # If no exact match on first strategy, return first result
-                    if i == 0:
-                        logger.info(f"Returning first match for {player_name} in {team_name}")
-                        return search_result['hits'][0].get('document', {}).get('id') or search_result['hits'][0].get('id')
-            
-            logger.info(f"No player found for {player_name} in {team_name}")
-            return None
+
+            if self.player_search_mode == 'sequential':
+                player_id = await self._search_player_sequential(search_strategies, player_name, team_name)
+            else:
+                if self.player_search_mode == 'concurrent':
+                    results = await asyncio.gather(*(
+                        self.async_client.search(self.collection_name, search_parameters) for search_parameters in search_strategies
+                    ))
+                else:
+                    # Every strategy in one round trip
+                    response = await self.async_client.multi_search(
+                        [{'collection': self.collection_name, **search_parameters} for search_parameters in search_strategies]
+                    )
+                    results = response['results']
+                    for result in results:
+                        if 'error' in result:
+                            raise typesense.exceptions.TypesenseClientError(result.get('code'), result['error'])
+                player_id = self._rank_strategy_hits([result['hits'] for result in results], player_name, team_name)
+
+            if player_id is None:
+                logger.info(f"No player found for {player_name} in {team_name}")
+                return None
+            player_id_cache.put(player_name, team_name, player_id)
+            return player_id
                 
         except Exception as e:
             logger.error(f"Error searching player in Typesense: {e}")
             return None
+
+    @staticmethod
+    def _hit_player_id(hit):
+        return hit.get('document', {}).get('id') or hit.get('id')
+
+    @staticmethod
+    def _is_exact_match(hit, player_name, team_name):
+        player_data = hit['document']
+        return (player_data.get('manager_name', '').lower() == player_name.lower() and
+                player_data.get('squad_name', '').lower() == team_name.lower())
+
+    def _rank_strategy_hits(self, strategy_hits, player_name, team_name):
+        """
+        Pick the player from every strategy's hits as the sequential search would:
+        an exact manager+squad match from the first strategy with hits, the
+        first strategy's top hit, or an exact match from a later strategy
+        """
+        for i, hits in enumerate(strategy_hits):
+            if not hits:
+                continue
+            for hit in hits:
+                if self._is_exact_match(hit, player_name, team_name):
+                    logger.info(f"Exact match found for {player_name} in {team_name}")
+                    return self._hit_player_id(hit)
+            # If no exact match on first strategy, return first result
+            if i == 0:
+                logger.info(f"Returning first match for {player_name} in {team_name}")
+                return self._hit_player_id(hits[0])
+        return None
+
+    async def _search_player_sequential(self, search_strategies, player_name, team_name):
+        """One strategy per round trip, stopping at the first that decides"""
+        strategy_hits = []
+        for search_parameters in search_strategies:
+            search_result = await self.async_client.search(self.collection_name, search_parameters)
+            strategy_hits.append(search_result['hits'])
+            player_id = self._rank_strategy_hits(strategy_hits, player_name, team_name)
+            if player_id is not None:
+                return player_id
+        return None
     
-    def get_autocomplete_suggestions(self, query, field='both'):
+    async def get_autocomplete_suggestions(self, query, field='both'):
+        # Hot prefixes are answered in-process, only misses reach the cluster
+        suggestions = autocomplete_index.lookup(query, field)
+        if suggestions is not None:
+            return suggestions
+
         try:
-            self.create_collection_if_not_exists()
+            await self.ensure_collection()
             
             # Search both fields to get complete player records
-            search_parameters = {'q': query, 'query_by': 'manager_name,squad_name', 'per_page': 20}
-            search_result = self.client.collections[self.collection_name].documents.search(search_parameters)
+            search_parameters = {'q': query, 'query_by': 'manager_name,squad_name', 'per_page': AUTOCOMPLETE_PAGE_SIZE}
+            search_result = await self.async_client.search(self.collection_name, search_parameters)
             
-            suggestions = []
+            records = []
             seen_combinations = set()
 
             for hit in search_result['hits']:
@@ -103,40 +281,15 @@ class TypesenseService:
                 if combination_key in seen_combinations:
                     continue
                 seen_combinations.add(combination_key)
-                
-                # Filter based on field and query relevance
-                if field == 'team':
-                    # For team field, only show if squad_name contains the query
-                    if query.lower() in squad_name.lower():
-                        suggestions.append({
-                            'type': 'team',
-                            'team_name': squad_name,
-                            'full_name': manager_name,
-                            'display': f"{squad_name} - {manager_name}"
-                        })
-                elif field == 'name':
-                    # For name field, only show if manager_name contains the query
-                    if query.lower() in manager_name.lower():
-                        suggestions.append({
-                            'type': 'name',
-                            'team_name': squad_name,
-                            'full_name': manager_name,
-                            'display': f"{manager_name} - {squad_name}"
-                        })
-                else:
-                    # For 'both', show if either field contains the query
-                    if query.lower() in manager_name.lower() or query.lower() in squad_name.lower():
-                        suggestions.append({
-                            'type': 'both',
-                            'team_name': squad_name,
-                            'full_name': manager_name,
-                            'display': f"{manager_name} ({squad_name})"
-                        })
-            
-            return suggestions[:10]
+                records.append((manager_name, squad_name))
+
+            # Fewer hits than a page means these are all of the query's matches
+            autocomplete_index.store(query, records, len(search_result['hits']) < AUTOCOMPLETE_PAGE_SIZE)
+            return build_suggestions(records, query, field)
         except Exception as e:
             logger.error(f"Error getting autocomplete suggestions: {e}")
             return []
 
-# Global instance
+# Global instances
+player_id_cache = PlayerIdCache()
 typesense_service = TypesenseService()
@@ -8,6 +8,7 @@ urlpatterns = [
     path('async_get_team_data/', views.async_get_team_data, name='async_get_team_data'),
     path('generate_bet_suggestions/', views.generate_bet_suggestions, name='generate_bet_suggestions'),
     path('adjust_odds/', views.adjust_odds, name='adjust_odds'),
+    path('generate_bet_suggestions_batch/', views.generate_bet_suggestions_batch, name='generate_bet_suggestions_batch'),
     path('place_bet/', views.place_bet, name='place_bet'),
     path('debug_user_history/', views.debug_user_history, name='debug_user_history'),
     path('user_history/', views.user_history, name='user_history'),
@@ -15,4 +16,7 @@ urlpatterns = [
     path('autocomplete/', views.get_autocomplete_suggestions, name='get_autocomplete_suggestions'),
     path('get_player_leagues/', views.get_player_leagues_view, name='get_player_leagues'),
     path('generate_league_news/', views.generate_league_news, name='generate_league_news'),
+    path('generate_league_news/stream/', views.generate_league_news_stream, name='generate_league_news_stream'),
+    path('metrics/http_pool/', views.http_pool_metrics, name='http_pool_metrics'),
+    path('health/typesense/', views.typesense_health, name='typesense_health'),
 ]
\ No newline at end of file
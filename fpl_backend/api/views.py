@@ -1,15 +1,25 @@
 # api/views.py
+import asyncio
+import hashlib
 import logging
 import json
 import uuid
-from django.http import JsonResponse
+from django.conf import settings
 from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from .services import get_player_id_from_api, get_current_event, get_team_data, get_player_leagues, get_league_standings, get_player_transfers, get_player_captain_chips
+from .services import get_player_id_from_api, get_bootstrap_snapshot, get_current_event, get_team_data, get_player_leagues
+from .http_client import fpl_http_client, typesense_http_client
 from .ml_models import bet_generator
+from .squad import build_squad, squad_cache
 from .typesense_service import typesense_service
 from .news_generator import NewsGenerator
+from .article_store import article_store
+from .league_news import STANDINGS_MODES, build_league_article, cancel_tasks, collect_league_news, league_error, prepare_league_news, project_article
+from .responses import JSON_CONTENT_TYPE, JsonResponse, encode_json, encoded_response, negotiate_content_type
 
 # Logger to monitor the process
 logger = logging.getLogger(__name__)
@@ -18,6 +28,16 @@ logger = logging.getLogger(__name__)
 def home(request):
     return HttpResponse(content="Welcome to the FPL API!", content_type="text/plain")
 
+# Prometheus-style metrics for the FPL API and Typesense HTTP connection pools
+def http_pool_metrics(request):
+    content = fpl_http_client.render_prometheus_metrics() + typesense_http_client.render_prometheus_metrics()
+    return HttpResponse(content=content, content_type="text/plain; version=0.0.4")
+
+# Typesense collection/schema state; 503 until the collection is verified
+async def typesense_health(request):
+    state = await typesense_service.ensure_collection(force=request.GET.get('refresh') == '1')
+    return JsonResponse(state, status=200 if state['verified'] else 503)
+
 # View to get player ID
 @csrf_exempt
 async def get_player_id(request):
@@ -34,6 +54,26 @@ async def get_player_id(request):
 
     return JsonResponse({'player_id': player_id})
 
+async def _get_squad(player_id, current_event, store=True):
+    """
+    Get the player's squad for the current gameweek with captaincy applied,
+    from the squad cache when possible. store=False leaves the cache as it
+    is on a miss, so bulk callers don't evict interactive users' squads.
+    """
+    gameweek = current_event['id']
+    squad = squad_cache.get(player_id, gameweek)
+    if squad:
+        return squad
+
+    team_response = await get_team_data(player_id, gameweek)
+    if not team_response:
+        return None
+
+    squad = build_squad(team_response['team_data'], team_response.get('active_chip'))
+    if store:
+        squad_cache.put(player_id, gameweek, squad, squad_cache.ttl_for_event(current_event))
+    return squad
+
 # View to get team data (player_id is now passed in)
 @csrf_exempt
 async def async_get_team_data(request):
@@ -52,58 +92,20 @@ async def async_get_team_data(request):
     gameweek = current_event['id']
     logger.info(f"Fetched current event: {current_event}, gameweek: {gameweek}")
 
-    # Fetch the team data based on player ID and gameweek
-    team_response = await get_team_data(player_id, gameweek)
+    # Fetch the team data based on player ID and gameweek, with captain/vice-captain
+    # logic, point doubling and bench boost totals applied
+    squad = await _get_squad(player_id, current_event)
 
-    if not team_response:
+    if not squad:
         # Return error if no team data is found
         return JsonResponse({'error': 'Team data not found.'}, status=404)
 
-    team_data = team_response['team_data']
-    active_chip = team_response.get('active_chip')
-    automatic_subs = team_response.get('automatic_subs', [])
+    active_chip = squad.active_chip
+    total_points = squad.total_points
+    bench_boost_active = squad.bench_boost_active
 
-    # Add gameweek to each player
-    for player in team_data:
-        player['event'] = gameweek
-
-    # Handle captain/vice-captain logic and point doubling
-    captain_playing = False
-    vice_captain_playing = False
-    
-    # First pass: check if captain and vice-captain are playing (have points > 0)
-    for player in team_data:
-        if player.get('is_captain') and player.get('points', 0) > 0:
-            captain_playing = True
-        if player.get('is_vice_captain') and player.get('points', 0) > 0:
-            vice_captain_playing = True
-
-    # Second pass: apply captain logic
-    for player in team_data:
-        # If captain is not playing and vice-captain is playing, make vice-captain the captain
-        if not captain_playing and vice_captain_playing and player.get('is_vice_captain'):
-            player['is_captain'] = True
-            player['is_vice_captain'] = False
-            player['multiplier'] = 2
-            player['points'] = player.get('points', 0) * 2
-            logger.info(f"Vice-captain {player['name']} promoted to captain due to captain not playing")
-        # If player has multiplier 2 (captain), double their points
-        elif player.get('multiplier') == 2:
-            current_points = player.get('points', 0)
-            player['points'] = current_points * 2
-            if not player.get('is_captain'):
-                player['is_captain'] = True
-                player['is_vice_captain'] = False
-            logger.info(f"Captain {player['name']} points doubled from {current_points} to {player['points']}")
-
-    # Calculate total points (excluding bench unless bench boost is active)
-    bench_boost_active = active_chip == 'bboost'
-    total_points = 0
-    
-    for player in team_data:
-        # Only count points from starting 11 unless bench boost is active
-        if player['position'] <= 11 or bench_boost_active:
-            total_points += player.get('points', 0)
+    # Add gameweek to each player (on copies, the cached squad is shared)
+    team_data = [{**player, 'event': gameweek} for player in squad.players]
 
     logger.info(f"Total points calculated: {total_points} (bench boost active: {bench_boost_active})")
 
@@ -125,46 +127,21 @@ async def generate_bet_suggestions(request):
         return JsonResponse({'error': 'Player ID missing.'}, status=400)
 
     try:
-        # Fetch team data first
+        # Fetch team data first (repeat luck adjustments are served from the squad cache)
         current_event = await get_current_event()
         if not current_event:
             return JsonResponse({'error': 'Could not fetch current event.'}, status=500)
         
-        gameweek = current_event['id']
-        team_response = await get_team_data(player_id, gameweek)
+        squad = await _get_squad(player_id, current_event)
         
-        if not team_response:
+        if not squad:
             return JsonResponse({'error': 'Team data not found.'}, status=404)
 
-        team_data = team_response['team_data']
-        active_chip = team_response.get('active_chip')
+        team_data = squad.players
+        bet_generator.use_bootstrap(await get_bootstrap_snapshot())
 
-        # Apply same captain logic as in async_get_team_data
-        captain_playing = False
-        vice_captain_playing = False
-        
-        for player in team_data:
-            if player.get('is_captain') and player.get('points', 0) > 0:
-                captain_playing = True
-            if player.get('is_vice_captain') and player.get('points', 0) > 0:
-                vice_captain_playing = True
-
-        for player in team_data:
-            if not captain_playing and vice_captain_playing and player.get('is_vice_captain'):
-                player['is_captain'] = True
-                player['is_vice_captain'] = False
-                player['multiplier'] = 2
-                player['points'] = player.get('points', 0) * 2
-            elif player.get('multiplier') == 2:
-                player['points'] = player.get('points', 0) * 2
-                if not player.get('is_captain'):
-                    player['is_captain'] = True
-                    player['is_vice_captain'] = False
-
-        # Generate bet suggestions using ML
-        bet_suggestions = bet_generator.generate_bet_suggestions(
-            team_data, player_id, luck_level
-        )
+        # Generate bet suggestions using ML (in a thread, pricing reads the blocking history store)
+        bet_suggestions = await asyncio.to_thread(bet_generator.generate_bet_suggestions, team_data, player_id, luck_level)
 
         logger.info(f"Generated bet suggestions for player {player_id} with luck level {luck_level}")
         
@@ -189,46 +166,21 @@ async def adjust_odds(request):
         return JsonResponse({'error': 'Player ID missing.'}, status=400)
 
     try:
-        # Fetch team data
+        # Fetch team data (repeat luck adjustments are served from the squad cache)
         current_event = await get_current_event()
         if not current_event:
             return JsonResponse({'error': 'Could not fetch current event.'}, status=500)
         
-        gameweek = current_event['id']
-        team_response = await get_team_data(player_id, gameweek)
+        squad = await _get_squad(player_id, current_event)
         
-        if not team_response:
+        if not squad:
             return JsonResponse({'error': 'Team data not found.'}, status=404)
 
-        team_data = team_response['team_data']
-        active_chip = team_response.get('active_chip')
+        team_data = squad.players
+        bet_generator.use_bootstrap(await get_bootstrap_snapshot())
 
-        # Apply same captain logic as in async_get_team_data
-        captain_playing = False
-        vice_captain_playing = False
-        
-        for player in team_data:
-            if player.get('is_captain') and player.get('points', 0) > 0:
-                captain_playing = True
-            if player.get('is_vice_captain') and player.get('points', 0) > 0:
-                vice_captain_playing = True
-
-        for player in team_data:
-            if not captain_playing and vice_captain_playing and player.get('is_vice_captain'):
-                player['is_captain'] = True
-                player['is_vice_captain'] = False
-                player['multiplier'] = 2
-                player['points'] = player.get('points', 0) * 2
-            elif player.get('multiplier') == 2:
-                player['points'] = player.get('points', 0) * 2
-                if not player.get('is_captain'):
-                    player['is_captain'] = True
-                    player['is_vice_captain'] = False
-
-        # Generate new bet suggestions with adjusted luck level
-        bet_suggestions = bet_generator.generate_bet_suggestions(
-            team_data, player_id, luck_level
-        )
+        # Generate new bet suggestions with adjusted luck level (in a thread, pricing reads the blocking history store)
+        bet_suggestions = await asyncio.to_thread(bet_generator.generate_bet_suggestions, team_data, player_id, luck_level)
 
         logger.info(f"Adjusted odds for player {player_id} to luck level {luck_level}")
         
@@ -242,6 +194,95 @@ async def adjust_odds(request):
         logger.error(f"Error adjusting odds: {e}")
         return JsonResponse({'error': 'Failed to adjust odds.'}, status=500)
 
+# View to generate bet suggestions for many managers at once
+@csrf_exempt
+@require_http_methods(["POST"])
+async def generate_bet_suggestions_batch(request):
+    """
+    Stream bet suggestions for a list of managers as newline-delimited JSON.
+    Body: {"requests": [{"playerId": ..., "luckLevel": ...}, ...]}
+    """
+    config = getattr(settings, 'FPL_BATCH_SUGGESTIONS', {})
+    try:
+        body = json.loads(request.body)
+        entries = [
+            (str(item['playerId']), int(item.get('luckLevel', 0)))
+            for item in body.get('requests', []) if item.get('playerId')
+        ]
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+
+    if not entries:
+        return JsonResponse({'error': 'No requests provided.'}, status=400)
+
+    max_managers = config.get('MAX_MANAGERS', 5000)
+    if len(entries) > max_managers:
+        return JsonResponse({'error': f'At most {max_managers} requests per batch.'}, status=400)
+
+    # Every manager in the batch shares one bootstrap snapshot and gameweek
+    current_event = await get_current_event()
+    if not current_event:
+        return JsonResponse({'error': 'Could not fetch current event.'}, status=500)
+    bet_generator.use_bootstrap(await get_bootstrap_snapshot())
+
+    concurrency = config.get('CONCURRENCY', 20)
+    chunk_size = config.get('CHUNK_SIZE', 50)
+
+    def price_chunk(chunk):
+        results = bet_generator.generate_bet_suggestions_batch(
+            [(squad.players, player_id, luck_level) for player_id, luck_level, squad in chunk]
+        )
+        return [
+            encode_json({
+                'type': 'suggestions',
+                'player_id': player_id,
+                'luck_level': luck_level,
+                'bet_legs': result['bet_legs'],
+                'total_odds': result['total_odds']
+            }) + b"\n"
+            for (player_id, luck_level, _), result in zip(chunk, results)
+        ]
+
+    async def stream_batch():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_squad(player_id, luck_level):
+            async with semaphore:
+                # Read through the interactive squad cache, but don't fill it with batch squads
+                return player_id, luck_level, await _get_squad(player_id, current_event, store=False)
+
+        tasks = [asyncio.create_task(fetch_squad(player_id, luck_level)) for player_id, luck_level in entries]
+        chunk = []
+        failed = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                player_id, luck_level, squad = await next_result
+                if squad is None:
+                    failed += 1
+                    yield encode_json({'type': 'error', 'player_id': player_id, 'error': 'Team data not found.'}) + b"\n"
+                    continue
+                # Squads are priced in chunks so odds are adjusted for many slips at once
+                chunk.append((player_id, luck_level, squad))
+                if len(chunk) >= chunk_size:
+                    for line in await asyncio.to_thread(price_chunk, chunk):
+                        yield line
+                    chunk = []
+            if chunk:
+                for line in await asyncio.to_thread(price_chunk, chunk):
+                    yield line
+
+            yield encode_json({
+                'type': 'summary',
+                'gameweek': current_event['id'],
+                'requested': len(entries),
+                'succeeded': len(entries) - failed,
+                'failed': failed
+            }) + b"\n"
+        finally:
+            cancel_tasks(tasks)
+
+    return StreamingHttpResponse(stream_batch(), content_type='application/x-ndjson')
+
 # View to place a bet
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -256,8 +297,8 @@ async def place_bet(request):
         # Generate unique bet ID
         bet_id = str(uuid.uuid4())
         
-        # Record the bet in user history for ML learning
-        bet_generator.record_bet(player_id, {
+        # Record the bet in user history for ML learning (the store write blocks, keep it off the loop)
+        await asyncio.to_thread(bet_generator.record_bet, player_id, {
             **bet_data,
             'bet_id': bet_id
         })
@@ -292,17 +333,20 @@ async def debug_user_history(request):
         return JsonResponse({'error': 'Player ID missing.'}, status=400)
     
     try:
-        # Reload history from file to ensure we have latest data
-        bet_generator.reload_history()
+        def read_history():
+            # Per-process stores need a reload to see bets recorded by other workers
+            if not bet_generator.history_store.shared:
+                bet_generator.reload_history()
+            return bet_generator.get_user_history(player_id), bet_generator.history_store.user_count()
         
         # Get user history
-        user_history = bet_generator.get_user_history(player_id)
+        user_history, total_users = await asyncio.to_thread(read_history)
         
         return JsonResponse({
             'player_id': player_id,
             'bet_count': len(user_history),
             'history': user_history,
-            'total_users': len(bet_generator.user_betting_history)
+            'total_users': total_users
         })
         
     except Exception as e:
@@ -319,7 +363,7 @@ async def user_history(request):
     
     try:
         # Get user history
-        user_history = bet_generator.get_user_history(player_id)
+        user_history = await asyncio.to_thread(bet_generator.get_user_history, player_id)
         
         return JsonResponse({
             'player_id': player_id,
@@ -342,7 +386,7 @@ async def debug_ml_calculations(request):
     
     try:
         # Get user history
-        user_history = bet_generator.get_user_history(player_id)
+        user_history = await asyncio.to_thread(bet_generator.get_user_history, player_id)
         
         # Calculate baseline odds
         baseline_odds = bet_generator._calculate_baseline_odds(user_history)
@@ -387,7 +431,7 @@ async def get_autocomplete_suggestions(request):
         return JsonResponse({'suggestions': []})
     
     try:
-        suggestions = typesense_service.get_autocomplete_suggestions(query, field)
+        suggestions = await typesense_service.get_autocomplete_suggestions(query, field)
         return JsonResponse({
             'suggestions': suggestions,
             'query': query,
@@ -415,9 +459,54 @@ async def get_player_leagues_view(request):
         logger.error(f"Error fetching player leagues: {e}")
         return JsonResponse({'error': 'Failed to fetch leagues.'}, status=500)
 
+def _is_not_modified(request, etag):
+    response = get_conditional_response(request, etag=etag)
+    return response is not None and response.status_code == 304
+
+def _news_format(request):
+    """
+    Article representation requested by the client:
+    ?standings=window (default) | full | none, and ?fields=a,b,c to project articles
+    """
+    standings_mode = request.GET.get('standings', 'window')
+    if standings_mode not in STANDINGS_MODES:
+        standings_mode = 'window'
+    fields = [field for field in request.GET.get('fields', '').split(',') if field] or None
+    return standings_mode, fields
+
+def _variant_etag(etag, *variant):
+    """Distinct strong ETag per representation of the same news; the default representation keeps the base ETag"""
+    if not etag or not any(variant):
+        return etag
+    digest = hashlib.blake2b(f"{etag}|{variant!r}".encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+def _cacheable_news_response(request, payload, etag, finished, content_type):
+    """
+    League news with a strong ETag and Cache-Control so browsers and CDNs
+    can revalidate; 304 when the client's If-None-Match is current.
+    Payload may be None when the caller already knows the ETag matches.
+    """
+    if not etag:
+        return encoded_response(request, payload, content_type=content_type)
+    if payload is None or _is_not_modified(request, etag):
+        response = HttpResponseNotModified()
+        patch_vary_headers(response, ('Accept',))
+    else:
+        response = encoded_response(request, payload, content_type=content_type)
+    config = getattr(settings, 'FPL_NEWS_HTTP_CACHE', {})
+    max_age = config.get('FINISHED_MAX_AGE', 3600) if finished else config.get('LIVE_MAX_AGE', 60)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age, must_revalidate=True)
+    return response
+
 @csrf_exempt
 async def generate_league_news(request):
-    """Generate news articles for all player's leagues"""
+    """
+    Generate news articles for all player's leagues.
+    Standings are trimmed to the leaders and the rows around the manager
+    unless ?standings=full; see _news_format for the other options.
+    """
     player_id = request.GET.get('playerId')
     team_name = request.GET.get('teamName', 'Your Team')
     manager_name = request.GET.get('managerName', 'Manager')
@@ -425,50 +514,107 @@ async def generate_league_news(request):
     if not player_id:
         return JsonResponse({'error': 'Player ID missing.'}, status=400)
     
+    standings_mode, fields = _news_format(request)
+    content_type = negotiate_content_type(request)
+    variant = (
+        standings_mode if standings_mode != 'window' else None,
+        tuple(fields) if fields else None,
+        content_type if content_type != JSON_CONTENT_TYPE else None
+    )
+    
     try:
-        # Get player's leagues
-        leagues = await get_player_leagues(player_id)
-        if not leagues:
-            return JsonResponse({'error': 'No leagues found.'}, status=404)
+        # SQLite is blocking, keep it off the event loop (and skip the write for managers already on file)
+        if not article_store.is_remembered(player_id, team_name, manager_name):
+            await asyncio.to_thread(article_store.remember_manager, player_id, team_name, manager_name)
         
-        # Get current gameweek and team data
+        # Once the gameweek is over the background worker may already have rendered these
+        # (stored in the default windowed format, which can still be projected)
         current_event = await get_current_event()
-        if not current_event:
-            return JsonResponse({'error': 'Could not fetch current event.'}, status=500)
+        finished = bool(current_event and current_event.get('finished'))
+        if finished and standings_mode == 'window':
+            stored = await asyncio.to_thread(article_store.get_articles, player_id, current_event['id'], team_name, manager_name)
+            if stored is not None:
+                logger.info(f"Serving precomputed league news for {player_id}, gameweek {current_event['id']}")
+                payload, etag = stored
+                payload['articles'] = [project_article(article, fields) for article in payload['articles']]
+                return _cacheable_news_response(request, payload, _variant_etag(etag, *variant), finished, content_type)
         
-        gameweek = current_event['id']
-        team_response = await get_team_data(player_id, gameweek)
-        
-        if not team_response:
-            return JsonResponse({'error': 'Team data not found.'}, status=404)
-        
-        # Generate articles for each league
-        news_generator = NewsGenerator()
-        articles = []
-        
-        for league in leagues:
-            league_standings = await get_league_standings(league['id'], gameweek)
-            transfers_data = await get_player_transfers(player_id, gameweek)
-            chips_data = await get_player_captain_chips(player_id, gameweek)
-            
-            if league_standings:
-                article = news_generator.generate_article(
-                    league, 
-                    {
-                        'team_name': team_name,
-                        'manager_name': manager_name,
-                        'team_data': team_response['team_data'],
-                        'active_chip': team_response.get('active_chip')
-                    },
-                    {'gameweek': gameweek},
-                    league_standings,
-                    int(player_id),
-                    transfers_data,
-                    chips_data
-                )
-                articles.append(article)
+        # Inputs unchanged since the client's copy: answer 304 without rendering
+        error, result = await collect_league_news(
+            player_id, team_name, manager_name,
+            skip_render=lambda etag: _is_not_modified(request, _variant_etag(etag, *variant)),
+            standings_mode=standings_mode,
+            fields=fields
+        )
+        if error:
+            return JsonResponse({'error': error[1]}, status=error[0])
         
-        return JsonResponse({'articles': articles})
+        payload = None if result['articles'] is None else {'articles': result['articles'], 'league_errors': result['league_errors']}
+        return _cacheable_news_response(request, payload, _variant_etag(result['etag'], *variant), finished, content_type)
     except Exception as e:
         logger.error(f"Error generating league news: {e}")
         return JsonResponse({'error': 'Failed to generate news.'}, status=500)
+
+@csrf_exempt
+async def generate_league_news_stream(request):
+    """
+    Stream league news as newline-delimited JSON, one frame per league in
+    completion order, followed by a summary frame
+    """
+    player_id = request.GET.get('playerId')
+    team_name = request.GET.get('teamName', 'Your Team')
+    manager_name = request.GET.get('managerName', 'Manager')
+    
+    if not player_id:
+        return JsonResponse({'error': 'Player ID missing.'}, status=400)
+    
+    standings_mode, fields = _news_format(request)
+    try:
+        error, context = await prepare_league_news(player_id, team_name, manager_name)
+        if error:
+            return JsonResponse({'error': error[1]}, status=error[0])
+    except Exception as e:
+        logger.error(f"Error preparing league news stream: {e}")
+        return JsonResponse({'error': 'Failed to generate news.'}, status=500)
+
+    async def stream_articles():
+        news_generator = NewsGenerator()
+        standings_tasks = context['standings_tasks']
+        article_count = 0
+        error_count = 0
+        try:
+            for next_result in asyncio.as_completed(standings_tasks):
+                league_id, league_snapshot, error = await next_result
+                league = context['leagues'][league_id]
+                if error:
+                    error_count += 1
+                    frame = {'type': 'league_error', **league_error(league, league_id, error)}
+                else:
+                    try:
+                        article = build_league_article(
+                            news_generator, league, context['player_context'], context['gameweek'],
+                            league_snapshot, player_id, context['transfers_data'], context['chips_data'],
+                            standings_mode, fields
+                        )
+                        article_count += 1
+                        frame = {'type': 'article', 'article': article}
+                    except Exception as e:
+                        logger.error(f"Error generating article for league {league_id}: {e}")
+                        error_count += 1
+                        frame = {'type': 'league_error', **league_error(league, league_id, 'generation_failed')}
+                yield encode_json(frame) + b"\n"
+            
+            yield encode_json({
+                'type': 'summary',
+                'gameweek': context['gameweek'],
+                'articles': article_count,
+                'league_errors': error_count
+            }) + b"\n"
+        finally:
+            # Stop outstanding fetches if the client disconnects mid-stream
+            cancel_tasks(standings_tasks)
+
+    response = StreamingHttpResponse(stream_articles(), content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -7,10 +7,44 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
+import logging
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fpl_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up so the app registry and settings are ready
+from api.http_client import fpl_http_client, typesense_http_client  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+async def application(scope, receive, send):
+    """Django ASGI app wrapped with lifespan handling for shared resources"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await fpl_http_client.startup()
+                    await typesense_http_client.startup()
+                except Exception as e:
+                    logger.exception("ASGI lifespan startup failed")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    await fpl_http_client.close()
+                    await typesense_http_client.close()
+                except Exception as e:
+                    logger.exception("ASGI lifespan shutdown failed")
+                    await send({'type': 'lifespan.shutdown.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    else:
+        await django_application(scope, receive, send)
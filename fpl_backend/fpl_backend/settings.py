@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -146,3 +147,159 @@ TYPESENSE_CONFIG = {
     'api_key': os.getenv('TYPESENSE_ADMIN_API_KEY', 'lBA2upZ1w6kPfu9qj0fe1Jnkj1UPK1ts'),
     'connection_timeout_seconds': 2
 }
+
+# Search backend: 'remote' (TYPESENSE_CONFIG) or 'local', an in-process stand-in with the
+# same search semantics for offline benchmarks/tests, optionally preloaded from a JSONL/CSV
+# manager dump (see manage.py ingest_managers) and with simulated per-request latency
+TYPESENSE_BACKEND = {
+    'ENGINE': os.getenv('TYPESENSE_BACKEND', 'remote'),
+    'FIXTURE': os.getenv('TYPESENSE_LOCAL_FIXTURE'),
+    'LATENCY_MS': float(os.getenv('TYPESENSE_LOCAL_LATENCY_MS', '0')),
+}
+
+# Managers collection: create it when missing (normally done by manage.py
+# ensure_typesense_collection at deploy) and seconds before a failed check is retried
+TYPESENSE_COLLECTION = {
+    'NAME': os.getenv('TYPESENSE_COLLECTION', 'fplmanagers'),
+    'AUTO_CREATE': True,
+    'RETRY_INTERVAL': 60,
+}
+
+# Player lookup by manager/squad name: 'multi_search' sends every search strategy in one
+# request ('concurrent' = parallel searches, 'sequential' = one at a time), and resolved
+# names are cached for CACHE_TTL seconds
+TYPESENSE_PLAYER_SEARCH = {
+    'MODE': os.getenv('TYPESENSE_PLAYER_SEARCH_MODE', 'multi_search'),
+    'CACHE_TTL': 3600,
+    'CACHE_SIZE': 10000,
+}
+
+# Bulk manager ingestion (manage.py ingest_managers): documents per import request,
+# concurrent imports, retries with back-off when the cluster is busy, and request timeout.
+# Rejected documents go to <source>.rejected.jsonl; a batch rejecting more than
+# MAX_REJECTED_RATIO of its documents stops the run before the checkpoint passes it
+TYPESENSE_INGEST = {
+    'BATCH_SIZE': 5000,
+    'WORKERS': 4,
+    'MAX_RETRIES': 6,
+    'TIMEOUT': 300,
+    'REPORT_INTERVAL': 5,
+    'MAX_REJECTED_RATIO': 0.05,
+}
+
+# In-process autocomplete in front of Typesense: seconds/entries of cached query results,
+# and a prefix index over the INDEX_SIZE most frequently returned manager/squad names
+FPL_AUTOCOMPLETE = {
+    'CACHE_TTL': 300,
+    'CACHE_SIZE': 5000,
+    'PREFIX_INDEX': True,
+    'INDEX_SIZE': 20000,
+    'INDEX_REBUILD_INTERVAL': 60,
+}
+
+# FPL API root every upstream call is made against; point it at a local simulator
+# (manage.py benchmark_endpoints --serve) to run the backend without fantasy.premierleague.com
+FPL_API_BASE_URL = os.getenv('FPL_API_BASE_URL', 'https://fantasy.premierleague.com/api')
+
+# Shared FPL API HTTP client (connection pool shared by api/services.py)
+FPL_HTTP_CLIENT = {
+    'limit': int(os.getenv('FPL_HTTP_POOL_LIMIT', '100')),
+    'limit_per_host': int(os.getenv('FPL_HTTP_POOL_LIMIT_PER_HOST', '30')),
+    'ttl_dns_cache': 300,
+    'keepalive_timeout': 30,
+    'total_timeout': 15,
+    'connect_timeout': 5,
+}
+
+# Typesense's own connection pool, kept apart from the FPL API's so search traffic
+# neither competes for FPL connections nor shows up in their metrics; request
+# timeouts come from TYPESENSE_CONFIG
+TYPESENSE_HTTP_CLIENT = {
+    'limit': int(os.getenv('TYPESENSE_HTTP_POOL_LIMIT', '50')),
+    'limit_per_host': int(os.getenv('TYPESENSE_HTTP_POOL_LIMIT_PER_HOST', '50')),
+    'keepalive_timeout': 30,
+}
+
+# Seconds a cached bootstrap-static payload is served before revalidation
+FPL_BOOTSTRAP_CACHE_TTL = int(os.getenv('FPL_BOOTSTRAP_CACHE_TTL', '300'))
+# Seconds after a failed bootstrap-static fetch during which the stale payload is served without retrying
+FPL_BOOTSTRAP_RETRY_INTERVAL = int(os.getenv('FPL_BOOTSTRAP_RETRY_INTERVAL', '10'))
+
+# League news fan-out: max concurrent standings fetches and per-league timeout (seconds)
+FPL_LEAGUE_FETCH_CONCURRENCY = int(os.getenv('FPL_LEAGUE_FETCH_CONCURRENCY', '5'))
+FPL_LEAGUE_FETCH_TIMEOUT = float(os.getenv('FPL_LEAGUE_FETCH_TIMEOUT', '8'))
+
+# Bet history storage shared by all workers: 'sqlite' (default), 'redis', 'memory-redis' or 'jsonl'.
+# PATH only overrides the backend's own default file (api/user_betting_history.sqlite3 / .jsonl)
+BET_HISTORY_STORE = {
+    'BACKEND': os.getenv('BET_HISTORY_BACKEND', 'sqlite'),
+    'PATH': os.getenv('BET_HISTORY_PATH'),
+    'REDIS_URL': os.getenv('BET_HISTORY_REDIS_URL', 'redis://localhost:6379/0'),
+}
+
+# Per-(player, gameweek) squad cache used by the team and bet builder views.
+# TTLs are seconds while the gameweek is live vs. once it has finished.
+FPL_SQUAD_CACHE = {
+    'MAX_ENTRIES': int(os.getenv('FPL_SQUAD_CACHE_MAX_ENTRIES', '5000')),
+    'LIVE_TTL': 60,
+    'FINISHED_TTL': 3600,
+}
+
+# Batch bet suggestions: max managers per call, concurrent picks fetches, squads priced per chunk
+FPL_BATCH_SUGGESTIONS = {
+    'MAX_MANAGERS': 5000,
+    'CONCURRENCY': int(os.getenv('FPL_BATCH_CONCURRENCY', '20')),
+    'CHUNK_SIZE': 50,
+}
+
+# Full classic league standings: pages fetched concurrently per league and page cap (50 entries per page)
+FPL_STANDINGS = {
+    'PAGE_CONCURRENCY': int(os.getenv('FPL_STANDINGS_PAGE_CONCURRENCY', '4')),
+    'MAX_PAGES': int(os.getenv('FPL_STANDINGS_MAX_PAGES', '100')),
+}
+
+# League snapshots shared by every member's article. TTL is seconds before page 1
+# is rechecked for a new last-updated stamp; LRU eviction past the memory budget.
+FPL_LEAGUE_SNAPSHOT_CACHE = {
+    'TTL': 120,
+    'MEMORY_BUDGET_MB': int(os.getenv('FPL_LEAGUE_SNAPSHOT_MEMORY_MB', '64')),
+}
+
+# Background league news precompute (manage.py precompute_league_news): article store
+# location, seconds between bootstrap-static checks, managers rendered concurrently,
+# how recently a manager must have asked for news, and gameweeks of articles kept
+FPL_NEWS_PRECOMPUTE = {
+    'STORE_PATH': os.getenv('FPL_NEWS_STORE_PATH', str(BASE_DIR / 'api' / 'league_news.sqlite3')),
+    'POLL_INTERVAL': int(os.getenv('FPL_NEWS_POLL_INTERVAL', '300')),
+    'CONCURRENCY': int(os.getenv('FPL_NEWS_PRECOMPUTE_CONCURRENCY', '4')),
+    'MANAGER_MAX_AGE_DAYS': 30,
+    'KEEP_GAMEWEEKS': 2,
+}
+
+# League news rendering: seed template choice from (league, player, gameweek) so the
+# same inputs always render the same article, which enables strong ETags / 304s
+FPL_NEWS_DETERMINISTIC = os.getenv('FPL_NEWS_DETERMINISTIC', 'true').lower() == 'true'
+
+# Cache-Control max-age (seconds) for league news while the gameweek is live / finished
+FPL_NEWS_HTTP_CACHE = {
+    'LIVE_MAX_AGE': 60,
+    'FINISHED_MAX_AGE': 3600,
+}
+
+# Rows of league standings embedded in each article by default: the top N plus
+# RADIUS rows either side of the manager (?standings=full returns every row)
+FPL_NEWS_STANDINGS_WINDOW = {
+    'TOP': 10,
+    'RADIUS': 5,
+}
+
+# API response compression (api.middleware.CompressionMiddleware): bodies of at least
+# MIN_SIZE bytes are sent as brotli (if installed) or gzip when the client accepts it;
+# bodies past THREAD_MIN_SIZE are compressed off the event loop
+FPL_RESPONSE_COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'THREAD_MIN_SIZE': 256 * 1024,
+    'GZIP_LEVEL': 4,
+    'BROTLI_QUALITY': 5,
+}